@@ -0,0 +1,55 @@
+"""Add composite and partial indexes
+
+Revision ID: 5c1d2a7e9b4f
+Revises: 36ab80f3e3bb
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1d2a7e9b4f'
+down_revision: Union[str, None] = '36ab80f3e3bb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_user_id_status_created_at', 'orders', ['user_id', 'status', 'created_at'], unique=False)
+    op.create_index('ix_orders_user_id_created_at_placed', 'orders', ['user_id', 'created_at'], unique=False,
+                    postgresql_where=sa.text("status <> 'cart'"))
+    op.create_index('ix_orders_created_at_placed', 'orders', ['created_at'], unique=False,
+                    postgresql_where=sa.text("status <> 'cart'"))
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_orders_user_id_cart', 'orders', ['user_id'], unique=False,
+                    postgresql_where=sa.text("status = 'cart'"))
+    # Одноколоночные индексы покрываются префиксами составных
+    op.drop_index('ix_orders_user_id', table_name='orders')
+    op.drop_index('ix_orders_status', table_name='orders')
+
+    op.create_index('ix_order_items_order_id_product_id', 'order_items', ['order_id', 'product_id'], unique=False)
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+
+    op.create_index('ix_products_is_active_category_id_brand_id', 'products',
+                    ['is_active', 'category_id', 'brand_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_is_active_category_id_brand_id', table_name='products')
+
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.drop_index('ix_order_items_order_id_product_id', table_name='order_items')
+
+    op.create_index(op.f('ix_orders_status'), 'orders', ['status'], unique=False)
+    op.create_index(op.f('ix_orders_user_id'), 'orders', ['user_id'], unique=False)
+    op.drop_index('ix_orders_user_id_cart', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_created_at_placed', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at_placed', table_name='orders')
+    op.drop_index('ix_orders_user_id_status_created_at', table_name='orders')
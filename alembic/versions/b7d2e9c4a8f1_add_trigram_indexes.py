@@ -0,0 +1,45 @@
+"""Add trigram indexes
+
+Revision ID: b7d2e9c4a8f1
+Revises: 8e3f4b6a1c2d
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e9c4a8f1'
+down_revision: Union[str, None] = '8e3f4b6a1c2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (индекс, таблица, столбец)
+TRIGRAM_INDEXES = [
+    ('ix_products_name_trgm', 'products', 'name'),
+    ('ix_products_sku_trgm', 'products', 'sku'),
+    ('ix_brands_name_trgm', 'brands', 'name'),
+    ('ix_brands_description_trgm', 'brands', 'description'),
+    ('ix_categories_name_trgm', 'categories', 'name'),
+    ('ix_categories_description_trgm', 'categories', 'description'),
+    ('ix_users_username_trgm', 'users', 'username'),
+    ('ix_users_email_trgm', 'users', 'email'),
+    ('ix_users_full_name_trgm', 'users', 'full_name'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index, table, column in TRIGRAM_INDEXES:
+        op.create_index(index, table, [column], unique=False,
+                        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Расширение pg_trgm не удаляется: его могут использовать другие объекты БД
+    for index, table, column in reversed(TRIGRAM_INDEXES):
+        op.drop_index(index, table_name=table, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
@@ -0,0 +1,53 @@
+"""Add product sales count and sort indexes
+
+Revision ID: d4a6c8e2f1b3
+Revises: b7d2e9c4a8f1
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a6c8e2f1b3'
+down_revision: Union[str, None] = 'b7d2e9c4a8f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('sales_count', sa.Integer(), server_default='0', nullable=False))
+    # Продажи по уже оформленным и не отмененным заказам
+    op.execute(
+        "UPDATE products SET sales_count = sold.quantity "
+        "FROM (SELECT order_items.product_id, sum(order_items.quantity) AS quantity "
+        "FROM order_items JOIN orders ON orders.id = order_items.order_id "
+        "WHERE orders.status NOT IN ('cart', 'canceled') GROUP BY order_items.product_id) AS sold "
+        "WHERE products.id = sold.product_id"
+    )
+
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'], unique=False)
+    op.create_index('ix_products_name_id', 'products', ['name', 'id'], unique=False)
+    op.create_index('ix_products_sales_count_id', 'products', ['sales_count', 'id'], unique=False)
+    op.create_index('ix_products_out_of_stock', 'products', ['id'], unique=False,
+                    postgresql_where=sa.text('stock <= 0'))
+    # Одноколоночные индексы покрываются префиксами составных
+    op.drop_index('ix_products_price', table_name='products')
+    op.drop_index('ix_products_name', table_name='products')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_products_name'), 'products', ['name'], unique=False)
+    op.create_index(op.f('ix_products_price'), 'products', ['price'], unique=False)
+    op.drop_index('ix_products_out_of_stock', table_name='products')
+    op.drop_index('ix_products_sales_count_id', table_name='products')
+    op.drop_index('ix_products_name_id', table_name='products')
+    op.drop_index('ix_products_created_at_id', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_column('products', 'sales_count')
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from api.v1.endpoints import (
     categories, 
@@ -9,11 +9,24 @@ from api.v1.endpoints import (
     users,
     roles,
     cart,      
-    orders     
+    orders,
+    admin
 )
 
+from config import get_settings
+from utils.query_limits import query_limits
+
+settings = get_settings()
+
 api_router = APIRouter()
 
+# Короткий таймаут и бюджет запросов для каталога, длинный таймаут для служебных маршрутов
+catalog_limits = [Depends(query_limits(
+    timeout_ms=settings.DB_CATALOG_STATEMENT_TIMEOUT_MS,
+    max_statements=settings.DB_CATALOG_QUERY_BUDGET
+))]
+admin_limits = [Depends(query_limits(timeout_ms=settings.DB_ADMIN_STATEMENT_TIMEOUT_MS))]
+
 # Маршруты аутентификации (публичные)
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 
@@ -22,11 +35,15 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(roles.router, prefix="/roles", tags=["roles"])
 
 # Маршруты для работы с данными магазина
-api_router.include_router(categories.router, prefix="/categories", tags=["categories"])
-api_router.include_router(brands.router, prefix="/brands", tags=["brands"])
-api_router.include_router(products.router, prefix="/products", tags=["products"])
-api_router.include_router(product_images.router, prefix="/product-images", tags=["product-images"])
+api_router.include_router(categories.router, prefix="/categories", tags=["categories"], dependencies=catalog_limits)
+api_router.include_router(brands.router, prefix="/brands", tags=["brands"], dependencies=catalog_limits)
+api_router.include_router(products.router, prefix="/products", tags=["products"], dependencies=catalog_limits)
+api_router.include_router(product_images.router, prefix="/product-images", tags=["product-images"],
+                          dependencies=catalog_limits)
 
 # Маршруты для работы с заказами
 api_router.include_router(cart.router, prefix="/cart", tags=["cart"])
-api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
\ No newline at end of file
+api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
+
+# Служебные маршруты администратора (телеметрия БД)
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"], dependencies=admin_limits)
\ No newline at end of file
@@ -0,0 +1,99 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, Query
+
+from models.user import User
+from database import replica_router
+from schemas.admin import CacheStats, NPlusOneSuspect, PoolStats, ReplicaStatus, SlowQuery
+from services.product import product_detail_cache, search_result_cache
+from utils.auth import check_admin_access
+from utils.pool_telemetry import POOL_TELEMETRY, get_pool_stats
+from utils.slow_queries import slow_query_log
+from utils.sql_instrumentation import n_plus_one_registry
+from utils.user_cache import user_cache
+
+router = APIRouter()
+
+# Кэши процесса, счетчики которых отдаются в /admin/caches
+CACHES = {
+    "product_detail": product_detail_cache,
+    "product_search": search_result_cache,
+    "users": user_cache,
+}
+
+
+@router.get("/db/pool", response_model=List[PoolStats])
+def read_pool_stats(
+        current_user: User = Depends(check_admin_access)
+) -> Any:
+    """
+    Телеметрия пулов соединений с БД (только для администраторов).
+    """
+    return get_pool_stats()
+
+
+@router.post("/db/pool/reset", response_model=List[PoolStats])
+def reset_pool_stats(
+        current_user: User = Depends(check_admin_access)
+) -> Any:
+    """
+    Сброс накопленных счетчиков пулов соединений (только для администраторов).
+    """
+    for telemetry in POOL_TELEMETRY.values():
+        telemetry.reset()
+
+    return get_pool_stats()
+
+
+@router.get("/db/replicas", response_model=List[ReplicaStatus])
+def read_replica_status(
+        current_user: User = Depends(check_admin_access)
+) -> Any:
+    """
+    Состояние реплик для чтения: доступность и отставание (только для администраторов).
+    """
+    return replica_router.status()
+
+
+@router.get("/db/n-plus-one", response_model=List[NPlusOneSuspect])
+def read_n_plus_one_suspects(
+        current_user: User = Depends(check_admin_access)
+) -> Any:
+    """
+    Маршруты с подозрением на N+1: повторяющиеся формы SQL-запросов (только для администраторов).
+    """
+    return n_plus_one_registry.snapshot()
+
+
+@router.get("/db/slow-queries", response_model=List[SlowQuery])
+def read_slow_queries(
+        limit: int = Query(50, ge=1, le=1000),
+        with_plan: bool = Query(False, description="Только запросы с планом выполнения"),
+        current_user: User = Depends(check_admin_access)
+) -> Any:
+    """
+    Последние медленные запросы с планами EXPLAIN (только для администраторов).
+    """
+    return slow_query_log.snapshot(limit=limit, with_plan=with_plan)
+
+
+@router.post("/db/slow-queries/reset", response_model=List[SlowQuery])
+def reset_slow_queries(
+        current_user: User = Depends(check_admin_access)
+) -> Any:
+    """
+    Очистка журнала медленных запросов (только для администраторов).
+    """
+    slow_query_log.clear()
+
+    return slow_query_log.snapshot()
+
+
+@router.get("/caches", response_model=List[CacheStats])
+def read_cache_stats(
+        current_user: User = Depends(check_admin_access)
+) -> Any:
+    """
+    Счетчики попаданий, промахов и вытеснений кэшей текущего процесса (только для администраторов).
+    Для кэша результатов поиска - также сэкономленное попаданиями время (saved_ms).
+    """
+    return [{"name": name, **cache.stats()} for name, cache in CACHES.items()]
\ No newline at end of file
@@ -1,14 +1,15 @@
 from typing import List, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_db, get_read_db
 from models.brand import Brand
 from models.user import User
 from schemas.brand import Brand as BrandSchema, BrandCreate, BrandUpdate
 from schemas.base import PaginatedResponse
 from services.brand import BrandService
 from utils.auth import get_current_user, check_create_access, check_update_access, check_delete_access
+from utils.etag import etag_matches, not_modified
 
 router = APIRouter()
 service = BrandService()
@@ -16,23 +17,27 @@ service = BrandService()
 
 @router.get("/", response_model=PaginatedResponse[BrandSchema])
 def list_brands(
+        request: Request,
+        response: Response,
         page: int = Query(1, ge=1, description="Номер страницы"),
         per_page: int = Query(20, ge=1, le=100, description="Количество элементов на странице"),
         query: Optional[str] = Query(None, description="Поисковый запрос"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Получение списка брендов с пагинацией и возможностью поиска.
+    Поддерживает условный запрос If-None-Match (ответ 304).
     """
+    etag = service.get_collection_etag(db)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
     skip = (page - 1) * per_page
 
-    if query:
-        items = service.search(db, query=query, skip=skip, limit=per_page)
-        total = service.search_count(db, query=query)
-    else:
-        items = service.get_multi(db, skip=skip, limit=per_page)
-        total = service.get_count(db)
+    # Таблица небольшая: страница и поиск выполняются по копии в кэше
+    items, total = service.get_page_cached(db, skip=skip, limit=per_page, query=query)
 
     pages = (total + per_page - 1) // per_page
     return {
@@ -66,7 +71,7 @@ def create_brand(
 @router.get("/{brand_id}", response_model=BrandSchema)
 def get_brand(
         brand_id: int,
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ) -> Any:
     """
@@ -3,13 +3,17 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from database import get_db
-from models.user import User
 from models.order import OrderStatus
 from schemas.order import Order, OrderCreate, OrderUpdate
-from schemas.base import PaginatedResponse
+from schemas.base import PaginatedResponse, TotalMode
 from services.order import OrderService
-from utils.auth import get_current_user, check_admin_access
+from utils.auth import get_current_user, check_admin_access, is_admin
+from utils.pagination import page_response
+from utils.query_limits import query_limits
+from utils.user_cache import CachedUser
+from config import get_settings
 
+settings = get_settings()
 router = APIRouter()
 order_service = OrderService()
 
@@ -18,7 +22,7 @@ order_service = OrderService()
 def create_order(
     order_data: OrderCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CachedUser = Depends(get_current_user)
 ) -> Any:
     """
     Оформление заказа из корзины
@@ -36,8 +40,10 @@ def create_order(
 def list_user_orders(
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(10, ge=1, le=100, description="Количество элементов на странице"),
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="Подсчет общего количества: exact, estimated, none"),
+    cursor: Optional[str] = Query(None, description="Курсор страницы из next_cursor/prev_cursor (вместо page)"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CachedUser = Depends(get_current_user)
 ) -> Any:
     """
     Получение списка заказов пользователя
@@ -45,40 +51,47 @@ def list_user_orders(
     skip = (page - 1) * per_page
     
     # Получаем заказы пользователя
-    orders = order_service.get_user_orders(
+    result = order_service.get_user_orders_page(
         db, 
         user_id=current_user.id, 
         skip=skip, 
-        limit=per_page
+        limit=per_page,
+        cursor=cursor,
+        with_total=total_mode == TotalMode.EXACT
     )
+    orders = result.items
     
     # Загружаем элементы для каждого заказа
     for order in orders:
         order_with_items = order_service.get_order_with_items(db, order.id)
         order.items = order_with_items.items
     
-    # Получаем общее количество заказов пользователя
-    total = order_service.get_user_orders_count(db, user_id=current_user.id)
-    
-    # Вычисляем общее количество страниц
-    pages = (total + per_page - 1) // per_page  # Округление вверх
+    # Общее количество: при total=exact получено тем же запросом, что и страница
+    if result.aggregates is not None:
+        total, total_kind = result.aggregates["total"], TotalMode.EXACT
+    else:
+        total, total_kind = order_service.get_user_orders_total(db, user_id=current_user.id, total_mode=total_mode)
     
-    return {
-        "items": orders,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": pages
-    }
+    return page_response(
+        orders,
+        page=page,
+        per_page=per_page,
+        total=total,
+        total_kind=total_kind,
+        next_cursor=result.next_cursor,
+        prev_cursor=result.prev_cursor
+    )
 
 
 @router.get("/history", response_model=PaginatedResponse[Order])
 def get_order_history(
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(10, ge=1, le=100, description="Количество элементов на странице"),
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="Подсчет общего количества: exact, estimated, none"),
+    cursor: Optional[str] = Query(None, description="Курсор страницы из next_cursor/prev_cursor (вместо page)"),
     status: Optional[str] = Query(None, description="Фильтр по статусу заказа"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CachedUser = Depends(get_current_user)
 ) -> Any:
     """
     Получение истории заказов пользователя с возможностью фильтрации по статусу
@@ -86,49 +99,55 @@ def get_order_history(
     skip = (page - 1) * per_page
     
     # Получаем заказы пользователя
-    orders = order_service.get_user_orders(
+    result = order_service.get_user_orders_page(
         db, 
         user_id=current_user.id, 
         skip=skip, 
         limit=per_page,
-        status=status
+        status=status,
+        cursor=cursor,
+        with_total=total_mode == TotalMode.EXACT
     )
+    orders = result.items
     
     # Загружаем элементы для каждого заказа
     for order in orders:
         order_with_items = order_service.get_order_with_items(db, order.id)
         order.items = order_with_items.items
     
-    # Получаем общее количество заказов пользователя
-    total = order_service.get_user_orders_count(
-        db, 
-        user_id=current_user.id,
-        status=status
-    )
-    
-    # Вычисляем общее количество страниц
-    pages = (total + per_page - 1) // per_page  # Округление вверх
+    # Общее количество: при total=exact получено тем же запросом, что и страница
+    if result.aggregates is not None:
+        total, total_kind = result.aggregates["total"], TotalMode.EXACT
+    else:
+        total, total_kind = order_service.get_user_orders_total(
+            db, 
+            user_id=current_user.id,
+            status=status,
+            total_mode=total_mode
+        )
     
-    return {
-        "items": orders,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": pages
-    }
+    return page_response(
+        orders,
+        page=page,
+        per_page=per_page,
+        total=total,
+        total_kind=total_kind,
+        next_cursor=result.next_cursor,
+        prev_cursor=result.prev_cursor
+    )
 
 
 @router.get("/{order_id}", response_model=Order)
 def get_order(
     order_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CachedUser = Depends(get_current_user)
 ) -> Any:
     """
     Получение информации о заказе
     """
     # Для обычных пользователей - только свои заказы
-    if not current_user.role.is_admin:
+    if not is_admin(current_user):
         order = order_service.get_order_with_items(db, order_id, current_user.id)
         if not order:
             raise HTTPException(
@@ -153,7 +172,7 @@ def update_order(
     order_id: int,
     order_data: OrderUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CachedUser = Depends(get_current_user)
 ) -> Any:
     """
     Обновление заказа
@@ -162,7 +181,7 @@ def update_order(
     order = None
     
     # Для обычных пользователей - только свои заказы и ограниченные изменения
-    if not current_user.role.is_admin:
+    if not is_admin(current_user):
         order = order_service.get(db, id=order_id)
         if not order or order.user_id != current_user.id:
             raise HTTPException(
@@ -226,14 +245,14 @@ def update_order(
 def cancel_order(
     order_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CachedUser = Depends(get_current_user)
 ) -> Any:
     """
     Отмена заказа и возврат товаров на склад
     """
     try:
         # Для обычных пользователей - только свои заказы и только в статусе NEW
-        if not current_user.role.is_admin:
+        if not is_admin(current_user):
             order = order_service.get(db, id=order_id)
             if not order or order.user_id != current_user.id:
                 raise HTTPException(
@@ -268,14 +287,20 @@ def cancel_order(
 
 
 # Административный доступ к заказам
-@router.get("/admin/all", response_model=PaginatedResponse[Order])
+@router.get(
+    "/admin/all",
+    response_model=PaginatedResponse[Order],
+    dependencies=[Depends(query_limits(timeout_ms=settings.DB_ADMIN_STATEMENT_TIMEOUT_MS))]
+)
 def list_all_orders(
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(10, ge=1, le=100, description="Количество элементов на странице"),
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="Подсчет общего количества: exact, estimated, none"),
+    cursor: Optional[str] = Query(None, description="Курсор страницы из next_cursor/prev_cursor (вместо page)"),
     status: Optional[str] = Query(None, description="Фильтр по статусу заказа"),
     user_id: Optional[int] = Query(None, description="Фильтр по ID пользователя"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(check_admin_access)  # Только администраторы
+    current_user: CachedUser = Depends(check_admin_access)  # Только администраторы
 ) -> Any:
     """
     Получение списка всех заказов (только для администраторов)
@@ -283,36 +308,42 @@ def list_all_orders(
     skip = (page - 1) * per_page
     
     # Получаем заказы
-    orders = order_service.get_admin_orders(
+    result = order_service.get_admin_orders_page(
         db, 
         skip=skip, 
         limit=per_page,
         status=status,
-        user_id=user_id
+        user_id=user_id,
+        cursor=cursor,
+        with_total=total_mode == TotalMode.EXACT
     )
+    orders = result.items
     
     # Загружаем элементы для каждого заказа
     for order in orders:
         order_with_items = order_service.get_order_with_items(db, order.id)
         order.items = order_with_items.items
     
-    # Получаем общее количество заказов
-    total = order_service.get_admin_orders_count(
-        db,
-        status=status,
-        user_id=user_id
-    )
-    
-    # Вычисляем общее количество страниц
-    pages = (total + per_page - 1) // per_page  # Округление вверх
+    # Общее количество: при total=exact получено тем же запросом, что и страница
+    if result.aggregates is not None:
+        total, total_kind = result.aggregates["total"], TotalMode.EXACT
+    else:
+        total, total_kind = order_service.get_admin_orders_total(
+            db,
+            status=status,
+            user_id=user_id,
+            total_mode=total_mode
+        )
     
-    return {
-        "items": orders,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": pages
-    }
+    return page_response(
+        orders,
+        page=page,
+        per_page=per_page,
+        total=total,
+        total_kind=total_kind,
+        next_cursor=result.next_cursor,
+        prev_cursor=result.prev_cursor
+    )
 
 
 @router.post("/admin/{order_id}/status", response_model=Order)
@@ -320,7 +351,7 @@ def change_order_status(
     order_id: int,
     status: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(check_admin_access)  # Только администраторы
+    current_user: CachedUser = Depends(check_admin_access)  # Только администраторы
 ) -> Any:
     """
     Изменение статуса заказа (только для администраторов)
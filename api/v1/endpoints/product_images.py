@@ -1,9 +1,9 @@
 # В начало файла добавьте следующий импорт (или обновите существующий):
 from typing import List, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Form, Request, Response
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_db, get_read_db
 from models.product import Product
 from schemas.product_image import ProductImage as ProductImageSchema  # Pydantic схема
 from models.product_image import ProductImage
@@ -12,6 +12,7 @@ from schemas.product_image import ProductImage as ProductImageSchema, ProductIma
 from services.product_image import ProductImageService
 from services.product import ProductService
 from utils.auth import get_current_user, check_create_access, check_update_access, check_delete_access
+from utils.etag import collection_etag, etag_matches, not_modified
 from utils.file_handling import save_upload_file  # Убедитесь, что добавили этот файл
 
 router = APIRouter()
@@ -32,11 +33,14 @@ def count_product_images(
 @router.get("/by-product/{product_id}", response_model=List[ProductImageSchema])
 def list_product_images(
         product_id: int,
-        db: Session = Depends(get_db),
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Получение списка изображений товара по ID товара.
+    Поддерживает условный запрос If-None-Match (ответ 304).
     """
     # Проверяем, существует ли товар
     product = product_service.get(db, id=product_id)
@@ -46,7 +50,18 @@ def list_product_images(
             detail=f"Товар с ID {product_id} не найден"
         )
 
-    return service.get_by_product(db, product_id=product_id)
+    # Версия проверяется отдельным запросом только для условного запроса
+    if request.headers.get("if-none-match"):
+        count, last_modified = service.get_collection_version(db, filters={"product_id": product_id})
+        etag = collection_etag("product_images", count, last_modified)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    images = service.get_by_product(db, product_id=product_id)
+    response.headers["ETag"] = collection_etag(
+        "product_images", len(images), max((image.updated_at for image in images), default=None)
+    )
+    return images
 
 
 @router.post("/", response_model=ProductImageSchema, status_code=201)
@@ -204,9 +219,4 @@ async def upload_product_image(
         "display_order": display_order
     }
     
-    db_obj = ProductImage(**image_data)
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
-    
-    return db_obj
\ No newline at end of file
+    return service.create(db, obj_in=image_data)
\ No newline at end of file
@@ -1,34 +1,62 @@
 from typing import List, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_db, get_read_db
 from models.product import Product
 from models.user import User
-from schemas.product import Product as ProductSchema, ProductDetail, ProductCreate, ProductUpdate
-from schemas.base import PaginatedResponse
+from schemas.product import (
+    Product as ProductSchema, ProductDetail, ProductCreate, ProductUpdate, ProductSuggestion, ProductList,
+    ProductSort
+)
+from schemas.base import SortOrder, TotalMode
 from services.product import ProductService
+from services.suggest import SuggestService
 from utils.auth import get_current_user, check_create_access, check_update_access, check_delete_access
+from utils.etag import collection_etag, etag_matches, make_etag, not_modified
+from utils.pagination import page_response
 
 router = APIRouter()
 service = ProductService()
+suggest_service = SuggestService()
 
 
-@router.get("/", response_model=PaginatedResponse[ProductSchema])
+@router.get("/", response_model=ProductList)
 def list_products(
+        request: Request,
+        response: Response,
         page: int = Query(1, ge=1, description="Номер страницы"),
         per_page: int = Query(20, ge=1, le=100, description="Количество элементов на странице"),
         query: Optional[str] = Query(None, description="Поисковый запрос"),
         category_id: Optional[int] = Query(None, description="Фильтр по категории"),
         brand_id: Optional[int] = Query(None, description="Фильтр по бренду"),
         is_active: Optional[bool] = Query(None, description="Фильтр по активности товара"),
-        db: Session = Depends(get_db),
+        total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="Подсчет общего количества: exact, estimated, none"),
+        cursor: Optional[str] = Query(None, description="Курсор страницы из next_cursor/prev_cursor (вместо page)"),
+        fuzzy: bool = Query(False, description="Нечеткий поиск по названию и артикулу с учетом опечаток"),
+        facets: bool = Query(False, description="Счетчики фасетов: категории, бренды, цена, наличие"),
+        sort: Optional[ProductSort] = Query(None, description="Сортировка: price, created_at, name, popularity (по умолчанию - по id, при поиске - по релевантности)"),
+        order: SortOrder = Query(SortOrder.ASC, description="Направление сортировки: asc, desc"),
+        price_min: Optional[float] = Query(None, ge=0, description="Минимальная цена (включительно)"),
+        price_max: Optional[float] = Query(None, ge=0, description="Максимальная цена (включительно)"),
+        in_stock: Optional[bool] = Query(None, description="Только товары в наличии (true) или без остатка (false)"),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ) -> Any:
     """
-    Получение списка товаров с пагинацией, поиском и фильтрацией.
+    Получение списка товаров с пагинацией, поиском, фильтрацией (включая цену
+    и наличие) и сортировкой sort/order.
+    Поддерживает условный запрос If-None-Match (ответ 304).
+    При facets=true возвращает счетчики фасетов; точное количество товаров
+    вычисляется тем же запросом, что и фасеты.
     """
     skip = (page - 1) * per_page
+    sort_field = sort.value if sort else None
+    descending = order == SortOrder.DESC
+    # Порядок входит в ETag: тот же набор товаров в другом порядке - другой ответ
+    list_name = f"products:{sort_field or 'default'}:{order.value}"
+    # Цена и наличие (ProductService.filter_builders)
+    range_filters = {"price_min": price_min, "price_max": price_max, "in_stock": in_stock}
 
     # Для админ-панели показываем все товары
     # Для клиентской части применяем фильтр is_active, если он указан
@@ -41,39 +69,127 @@ def list_products(
         filters["category_id"] = category_id
     if brand_id is not None:
         filters["brand_id"] = brand_id
+    filters.update(range_filters)
 
-    if query:
-        items = service.search(
+    exact = total_mode == TotalMode.EXACT
+    facet_counts = None
+    if facets:
+        # Фасеты, total и версия выборки - одним запросом (GROUPING SETS) до загрузки страницы
+        facet_counts, total, version = service.get_facets(
             db,
             query=query,
             category_id=category_id,
             brand_id=brand_id,
-            skip=skip,
-            limit=per_page,
-            is_active=is_active  # Передаем параметр is_active в метод search
+            is_active=is_active,
+            fuzzy=fuzzy,
+            filters=range_filters
         )
-        total = service.search_count(
+        total_kind = TotalMode.EXACT
+        etag = make_etag(list_name, "facets", *version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    elif exact and request.headers.get("if-none-match"):
+        # Условный запрос: версия списка (количество и max(updated_at)) проверяется до загрузки страницы
+        if query:
+            total, last_modified = service.search_version(
+                db,
+                query=query,
+                category_id=category_id,
+                brand_id=brand_id,
+                is_active=is_active,
+                fuzzy=fuzzy,
+                filters=range_filters
+            )
+        else:
+            total, last_modified = service.get_collection_version(db, filters=filters)
+
+        etag = collection_etag(list_name, total, last_modified)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    # При total=exact количество и max(updated_at) вычисляются в том же запросе, что и страница
+    if query:
+        result = service.search_page(
             db,
             query=query,
             category_id=category_id,
             brand_id=brand_id,
-            is_active=is_active  # Передаем параметр is_active в метод search_count
+            skip=skip,
+            limit=per_page,
+            is_active=is_active,
+            cursor=cursor,
+            with_total=exact and not facets,
+            fuzzy=fuzzy,
+            filters=range_filters,
+            sort=sort_field,
+            descending=descending
         )
     else:
-        items = service.get_multi(db, skip=skip, limit=per_page, filters=filters)
-        total = service.get_count(db, filters=filters)
+        result = service.get_page(
+            db,
+            skip=skip,
+            limit=per_page,
+            filters=filters,
+            cursor=cursor,
+            with_total=exact and not facets,
+            sort=sort_field,
+            descending=descending
+        )
+
+    # С фасетами total и ETag уже получены
+    if not facets:
+        if exact:
+            total, total_kind = result.aggregates["total"], TotalMode.EXACT
+            etag = collection_etag(list_name, total, result.aggregates["last_modified"])
+        else:
+            if query:
+                total, total_kind = service.search_total(
+                    db,
+                    query=query,
+                    category_id=category_id,
+                    brand_id=brand_id,
+                    is_active=is_active,
+                    total_mode=total_mode,
+                    fuzzy=fuzzy,
+                    filters=range_filters
+                )
+            else:
+                total, total_kind = service.get_total(db, filters=filters, total_mode=total_mode)
 
-    pages = (total + per_page - 1) // per_page
+            # Без точного подсчета версия коллекции неизвестна: ETag строится по самой странице
+            etag = make_etag(list_name, total, total_kind.value, *((item.id, item.updated_at) for item in result.items))
+            if etag_matches(request, etag):
+                return not_modified(etag)
+    response.headers["ETag"] = etag
 
     return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": pages
+        **page_response(
+            result.items,
+            page=page,
+            per_page=per_page,
+            total=total,
+            total_kind=total_kind,
+            next_cursor=result.next_cursor,
+            prev_cursor=result.prev_cursor
+        ),
+        "facets": facet_counts
     }
 
 
+@router.get("/suggest", response_model=List[ProductSuggestion])
+def suggest_products(
+        query: str = Query(..., min_length=1, max_length=100, description="Введенный текст"),
+        limit: int = Query(10, ge=1, le=20, description="Количество подсказок"),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Подсказки строки поиска: товары (по названию и артикулу), бренды и категории,
+    начинающиеся с введенного текста, по убыванию популярности.
+    """
+    return suggest_service.suggest(db, query, limit=limit)
+
+
 @router.post("/", response_model=ProductSchema, status_code=201)
 def create_product(
         product_in: ProductCreate,
@@ -98,20 +214,29 @@ def create_product(
 @router.get("/{product_id}", response_model=ProductDetail)
 def get_product(
         product_id: int,
-        db: Session = Depends(get_db),
+        request: Request,
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Получение детальной информации о товаре по ID.
+    Поддерживает условный запрос If-None-Match (ответ 304).
     """
-    product = service.get_with_relations(db, id=product_id)
-    if not product:
+    if request.headers.get("if-none-match"):
+        etag = service.get_detail_etag(db, id=product_id)
+        if etag is not None and etag_matches(request, etag):
+            return not_modified(etag)
+
+    detail = service.get_detail(db, id=product_id)
+    if detail is None:
         raise HTTPException(
             status_code=404,
             detail=f"Товар с ID {product_id} не найден"
         )
 
-    return product
+    # Карточка уже сериализована по схеме ProductDetail
+    etag, content = detail
+    return Response(content=content, media_type="application/json", headers={"ETag": etag})
 
 
 @router.put("/{product_id}", response_model=ProductSchema)
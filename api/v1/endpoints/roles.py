@@ -6,9 +6,10 @@ from database import get_db
 from models.user import User
 from models.role import Role
 from schemas.role import Role as RoleSchema, RoleCreate, RoleUpdate
-from schemas.base import PaginatedResponse
+from schemas.base import PaginatedResponse, TotalMode
 from services.role import RoleService
 from utils.auth import check_admin_access
+from utils.pagination import page_response
 
 router = APIRouter()
 role_service = RoleService()
@@ -18,6 +19,7 @@ role_service = RoleService()
 def list_roles(
         page: int = Query(1, ge=1, description="Номер страницы"),
         per_page: int = Query(20, ge=1, le=100, description="Количество элементов на странице"),
+        total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="Подсчет общего количества: exact, estimated, none"),
         db: Session = Depends(get_db),
         current_user: User = Depends(check_admin_access)
 ) -> Any:
@@ -25,17 +27,14 @@ def list_roles(
     Получение списка ролей (только для администраторов).
     """
     skip = (page - 1) * per_page
-    total = db.query(Role).count()
-    items = db.query(Role).offset(skip).limit(per_page).all()
-    pages = (total + per_page - 1) // per_page
-
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": pages
-    }
+    # При total=exact количество вычисляется в том же запросе, что и страница
+    result = role_service.get_page(db, skip=skip, limit=per_page, with_total=total_mode == TotalMode.EXACT)
+    if result.aggregates is not None:
+        total, total_kind = result.aggregates["total"], TotalMode.EXACT
+    else:
+        total, total_kind = role_service.get_total(db, total_mode=total_mode)
+
+    return page_response(result.items, page=page, per_page=per_page, total=total, total_kind=total_kind)
 
 
 @router.post("/", response_model=RoleSchema, status_code=201)
@@ -1,15 +1,18 @@
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session, joinedload
 
 from database import get_db
 from models.user import User
 from models.role import Role
 from schemas.user import User as UserSchema, UserCreate, UserUpdate, UserWithRole
-from schemas.base import PaginatedResponse
+from schemas.base import PaginatedResponse, TotalMode
 from services.user import UserService
 from services.role import RoleService
 from utils.auth import get_current_user, check_admin_access
+from utils.pagination import Keyset, count_total, page_response
+from utils.search import fuzzy_filter, substring_filter
 
 router = APIRouter()
 user_service = UserService()
@@ -22,6 +25,9 @@ def list_users(
         per_page: int = Query(20, ge=1, le=100, description="Количество элементов на странице"),
         query: Optional[str] = Query(None, description="Поисковый запрос по имени или email"),
         role_id: Optional[int] = Query(None, description="Фильтр по ID роли"),
+        total_mode: TotalMode = Query(TotalMode.EXACT, alias="total", description="Подсчет общего количества: exact, estimated, none"),
+        cursor: Optional[str] = Query(None, description="Курсор страницы из next_cursor/prev_cursor (вместо page)"),
+        fuzzy: bool = Query(False, description="Нечеткий поиск с учетом опечаток, по убыванию похожести"),
         db: Session = Depends(get_db),
         current_user: User = Depends(check_admin_access)
 ) -> Any:
@@ -30,30 +36,48 @@ def list_users(
     """
     skip = (page - 1) * per_page
 
-    query_obj = db.query(User).options(joinedload(User.role))
+    filters = []
+    keyset = user_service.keyset
 
     if query:
-        search_term = f"%{query}%"
-        query_obj = query_obj.filter(
-            (User.username.ilike(search_term)) |
-            (User.email.ilike(search_term)) |
-            (User.full_name.ilike(search_term))
-        )
+        # Поиск по триграммным индексам username, email и full_name
+        columns = [User.username, User.email, User.full_name]
+        if fuzzy:
+            condition, rank = fuzzy_filter(db, columns, query)
+            keyset = Keyset(rank.label("similarity"), User.id, descending=True)
+        else:
+            condition = substring_filter(columns, query)
+        filters.append(condition)
 
     if role_id is not None:
-        query_obj = query_obj.filter(User.role_id == role_id)
+        filters.append(User.role_id == role_id)
+
+    query_obj = db.query(User).options(joinedload(User.role)).filter(*filters)
 
-    total = query_obj.count()
-    items = query_obj.offset(skip).limit(per_page).all()
-    pages = (total + per_page - 1) // per_page
+    if total_mode == TotalMode.EXACT:
+        # Страница и count(*) OVER () одним запросом
+        result = keyset.paginate(
+            query_obj, limit=per_page, cursor=cursor, offset=skip, aggregates={"total": func.count()}
+        )
+        total, total_kind = result.aggregates["total"], TotalMode.EXACT
+    else:
+        total, total_kind = count_total(
+            db,
+            select(func.count()).select_from(User).where(*filters),
+            total_mode,
+            table=None if filters else User.__table__
+        )
+        result = keyset.paginate(query_obj, limit=per_page, cursor=cursor, offset=skip)
 
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": pages
-    }
+    return page_response(
+        result.items,
+        page=page,
+        per_page=per_page,
+        total=total,
+        total_kind=total_kind,
+        next_cursor=result.next_cursor,
+        prev_cursor=result.prev_cursor
+    )
 
 
 @router.post("/", response_model=UserWithRole, status_code=201)
@@ -86,10 +110,7 @@ def create_user(
             detail=f"Role with ID {user_in.role_id} not found",
         )
 
-    user = user_service.create(db, obj_in=user_in)
-    db.refresh(user)
-
-    return user
+    return user_service.create(db, obj_in=user_in)
 
 
 @router.get("/{user_id}", response_model=UserWithRole)
@@ -153,8 +174,10 @@ def update_user(
             )
 
     user = user_service.update(db, db_obj=user, obj_in=user_in)
-    db.refresh(user)
-    db.refresh(user.role)
+
+    # Связь role могла устареть после смены role_id - подгрузится заново при сериализации
+    if user_in.role_id:
+        db.expire(user, ["role"])
 
     return user
 
@@ -0,0 +1,176 @@
+"""
+Сравнение пропускной способности синхронного и асинхронного стека БД.
+
+Скрипт поднимает отдельное приложение, в котором рядом смонтированы:
+    /sync/products, /sync/cart   - существующие роутеры (def + SessionLocal, пул потоков)
+    /async/products, /async/cart - те же обработчики на AsyncSession и асинхронных сервисах
+
+и нагружает каждый маршрут заданным числом одновременных клиентов (по умолчанию 500).
+
+Запуск из корня проекта (нужны httpx и asyncpg, БД из DATABASE_URL с тестовыми данными):
+    python benchmarks/async_stack.py --username user --clients 500 --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.v1.endpoints import cart, products
+from database import get_async_db
+from models.user import User
+from schemas.base import PaginatedResponse
+from schemas.order import CartResponse
+from schemas.product import Product as ProductSchema
+from services.async_order import AsyncOrderService
+from services.async_product import AsyncProductService
+from utils.auth import create_access_token, get_current_user_async
+
+async_router = APIRouter()
+product_service = AsyncProductService()
+order_service = AsyncOrderService()
+
+
+@async_router.get("/products/", response_model=PaginatedResponse[ProductSchema])
+async def list_products_async(
+        page: int = Query(1, ge=1),
+        per_page: int = Query(20, ge=1, le=100),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user_async)
+) -> Any:
+    skip = (page - 1) * per_page
+    items = await product_service.get_multi(db, skip=skip, limit=per_page)
+    total = await product_service.get_count(db)
+
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": (total + per_page - 1) // per_page
+    }
+
+
+@async_router.get("/cart/", response_model=CartResponse)
+async def get_cart_async(
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user_async)
+) -> Any:
+    return await order_service.get_cart_with_items(db, current_user.id)
+
+
+app = FastAPI()
+app.include_router(products.router, prefix="/sync/products")
+app.include_router(cart.router, prefix="/sync/cart")
+app.include_router(async_router, prefix="/async")
+
+TARGETS = [
+    "/sync/products/",
+    "/async/products/",
+    "/sync/cart/",
+    "/async/cart/",
+]
+
+
+async def run_load(
+        base_url: str,
+        path: str,
+        token: str,
+        clients: int,
+        total_requests: int
+) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total_requests
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60.0) as client:
+        # Прогрев пула соединений приложения
+        await asyncio.gather(*(client.get(path) for _ in range(min(clients, 50))))
+
+        async def worker() -> None:
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "path": path,
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def wait_for_server(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/docs", timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("Сервер для бенчмарка не запустился")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк sync/async стека БД")
+    parser.add_argument("--username", default="user", help="Пользователь, от имени которого идут запросы")
+    parser.add_argument("--clients", type=int, default=500, help="Число одновременных клиентов")
+    parser.add_argument("--requests", type=int, default=20000, help="Число запросов на маршрут")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="Число процессов uvicorn")
+    args = parser.parse_args(argv)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    token = create_access_token({"sub": args.username})
+
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.async_stack:app",
+            "--port", str(args.port),
+            "--workers", str(args.workers),
+            "--log-level", "warning",
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+    try:
+        wait_for_server(base_url)
+        print(f"{'Маршрут':<20}{'RPS':>10}{'p50, мс':>12}{'p99, мс':>12}{'Ошибки':>10}")
+        for path in TARGETS:
+            result = asyncio.run(run_load(base_url, path, token, args.clients, args.requests))
+            print(
+                f"{result['path']:<20}{result['rps']:>10.1f}{result['p50']:>12.1f}"
+                f"{result['p99']:>12.1f}{result['errors']:>10}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""
+Поиск товаров: ILIKE '%term%' по name, description, sku против полнотекстового поиска
+по search_vector (GIN-индекс ix_products_search_vector, ранжирование ts_rank).
+
+Скрипт создает в БД из DATABASE_URL отдельную схему, заполняет таблицу товаров
+синтетическими названиями и описаниями из русских и английских слов и для каждого
+поискового запроса выполняет:
+    ilike - прежний предикат (or_ из трех ILIKE), страница и количество
+    fts   - ProductService.search_page и search_total
+Для каждого сценария выводится медианное время по --repeat запускам и план
+(EXPLAIN (ANALYZE, BUFFERS)) каждого SQL-запроса.
+
+Запуск из корня проекта (PostgreSQL):
+    python benchmarks/fulltext_search.py --products 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, func, or_, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+import models  # noqa: F401 - регистрация всех моделей в метаданных
+from config import get_settings
+from database import Base
+from models.product import Product
+from services.product import ProductService
+
+SCHEMA = "fulltext_bench"
+
+WORDS = [
+    "смартфон", "ноутбук", "планшет", "наушники", "телевизор", "часы", "камера", "колонка",
+    "беспроводные", "игровой", "черный", "белый", "красный", "память", "экран", "процессор",
+    "аккумулятор", "зарядка", "чехол", "стекло",
+    "phone", "laptop", "tablet", "headphones", "wireless", "gaming", "black", "white", "pro",
+    "ultra", "mini", "max", "memory", "display", "battery", "charger", "case", "glass",
+]
+
+SEED = [
+    "INSERT INTO categories (name) SELECT 'category ' || i FROM generate_series(1, 50) i",
+    "INSERT INTO brands (name) SELECT 'brand ' || i FROM generate_series(1, 200) i",
+    # Название - 3 слова, описание - 30 слов; условие i > 0 делает подзапросы зависимыми от строки
+    "INSERT INTO products (name, description, price, stock, sku, is_active, category_id, brand_id) "
+    "SELECT "
+    "array_to_string(ARRAY(SELECT (:words)[1 + (random() * (:word_count - 1))::int] "
+    "FROM generate_series(1, 3) WHERE i > 0), ' '), "
+    "array_to_string(ARRAY(SELECT (:words)[1 + (random() * (:word_count - 1))::int] "
+    "FROM generate_series(1, 30) WHERE i > 0), ' '), "
+    "(random() * 1000)::numeric(10, 2), (random() * 100)::int, 'SKU-' || i, "
+    "random() < 0.9, 1 + (random() * 49)::int, 1 + (random() * 199)::int FROM generate_series(1, :products) i",
+]
+
+QUERIES = ["смартфон", "беспроводные наушники", "gaming laptop", "черный -чехол", "SKU-4242"]
+
+
+def ilike_page(db: Session, query: str, limit: int = 20) -> List[Product]:
+    search_term = f"%{query}%"
+    return db.query(Product).filter(
+        or_(Product.name.ilike(search_term), Product.description.ilike(search_term), Product.sku.ilike(search_term))
+    ).order_by(Product.id.desc()).limit(limit).all()
+
+
+def ilike_count(db: Session, query: str) -> int:
+    search_term = f"%{query}%"
+    return db.query(func.count(Product.id)).filter(
+        or_(Product.name.ilike(search_term), Product.description.ilike(search_term), Product.sku.ilike(search_term))
+    ).scalar()
+
+
+def build_scenarios(query: str) -> List[Tuple[str, Callable[[Session], object]]]:
+    product_service = ProductService()
+
+    return [
+        ("ilike page", lambda db: ilike_page(db, query)),
+        ("ilike count", lambda db: ilike_count(db, query)),
+        ("fts search_page", lambda db: product_service.search_page(db, query=query, limit=20)),
+        ("fts search_total", lambda db: product_service.search_total(db, query=query)),
+    ]
+
+
+def capture_statements(connection: Connection, scenario: Callable[[Session], object]) -> List[Tuple[str, object]]:
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", on_execute)
+    try:
+        with Session(bind=connection) as db:
+            scenario(db)
+    finally:
+        event.remove(connection, "before_cursor_execute", on_execute)
+    return captured
+
+
+def measure(connection: Connection, scenario: Callable[[Session], object], repeat: int) -> float:
+    timings = []
+    with Session(bind=connection) as db:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            scenario(db)
+            timings.append(time.perf_counter() - started)
+            db.expunge_all()
+    return statistics.median(timings) * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="ILIKE против полнотекстового поиска товаров")
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--query", action="append", help="Поисковый запрос (можно несколько раз)")
+    parser.add_argument("--no-plans", action="store_true", help="Не выводить планы запросов")
+    parser.add_argument("--keep", action="store_true", help="Не удалять схему с данными")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(get_settings().DATABASE_URL, poolclass=NullPool)
+    with engine.connect() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+        # pg_trgm - в public, как после миграций: иначе create_all установил бы его в схему
+        # бенчмарка, а DROP SCHEMA удалил бы; public в search_path - для gin_trgm_ops и <%
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public")
+        connection.exec_driver_sql(f"SET search_path TO {SCHEMA}, public")
+        bench = connection.execution_options(schema_translate_map={None: SCHEMA})
+        Base.metadata.create_all(bench)
+
+        try:
+            started = time.perf_counter()
+            for statement in SEED:
+                connection.execute(text(statement), {
+                    "products": args.products, "words": WORDS, "word_count": len(WORDS)
+                })
+            connection.exec_driver_sql("ANALYZE")
+            connection.commit()
+            print(f"Заполнено {args.products} товаров за {time.perf_counter() - started:.1f} с\n")
+
+            for query in args.query or QUERIES:
+                print(f"=== {query!r}")
+                for name, scenario in build_scenarios(query):
+                    print(f"--- {name}: {measure(bench, scenario, args.repeat):.1f} мс (медиана)")
+                    if args.no_plans:
+                        continue
+                    for statement, parameters in capture_statements(bench, scenario):
+                        rows = connection.exec_driver_sql(
+                            "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters
+                        ).fetchall()
+                        print("\n".join(row[0] for row in rows))
+                print()
+        finally:
+            connection.rollback()
+            if not args.keep:
+                connection.exec_driver_sql(f"DROP SCHEMA {SCHEMA} CASCADE")
+                connection.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Планы запросов заказов и каталога до и после составных и частичных индексов.
+
+Скрипт создает в БД из DATABASE_URL отдельную схему, заполняет ее синтетическими данными
+и выполняет реальные методы сервисов (OrderService.get_user_orders, get_admin_orders,
+get_cart, ProductService.get_multi/get_count). SQL каждого метода перехватывается и
+выполняется повторно под EXPLAIN (ANALYZE, BUFFERS):
+    до    - только одноколоночные индексы (схема до миграции 5c1d2a7e9b4f)
+    после - индексы из __table_args__ моделей
+
+Запуск из корня проекта (PostgreSQL):
+    python benchmarks/index_plans.py --users 10000 --orders 500000 --products 100000
+"""
+import argparse
+import os
+import sys
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+import models  # noqa: F401 - регистрация всех моделей в метаданных
+from config import get_settings
+from database import Base
+from services.order import OrderService
+from services.product import ProductService
+
+SCHEMA = "index_bench"
+
+# Составные и частичные индексы из __table_args__
+NEW_INDEXES = [
+    ("orders", "ix_orders_user_id_status_created_at"),
+    ("orders", "ix_orders_user_id_created_at_placed"),
+    ("orders", "ix_orders_created_at_placed"),
+    ("orders", "ix_orders_status_created_at"),
+    ("orders", "ix_orders_user_id_cart"),
+    ("order_items", "ix_order_items_order_id_product_id"),
+    ("products", "ix_products_is_active_category_id_brand_id"),
+]
+
+# Одноколоночные индексы, замененные составными
+LEGACY_INDEXES = [
+    "CREATE INDEX ix_orders_user_id ON orders (user_id)",
+    "CREATE INDEX ix_orders_status ON orders (status)",
+    "CREATE INDEX ix_order_items_order_id ON order_items (order_id)",
+]
+
+SEED = [
+    "INSERT INTO roles (name, can_read, can_create, can_update, can_delete, is_admin) "
+    "VALUES ('bench', true, false, false, false, false)",
+    "INSERT INTO users (email, username, hashed_password, is_active, role_id) "
+    "SELECT 'user' || i || '@example.com', 'user' || i, 'x', true, 1 FROM generate_series(1, :users) i",
+    "INSERT INTO categories (name) SELECT 'category ' || i FROM generate_series(1, 50) i",
+    "INSERT INTO brands (name) SELECT 'brand ' || i FROM generate_series(1, 200) i",
+    "INSERT INTO products (name, price, stock, sku, is_active, category_id, brand_id) "
+    "SELECT 'product ' || i, (random() * 1000)::numeric(10, 2), (random() * 100)::int, 'SKU' || i, "
+    "random() < 0.9, 1 + (random() * 49)::int, 1 + (random() * 199)::int FROM generate_series(1, :products) i",
+    # Одна корзина на пользователя, остальные заказы - в случайных статусах за два года
+    "INSERT INTO orders (user_id, status, total_amount) SELECT i, 'cart', 0 FROM generate_series(1, :users) i",
+    "INSERT INTO orders (user_id, status, total_amount, created_at) "
+    "SELECT 1 + (random() * (:users - 1))::int, "
+    "(ARRAY['new', 'processing', 'shipped', 'delivered', 'canceled'])[1 + (random() * 4)::int], "
+    "random() * 10000, now() - random() * interval '730 days' FROM generate_series(1, :orders) i",
+    "INSERT INTO order_items (order_id, product_id, quantity, price, product_name) "
+    "SELECT 1 + (random() * (:orders - 1))::int, 1 + (random() * (:products - 1))::int, 1, 100, 'product' "
+    "FROM generate_series(1, :orders) i",
+]
+
+
+def build_scenarios(user_id: int) -> List[Tuple[str, Callable[[Session], object]]]:
+    order_service = OrderService()
+    product_service = ProductService()
+    product_filters = {"is_active": True, "category_id": 7, "brand_id": 42}
+
+    return [
+        ("get_user_orders", lambda db: order_service.get_user_orders(db, user_id, limit=20)),
+        ("get_user_orders(status)", lambda db: order_service.get_user_orders(db, user_id, status="delivered")),
+        ("get_user_orders_count", lambda db: order_service.get_user_orders_count(db, user_id)),
+        ("get_admin_orders", lambda db: order_service.get_admin_orders(db, limit=20)),
+        ("get_admin_orders(status)", lambda db: order_service.get_admin_orders(db, limit=20, status="new")),
+        ("get_cart", lambda db: order_service.get_cart(db, user_id)),
+        ("products get_multi", lambda db: product_service.get_multi(db, limit=20, filters=product_filters)),
+        ("products get_count", lambda db: product_service.get_count(db, filters=product_filters)),
+    ]
+
+
+def capture_statements(connection: Connection, scenario: Callable[[Session], object]) -> List[Tuple[str, object]]:
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", on_execute)
+    try:
+        with Session(bind=connection) as db:
+            scenario(db)
+    finally:
+        event.remove(connection, "before_cursor_execute", on_execute)
+    return captured
+
+
+def explain_all(connection: Connection, user_id: int) -> None:
+    for name, scenario in build_scenarios(user_id):
+        print(f"--- {name}")
+        for statement, parameters in capture_statements(connection, scenario):
+            rows = connection.exec_driver_sql("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters).fetchall()
+            print("\n".join(row[0] for row in rows))
+        print()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Планы запросов до и после составных индексов")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--orders", type=int, default=500000)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--keep", action="store_true", help="Не удалять схему с данными")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(get_settings().DATABASE_URL, poolclass=NullPool)
+    with engine.connect() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+        # pg_trgm - в public, как после миграций: иначе create_all установил бы его в схему
+        # бенчмарка, а DROP SCHEMA удалил бы; public в search_path - для gin_trgm_ops и <%
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public")
+        connection.exec_driver_sql(f"SET search_path TO {SCHEMA}, public")
+        bench = connection.execution_options(schema_translate_map={None: SCHEMA})
+        Base.metadata.create_all(bench)
+
+        try:
+            for table, index in NEW_INDEXES:
+                connection.exec_driver_sql(f"DROP INDEX {index}")
+            for statement in LEGACY_INDEXES:
+                connection.exec_driver_sql(statement)
+            for statement in SEED:
+                connection.execute(text(statement), {
+                    "users": args.users, "orders": args.orders, "products": args.products
+                })
+            connection.exec_driver_sql("ANALYZE")
+            connection.commit()
+
+            # Пользователь с наибольшим числом заказов
+            user_id = connection.exec_driver_sql(
+                "SELECT user_id FROM orders GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+            ).scalar()
+
+            print("=== До: одноколоночные индексы\n")
+            explain_all(bench, user_id)
+
+            for statement in LEGACY_INDEXES:
+                connection.exec_driver_sql(f"DROP INDEX {statement.split()[2]}")
+            for table, index in NEW_INDEXES:
+                next(i for i in Base.metadata.tables[table].indexes if i.name == index).create(bench)
+            connection.exec_driver_sql("ANALYZE")
+            connection.commit()
+
+            print("=== После: составные и частичные индексы\n")
+            explain_all(bench, user_id)
+        finally:
+            connection.rollback()
+            if not args.keep:
+                connection.exec_driver_sql(f"DROP SCHEMA {SCHEMA} CASCADE")
+                connection.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Подсчет обращений к БД по эндпоинтам: commit + refresh в сервисах против единицы работы.
+
+Для каждого сценария выполняется один HTTP-запрос через TestClient, а слушатели движка
+считают SQL-запросы и транзакции. Число обращений = запросы + BEGIN/COMMIT каждой транзакции.
+Сценарии выполняются дважды: с DB_UNIT_OF_WORK=False (commit и refresh в каждом методе
+сервиса) и с DB_UNIT_OF_WORK=True (только flush, один commit в get_db).
+
+Запуск из корня проекта (БД из DATABASE_URL с созданными ролями и пользователями):
+    python benchmarks/round_trips.py --username user --admin admin
+"""
+import argparse
+import os
+import sys
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from config import get_settings
+from database import engine
+from main import app
+from utils.auth import create_access_token
+
+
+class RoundTripCounter:
+
+    def __init__(self):
+        self.statements = 0
+        self.transactions = 0
+
+    def reset(self) -> None:
+        self.statements = 0
+        self.transactions = 0
+
+    @property
+    def round_trips(self) -> int:
+        # BEGIN и COMMIT - отдельные обращения к серверу
+        return self.statements + 2 * self.transactions
+
+    def install(self) -> None:
+        @event.listens_for(engine, "before_cursor_execute")
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            self.statements += 1
+
+        @event.listens_for(engine, "commit")
+        def on_commit(conn):
+            self.transactions += 1
+
+        @event.listens_for(engine, "rollback")
+        def on_rollback(conn):
+            self.transactions += 1
+
+
+def build_scenarios(client: TestClient, user: dict, admin: dict) -> List[Tuple[str, Callable]]:
+    state: Dict[str, int] = {}
+    sku = f"RT{uuid.uuid4().hex[:8]}"
+
+    def create_product():
+        response = client.post("/api/v1/products/", headers=admin, json={
+            "name": f"Round trip {sku}", "price": 100.0, "stock": 1000, "sku": sku
+        })
+        state["product_id"] = response.json()["id"]
+        return response
+
+    def add_item():
+        response = client.post("/api/v1/cart/items", headers=user, json={
+            "product_id": state["product_id"], "quantity": 1
+        })
+        state["item_id"] = response.json()["id"]
+        return response
+
+    return [
+        ("POST /products", create_product),
+        ("PUT /products/{id}", lambda: client.put(
+            f"/api/v1/products/{state['product_id']}", headers=admin, json={"price": 120.0})),
+        ("GET /cart", lambda: client.get("/api/v1/cart/", headers=user)),
+        ("POST /cart/items", add_item),
+        ("PUT /cart/items/{id}", lambda: client.put(
+            f"/api/v1/cart/items/{state['item_id']}", headers=user, json={"quantity": 2})),
+        ("POST /orders", lambda: client.post("/api/v1/orders/", headers=user, json={"notes": "round trips"})),
+        ("POST /cart/items (2)", add_item),
+        ("DELETE /cart/items/{id}", lambda: client.delete(
+            f"/api/v1/cart/items/{state['item_id']}", headers=user)),
+        ("DELETE /products/{id}", lambda: client.delete(
+            f"/api/v1/products/{state['product_id']}", headers=admin)),
+    ]
+
+
+def run(unit_of_work: bool, client: TestClient, counter: RoundTripCounter, user: dict, admin: dict) -> Dict[str, Tuple[int, int, int]]:
+    get_settings().DB_UNIT_OF_WORK = unit_of_work
+    results = {}
+
+    for name, scenario in build_scenarios(client, user, admin):
+        counter.reset()
+        response = scenario()
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name}: {response.status_code} {response.text}")
+        results[name] = (counter.statements, counter.transactions, counter.round_trips)
+
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Подсчет обращений к БД по эндпоинтам")
+    parser.add_argument("--username", default="user", help="Покупатель для сценариев корзины")
+    parser.add_argument("--admin", default="admin", help="Администратор для сценариев каталога")
+    args = parser.parse_args(argv)
+
+    user = {"Authorization": f"Bearer {create_access_token({'sub': args.username})}"}
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': args.admin})}"}
+
+    counter = RoundTripCounter()
+    counter.install()
+    client = TestClient(app)
+
+    before = run(False, client, counter, user, admin)
+    after = run(True, client, counter, user, admin)
+
+    print(f"{'Эндпоинт':<26}{'SQL до':>8}{'Tx до':>7}{'RT до':>7}{'SQL после':>11}{'Tx после':>10}{'RT после':>10}")
+    for name in before:
+        b, a = before[name], after[name]
+        print(f"{name:<26}{b[0]:>8}{b[1]:>7}{b[2]:>7}{a[0]:>11}{a[1]:>10}{a[2]:>10}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Кэш результатов поиска товаров (search_result_cache) на неравномерном потоке запросов.
+
+Скрипт создает в БД из DATABASE_URL отдельную схему, заполняет таблицу товаров
+синтетическими названиями и воспроизводит поток поисковых запросов
+(ProductService.search_page с total) с распределением Ципфа: небольшая часть
+запросов составляет большинство обращений. Запросы приходят в разном регистре
+и с лишними пробелами; между ними с заданной частотой изменяются товары
+(ProductService.update), что увеличивает поколение каталога.
+
+Поток выполняется дважды - без кэша и с кэшем (SEARCH_CACHE_ENABLED); для каждого
+прогона выводятся общее время и перцентили задержки, для прогона с кэшем - доля
+попаданий и сэкономленное время (stats() кэша).
+
+Запуск из корня проекта (PostgreSQL):
+    python benchmarks/search_cache.py --products 200000 --requests 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+import models  # noqa: F401 - регистрация всех моделей в метаданных
+from config import get_settings
+from database import Base
+from services.product import ProductService, search_result_cache
+
+SCHEMA = "search_cache_bench"
+
+WORDS = [
+    "смартфон", "ноутбук", "планшет", "наушники", "телевизор", "часы", "камера", "колонка",
+    "беспроводные", "игровой", "черный", "белый", "красный", "память", "экран", "процессор",
+    "phone", "laptop", "tablet", "headphones", "wireless", "gaming", "black", "white", "pro",
+    "ultra", "mini", "max",
+]
+
+SEED = [
+    "INSERT INTO categories (name) SELECT 'category ' || i FROM generate_series(1, 50) i",
+    "INSERT INTO brands (name) SELECT 'brand ' || i FROM generate_series(1, 200) i",
+    # Название - 3 слова; условие i > 0 делает подзапрос зависимым от строки
+    "INSERT INTO products (name, description, price, stock, sku, is_active, category_id, brand_id) "
+    "SELECT "
+    "array_to_string(ARRAY(SELECT (:words)[1 + (random() * (:word_count - 1))::int] "
+    "FROM generate_series(1, 3) WHERE i > 0), ' '), NULL, "
+    "(random() * 1000)::numeric(10, 2), (random() * 100)::int, 'SKU-' || i, "
+    "random() < 0.9, 1 + (random() * 49)::int, 1 + (random() * 199)::int FROM generate_series(1, :products) i",
+]
+
+
+def build_queries(distinct: int, rng: random.Random) -> List[str]:
+    queries = set(WORDS)
+    while len(queries) < distinct:
+        queries.add(" ".join(rng.sample(WORDS, 2)))
+    return sorted(queries)[:distinct]
+
+
+def spell(query: str, rng: random.Random) -> str:
+    # Тот же запрос в том виде, в каком его вводят: регистр и лишние пробелы
+    if rng.random() < 0.3:
+        query = query.capitalize()
+    if rng.random() < 0.2:
+        query = f" {query.replace(' ', '  ')} "
+    return query
+
+
+def replay(
+        connection: Connection,
+        queries: List[str],
+        weights: List[float],
+        requests: int,
+        write_rate: float,
+        seed: int
+) -> List[float]:
+    product_service = ProductService()
+    rng = random.Random(seed)
+    product_count = connection.exec_driver_sql("SELECT max(id) FROM products").scalar()
+    timings = []
+
+    for _ in range(requests):
+        if rng.random() < write_rate:
+            with Session(bind=connection) as db:
+                product = product_service.get(db, rng.randint(1, product_count))
+                if product is not None:
+                    product_service.update(db, db_obj=product, obj_in={"stock": rng.randint(0, 100)})
+                    db.commit()
+
+        query = spell(rng.choices(queries, weights)[0], rng)
+        with Session(bind=connection) as db:
+            started = time.perf_counter()
+            product_service.search_page(db, query=query, is_active=True, limit=20, with_total=True)
+            timings.append(time.perf_counter() - started)
+
+    return timings
+
+
+def report(name: str, timings: List[float]) -> None:
+    quantiles = statistics.quantiles(timings, n=100)
+    print(
+        f"{name}: {sum(timings):.2f} с, p50 {quantiles[49] * 1000:.2f} мс, "
+        f"p95 {quantiles[94] * 1000:.2f} мс, p99 {quantiles[98] * 1000:.2f} мс"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Кэш результатов поиска на неравномерном потоке запросов")
+    parser.add_argument("--products", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=300, help="Количество различных запросов")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Показатель распределения Ципфа")
+    parser.add_argument("--write-rate", type=float, default=0.005, help="Доля обращений с изменением товара")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Не удалять схему с данными")
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    queries = build_queries(args.distinct, random.Random(args.seed))
+    weights = [1 / rank ** args.zipf for rank in range(1, len(queries) + 1)]
+
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    with engine.connect() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+        # pg_trgm - в public, как после миграций: иначе create_all установил бы его в схему
+        # бенчмарка, а DROP SCHEMA удалил бы; public в search_path - для gin_trgm_ops и <%
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public")
+        connection.exec_driver_sql(f"SET search_path TO {SCHEMA}, public")
+        bench = connection.execution_options(schema_translate_map={None: SCHEMA})
+        Base.metadata.create_all(bench)
+
+        try:
+            started = time.perf_counter()
+            for statement in SEED:
+                connection.execute(text(statement), {
+                    "products": args.products, "words": WORDS, "word_count": len(WORDS)
+                })
+            connection.exec_driver_sql("ANALYZE")
+            connection.commit()
+            print(f"Заполнено {args.products} товаров за {time.perf_counter() - started:.1f} с")
+            print(f"{args.requests} запросов, {len(queries)} различных, Ципф {args.zipf}, "
+                  f"изменения товаров: {args.write_rate:.1%} обращений\n")
+
+            settings.SEARCH_CACHE_ENABLED = False
+            report("без кэша", replay(bench, queries, weights, args.requests, args.write_rate, args.seed))
+
+            settings.SEARCH_CACHE_ENABLED = True
+            search_result_cache.clear()
+            report("с кэшем ", replay(bench, queries, weights, args.requests, args.write_rate, args.seed))
+
+            stats = search_result_cache.stats()
+            print(
+                f"\nпопадания {stats['hits']}, промахи {stats['misses']}, доля попаданий {stats['hit_ratio']:.1%}, "
+                f"инвалидации {stats['invalidations']}, сэкономлено {stats['saved_ms'] / 1000:.2f} с"
+            )
+        finally:
+            connection.rollback()
+            if not args.keep:
+                connection.exec_driver_sql(f"DROP SCHEMA {SCHEMA} CASCADE")
+                connection.commit()
+
+
+if __name__ == "__main__":
+    main()
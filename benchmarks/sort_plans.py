@@ -0,0 +1,195 @@
+"""
+Планы запросов списка товаров с сортировкой (sort/order) и фильтрами по цене
+и наличию: проверка, что каждая комбинация обслуживается индексом, без
+последовательного сканирования (Seq Scan) таблицы products.
+
+Скрипт создает в БД из DATABASE_URL отдельную схему, заполняет ее синтетическими
+товарами и выполняет реальные методы ProductService (get_multi, get_page - первая
+страница и страница по курсору). SQL каждого метода перехватывается и выполняется
+повторно под EXPLAIN (ANALYZE, FORMAT JSON). Для каждого сценария выводятся
+использованные индексы и время; при Seq Scan по products сценарий отмечается FAIL,
+а скрипт завершается с кодом 1.
+
+Страницы запрашиваются без total: count(*) по всей выборке читает все подходящие
+строки при любом индексе.
+
+Запуск из корня проекта (PostgreSQL):
+    python benchmarks/sort_plans.py --products 1000000
+"""
+import argparse
+import os
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+import models  # noqa: F401 - регистрация всех моделей в метаданных
+from config import get_settings
+from database import Base
+from services.product import ProductService
+
+SCHEMA = "sort_bench"
+
+SORTS = ["price", "created_at", "name", "popularity"]
+
+SEED = [
+    "INSERT INTO categories (name) SELECT 'category ' || i FROM generate_series(1, 50) i",
+    "INSERT INTO brands (name) SELECT 'brand ' || i FROM generate_series(1, 200) i",
+    # 2% товаров без остатка; продажи - с длинным хвостом (большинство товаров продается редко)
+    "INSERT INTO products (name, price, stock, sku, is_active, category_id, brand_id, sales_count, created_at) "
+    "SELECT md5(i::text), (random() * 100000)::numeric(10, 2), "
+    "CASE WHEN random() < 0.02 THEN 0 ELSE 1 + (random() * 100)::int END, 'SKU' || i, "
+    "random() < 0.9, 1 + (random() * 49)::int, 1 + (random() * 199)::int, "
+    "(power(random(), 8) * 10000)::int, now() - random() * interval '730 days' "
+    "FROM generate_series(1, :products) i",
+]
+
+
+def build_scenarios() -> List[Tuple[str, Callable[[Session], object]]]:
+    product_service = ProductService()
+    storefront = {"is_active": True}
+    scenarios = []
+
+    def second_page(filters: Dict[str, Any], sort: str, descending: bool) -> Callable[[Session], object]:
+        def scenario(db: Session) -> object:
+            # Курсор первой страницы получается вне перехвата SQL (см. capture_statements)
+            page = product_service.get_page(db, limit=20, filters=filters, sort=sort, descending=descending)
+            return lambda db: product_service.get_page(
+                db, limit=20, filters=filters, sort=sort, descending=descending, cursor=page.next_cursor
+            )
+        return scenario
+
+    for sort in SORTS:
+        for descending in (False, True):
+            order = "desc" if descending else "asc"
+            scenarios.append((
+                f"get_multi sort={sort} {order}",
+                lambda db, sort=sort, descending=descending: product_service.get_multi(
+                    db, limit=20, filters=storefront, sort=sort, descending=descending
+                )
+            ))
+            scenarios.append((
+                f"get_page sort={sort} {order} page=500",
+                lambda db, sort=sort, descending=descending: product_service.get_page(
+                    db, skip=500 * 20, limit=20, filters=storefront, sort=sort, descending=descending
+                )
+            ))
+            scenarios.append((f"get_page sort={sort} {order} cursor", second_page(storefront, sort, descending)))
+
+    price_range = {"is_active": True, "price_min": 1000, "price_max": 1500}
+    scenarios.extend([
+        ("price_min/price_max", lambda db: product_service.get_page(db, limit=20, filters=price_range)),
+        ("price_min/price_max sort=price", lambda db: product_service.get_page(
+            db, limit=20, filters=price_range, sort="price"
+        )),
+        ("price_min/price_max sort=popularity desc", lambda db: product_service.get_page(
+            db, limit=20, filters=price_range, sort="popularity", descending=True
+        )),
+        ("price_min sort=price desc cursor", second_page({"is_active": True, "price_min": 50000}, "price", True)),
+        ("in_stock=true sort=popularity desc", lambda db: product_service.get_page(
+            db, limit=20, filters={"is_active": True, "in_stock": True}, sort="popularity", descending=True
+        )),
+        ("in_stock=false", lambda db: product_service.get_page(db, limit=20, filters={"in_stock": False})),
+        ("in_stock=false sort=name", lambda db: product_service.get_page(
+            db, limit=20, filters={"in_stock": False}, sort="name"
+        )),
+        ("category sort=price", lambda db: product_service.get_page(
+            db, limit=20, filters={"is_active": True, "category_id": 7}, sort="price"
+        )),
+        ("category/brand price_max sort=created_at desc", lambda db: product_service.get_page(
+            db, limit=20, filters={"is_active": True, "category_id": 7, "brand_id": 42, "price_max": 5000},
+            sort="created_at", descending=True
+        )),
+    ])
+    return scenarios
+
+
+def capture_statements(connection: Connection, scenario: Callable[[Session], object]) -> List[Tuple[str, object]]:
+    # Сценарий может вернуть функцию: тогда подготовка (первая страница) не перехватывается
+    with Session(bind=connection) as db:
+        result = scenario(db)
+    if callable(result):
+        scenario = result
+
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", on_execute)
+    try:
+        with Session(bind=connection) as db:
+            scenario(db)
+    finally:
+        event.remove(connection, "before_cursor_execute", on_execute)
+    return captured
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def check_plans(connection: Connection) -> List[str]:
+    failures = []
+    for name, scenario in build_scenarios():
+        for statement, parameters in capture_statements(connection, scenario):
+            plan = connection.exec_driver_sql(
+                "EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters
+            ).scalar()[0]
+            nodes = list(plan_nodes(plan["Plan"]))
+            seq_scans = [
+                node for node in nodes if node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "products"
+            ]
+            indexes = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+            status = "FAIL" if seq_scans else "ok"
+            print(f"{status:4} {name}: {', '.join(indexes) or '-'} ({plan['Execution Time']:.1f} мс)")
+            if seq_scans:
+                failures.append(name)
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Планы сортировок и фильтров списка товаров без Seq Scan")
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--keep", action="store_true", help="Не удалять схему с данными")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(get_settings().DATABASE_URL, poolclass=NullPool)
+    with engine.connect() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+        # pg_trgm - в public, как после миграций: иначе create_all установил бы его в схему
+        # бенчмарка, а DROP SCHEMA удалил бы; public в search_path - для gin_trgm_ops и <%
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public")
+        connection.exec_driver_sql(f"SET search_path TO {SCHEMA}, public")
+        bench = connection.execution_options(schema_translate_map={None: SCHEMA})
+        Base.metadata.create_all(bench)
+
+        try:
+            for statement in SEED:
+                connection.execute(text(statement), {"products": args.products})
+            connection.exec_driver_sql("ANALYZE")
+            connection.commit()
+
+            failures = check_plans(bench)
+        finally:
+            connection.rollback()
+            if not args.keep:
+                connection.exec_driver_sql(f"DROP SCHEMA {SCHEMA} CASCADE")
+                connection.commit()
+
+    if failures:
+        print(f"\nSeq Scan по products: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nВсе сценарии используют индексы")
+
+
+if __name__ == "__main__":
+    main()
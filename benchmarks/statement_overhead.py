@@ -0,0 +1,92 @@
+"""
+Накладные расходы Python на построение и компиляцию запроса поиска пользователя по username.
+
+Варианты:
+    query       - db.query(User).filter(...).first(), запрос строится при каждом вызове
+    select      - select(User).where(...), строится при каждом вызове
+    prebuilt    - заранее построенный select с bindparam (utils.statements.USER_BY_USERNAME)
+    lambda_stmt - lambda-запрос: ключ кэша вычисляется по коду лямбды
+    session.get - Session.get по первичному ключу (объект не удерживается, SQL выполняется)
+    prebuilt pk - заранее построенный select по первичному ключу (BaseService.get)
+
+Каждый вариант измеряется на SQLite в памяти с кэшем компиляции движка и без него
+(query_cache_size=0), поэтому время почти целиком приходится на Python-сторону.
+
+Запуск из корня проекта:
+    python benchmarks/statement_overhead.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, lambda_stmt, select
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401 - регистрация всех моделей в метаданных
+from database import Base
+from models.role import Role
+from models.user import User
+from services.user import UserService
+from utils.statements import USER_BY_USERNAME
+
+USERNAME = "bench_user"
+user_service = UserService()
+
+
+def prepare(cache_size: int) -> Session:
+    engine = create_engine("sqlite://", query_cache_size=cache_size)
+    # Только нужные таблицы: остальные используют типы PostgreSQL (TSVECTOR), которых нет в SQLite
+    Base.metadata.create_all(engine, tables=[Role.__table__, User.__table__])
+    db = Session(engine)
+    role = Role(name="bench", description="bench")
+    db.add(role)
+    db.flush()
+    db.add(User(email="bench@example.com", username=USERNAME, hashed_password="x", role_id=role.id))
+    db.commit()
+    return db
+
+
+def measure(db: Session, lookup: Callable[[Session], Optional[User]], iterations: int) -> float:
+    # Прогрев: первая компиляция попадает в кэш
+    for _ in range(100):
+        lookup(db)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        lookup(db)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+VARIANTS = [
+    ("query", lambda db: db.query(User).filter(User.username == USERNAME).first()),
+    ("select", lambda db: db.scalars(select(User).where(User.username == USERNAME).limit(1)).first()),
+    ("prebuilt", lambda db: db.scalars(USER_BY_USERNAME, {"username": USERNAME}).first()),
+    ("lambda_stmt", lambda db: db.scalars(
+        lambda_stmt(lambda: select(User)) + (lambda s: s.where(User.username == USERNAME).limit(1))
+    ).first()),
+    ("session.get", lambda db: db.get(User, 1)),
+    ("prebuilt pk", lambda db: user_service.get(db, 1)),
+]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Накладные расходы на построение запросов")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    cached_db = prepare(cache_size=500)
+    uncached_db = prepare(cache_size=0)
+
+    print(f"{'Вариант':<14}{'мкс/запрос (кэш)':>18}{'мкс/запрос (без кэша)':>24}")
+    for name, lookup in VARIANTS:
+        cached = measure(cached_db, lookup, args.iterations)
+        uncached = measure(uncached_db, lookup, args.iterations)
+        print(f"{name:<14}{cached:>18.1f}{uncached:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,142 @@
+from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker
 from config import get_settings
+from utils.pool_telemetry import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+)
+from utils.query_limits import instrument_query_limits
+from utils.replicas import ReplicaRouter
+from utils.slow_queries import slow_query_log
+from utils.sql_instrumentation import instrument_sql
 
 settings = get_settings()
 
+# Асинхронные драйверы для синхронных диалектов из DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def get_pool_options() -> dict:
+    """
+    Параметры пула соединений из настроек
+    """
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def get_connect_args(url: str) -> dict:
+    """
+    Параметры соединения: statement_timeout по умолчанию задается при подключении,
+    без отдельного запроса в каждой транзакции
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "postgresql" or not settings.DB_STATEMENT_TIMEOUT_MS:
+        return {}
+
+    if url.get_driver_name() == "asyncpg":
+        return {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+
+
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,  
-    pool_recycle=3600,
-    echo=False
+    poolclass=InstrumentedQueuePool,
+    echo=False,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    connect_args=get_connect_args(settings.DATABASE_URL),
+    **get_pool_options()
 )
+instrument_engine(engine, "primary")
+instrument_query_limits(engine)
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    instrument_sql(engine)
+if settings.SLOW_QUERY_LOG_ENABLED:
+    slow_query_log.instrument(engine)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replica_engines = []
+for index, replica_url in enumerate(settings.replica_database_urls_list):
+    replica_engine = create_engine(
+        replica_url,
+        poolclass=InstrumentedQueuePool,
+        echo=False,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args=get_connect_args(replica_url),
+        **get_pool_options()
+    )
+    instrument_engine(replica_engine, f"replica_{index}")
+    instrument_query_limits(replica_engine)
+    if settings.SQL_INSTRUMENTATION_ENABLED:
+        instrument_sql(replica_engine)
+    if settings.SLOW_QUERY_LOG_ENABLED:
+        slow_query_log.instrument(replica_engine)
+    replica_engines.append(replica_engine)
+
+replica_router = ReplicaRouter(
+    engine,
+    replica_engines,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_CHECK_INTERVAL
+)
+
+# expire_on_commit=False: после commit в конце запроса объекты сериализуются без повторных SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 
+def get_async_database_url() -> str:
+    """
+    URL для асинхронного движка: ASYNC_DATABASE_URL или DATABASE_URL с асинхронным драйвером
+    """
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+
+    url = make_url(settings.DATABASE_URL)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return str(url)
+
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    get_async_database_url(),
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    echo=False,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    connect_args=get_connect_args(get_async_database_url()),
+    **get_pool_options()
+)
+instrument_engine(async_engine.sync_engine, "primary_async")
+instrument_query_limits(async_engine.sync_engine)
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    instrument_sql(async_engine.sync_engine)
+if settings.SLOW_QUERY_LOG_ENABLED:
+    slow_query_log.instrument(async_engine.sync_engine)
+
+# expire_on_commit=False: в асинхронной сессии нет ленивой подгрузки атрибутов после commit
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -25,4 +146,51 @@ def get_db():
         db.rollback()
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db(db: Session = Depends(get_db)):
+    """
+    Сессия для запросов только на чтение: реплика по кругу или основной сервер.
+    Изменения в этой сессии не фиксируются; записи и чтение своих записей
+    (корзина, оформление заказа) должны использовать get_db.
+    """
+    read_engine = replica_router.get_engine()
+    if read_engine is engine:
+        # Без реплик используем сессию запроса, чтобы не занимать второе соединение
+        yield db
+        return
+
+    read_db = SessionLocal(bind=read_engine)
+    # Сессия основного сервера для заполнения кэшей (см. primary_session)
+    read_db.info["primary"] = db
+    try:
+        yield read_db
+    except DBAPIError as e:
+        if e.connection_invalidated or isinstance(e.orig, OSError):
+            replica_router.mark_unhealthy(read_engine, e)
+        raise
+    finally:
+        read_db.close()
+
+
+def primary_session(db: Session) -> Session:
+    """
+    Сессия основного сервера для сессии db: для сессии реплики из get_read_db -
+    сессия запроса (get_db), иначе сама db.
+
+    Значения, которые сохраняются в кэш до следующей инвалидации, нужно читать
+    с основного сервера: реплика может еще не получить изменение, после которого
+    кэш был сброшен, и прежние данные остались бы в кэше под новой версией.
+    """
+    return db.info.get("primary", db)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
\ No newline at end of file
@@ -1,11 +1,24 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
 from api.api import api_router
 from config import get_settings
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from contextlib import asynccontextmanager
+from database import SessionLocal, engine
+from services.product import product_search_index
+from services.suggest import build_suggestions
+from utils.invalidation import invalidation_bus
+from utils.pagination import InvalidCursor
+from utils.query_limits import QueryBudgetExceeded, is_statement_timeout, query_limits
+from utils.search import build_search_indexes
+from utils.sql_instrumentation import SQLInstrumentationMiddleware
+from utils.static_files import ImmutableStaticFiles
 import os
+import threading
 from pathlib import Path
 
 
@@ -15,12 +28,35 @@ Path("static/uploads").mkdir(parents=True, exist_ok=True)
 settings = get_settings()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Прием событий инвалидации кэшей от других процессов
+    invalidation_bus.start_listener(engine)
+    if settings.SEARCH_BACKEND == "memory":
+        # Индексы строятся в фоне; до готовности поиск выполняется в PostgreSQL
+        threading.Thread(
+            target=build_search_indexes,
+            args=(SessionLocal, [product_search_index]),
+            name="search-index-build",
+            daemon=True
+        ).start()
+    if settings.SUGGEST_ENABLED:
+        threading.Thread(
+            target=build_suggestions, args=(SessionLocal,), name="suggest-index-build", daemon=True
+        ).start()
+    yield
+    invalidation_bus.stop_listener()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.PROJECT_NAME,
     version=settings.PROJECT_VERSION,
     description=settings.PROJECT_DESCRIPTION,
     docs_url=None,
     redoc_url=None,
+    # Бюджет SQL-запросов по умолчанию; роутеры и маршруты могут задать свой
+    dependencies=[Depends(query_limits(max_statements=settings.DB_QUERY_BUDGET))],
 )
 
 app.add_middleware(
@@ -29,10 +65,50 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    app.add_middleware(SQLInstrumentationMiddleware)
+
 
 app.include_router(api_router, prefix="/api")
+
+
+@app.exception_handler(DBAPIError)
+async def database_error_handler(request: Request, exc: DBAPIError):
+    # Запрос отменен по statement_timeout - 504, остальные ошибки БД обрабатываются как 500
+    if is_statement_timeout(exc):
+        return JSONResponse(status_code=504, content={"detail": "Database query timed out"})
+    raise exc
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # Нет свободного соединения в пуле за DB_POOL_TIMEOUT
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is overloaded, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(QueryBudgetExceeded)
+async def query_budget_handler(request: Request, exc: QueryBudgetExceeded):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+# Загруженные файлы не меняются по своему URL: кэшируются навсегда, до общего /static
+app.mount(
+    "/static/uploads",
+    ImmutableStaticFiles(directory=settings.UPLOAD_DIR, max_age=settings.UPLOADS_CACHE_MAX_AGE),
+    name="uploads"
+)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # app.add_middleware(
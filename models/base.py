@@ -1,7 +1,14 @@
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import DDL, Column, Integer, DateTime, event
 from sqlalchemy.sql import func
 from database import Base
 
+# Триграммные индексы (gin_trgm_ops) для поиска по подстроке требуют расширения pg_trgm
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
 
 class BaseModel(Base):
     """
@@ -11,4 +18,8 @@ class BaseModel(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    # Серверные значения (id, created_at, updated_at) возвращаются через INSERT/UPDATE ... RETURNING,
+    # поэтому после flush не нужен refresh
+    __mapper_args__ = {"eager_defaults": True}
\ No newline at end of file
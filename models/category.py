@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text
+from sqlalchemy import Column, String, Text, Index
 from models.base import BaseModel
 
 
@@ -7,6 +7,12 @@ class Category(BaseModel):
     Модель для категорий товаров
     """
     __tablename__ = "categories"
+    __table_args__ = (
+        # Поиск по подстроке (ILIKE '%...%') и нечеткий поиск
+        Index("ix_categories_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_categories_description_trgm", "description", postgresql_using="gin",
+              postgresql_ops={"description": "gin_trgm_ops"}),
+    )
 
     name = Column(String(100), nullable=False, unique=True, index=True)
     description = Column(Text, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Enum, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
 from datetime import datetime
@@ -21,9 +21,21 @@ class Order(BaseModel):
     Модель заказа
     """
     __tablename__ = "orders"
+    __table_args__ = (
+        # Заказы пользователя с фильтром по статусу (get_user_orders, get_user_orders_count)
+        Index("ix_orders_user_id_status_created_at", "user_id", "status", "created_at"),
+        # История заказов пользователя без корзины, по дате
+        Index("ix_orders_user_id_created_at_placed", "user_id", "created_at",
+              postgresql_where=text("status <> 'cart'")),
+        # Список заказов администратора без фильтров и с фильтром по статусу
+        Index("ix_orders_created_at_placed", "created_at", postgresql_where=text("status <> 'cart'")),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # Корзина пользователя (get_cart)
+        Index("ix_orders_user_id_cart", "user_id", postgresql_where=text("status = 'cart'")),
+    )
     
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    status = Column(String(20), default=OrderStatus.CART.value, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(String(20), default=OrderStatus.CART.value, nullable=False)
     total_amount = Column(Float, default=0.0, nullable=False)
     shipping_address = Column(String(500), nullable=True)
     phone_number = Column(String(20), nullable=True)
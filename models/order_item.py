@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Boolean
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from models.base import BaseModel
@@ -9,8 +9,12 @@ class OrderItem(BaseModel):
     Модель элемента заказа
     """
     __tablename__ = "order_items"
+    __table_args__ = (
+        # Поиск товара в корзине (add_item_to_cart); префикс order_id покрывает выборку элементов заказа
+        Index("ix_order_items_order_id_product_id", "order_id", "product_id"),
+    )
     
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id", ondelete="SET NULL"), nullable=True, index=True)
     quantity = Column(Integer, default=1, nullable=False)
     price = Column(Float, nullable=False) 
@@ -1,20 +1,50 @@
-from sqlalchemy import Column, String, Text, Integer, Float, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, Integer, Float, ForeignKey, Boolean, Index, Computed, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from models.base import BaseModel
 
+# Поисковый вектор: название (вес A) > артикул (B) > описание (C).
+# Конфигурация russian стеммит русские слова (russian_stem), а латинские -
+# английским стеммером (english_stem); артикул разбирается без стемминга (simple)
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(sku, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C')"
+)
+
 
 class Product(BaseModel):
     """
     Модель для товаров
     """
     __tablename__ = "products"
+    __table_args__ = (
+        # Фильтры списка товаров: активность, категория, бренд
+        Index("ix_products_is_active_category_id_brand_id", "is_active", "category_id", "brand_id"),
+        # Полнотекстовый поиск по search_vector
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        # Поиск по части артикула и нечеткий поиск по названию
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_products_sku_trgm", "sku", postgresql_using="gin", postgresql_ops={"sku": "gin_trgm_ops"}),
+        # Сортировки списка товаров (ключ keyset-пагинации - столбец сортировки и id)
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_sales_count_id", "sales_count", "id"),
+        # Фильтр in_stock=false: товаров без остатка мало
+        Index("ix_products_out_of_stock", "id", postgresql_where=text("stock <= 0")),
+    )
 
-    name = Column(String(255), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    price = Column(Float, nullable=False, index=True)
+    price = Column(Float, nullable=False)
     stock = Column(Integer, nullable=False, default=0)
+    # Продано штук в оформленных и не отмененных заказах (сортировка по популярности)
+    sales_count = Column(Integer, nullable=False, default=0, server_default="0")
     sku = Column(String(50), nullable=True, unique=True, index=True)
     is_active = Column(Boolean, nullable=False, default=True)
+    # Вычисляемый столбец; не загружается вместе с товаром
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True), nullable=True))
 
     # Внешние ключи
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True, index=True)
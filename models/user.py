@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -10,6 +10,14 @@ class User(BaseModel):
     Модель пользователя
     """
     __tablename__ = "users"
+    __table_args__ = (
+        # Поиск по подстроке (ILIKE '%...%') и нечеткий поиск в админ-панели
+        Index("ix_users_username_trgm", "username", postgresql_using="gin",
+              postgresql_ops={"username": "gin_trgm_ops"}),
+        Index("ix_users_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        Index("ix_users_full_name_trgm", "full_name", postgresql_using="gin",
+              postgresql_ops={"full_name": "gin_trgm_ops"}),
+    )
 
     email = Column(String(320), nullable=False, unique=True, index=True)
     username = Column(String(50), nullable=False, unique=True, index=True)
@@ -4,4 +4,5 @@ from schemas.brand import *
 from schemas.product_image import *
 from schemas.user import *
 from schemas.role import *
-from schemas.order import *
\ No newline at end of file
+from schemas.order import *
+from schemas.admin import *
\ No newline at end of file
@@ -0,0 +1,71 @@
+from pydantic import Field
+from datetime import datetime
+from typing import Any, List, Optional
+from schemas.base import BaseSchema
+
+
+class PoolWaitBucket(BaseSchema):
+    """Корзина гистограммы времени ожидания соединения"""
+    le_ms: Optional[float] = Field(None, description="Верхняя граница корзины, мс (None - больше последней)")
+    count: int
+
+
+class PoolStats(BaseSchema):
+    """Телеметрия пула соединений одного движка"""
+    name: str = Field(..., description="Имя движка")
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checked_out: Optional[int] = Field(None, description="Выданные соединения")
+    checked_in: Optional[int] = Field(None, description="Свободные соединения в пуле")
+    overflow: Optional[int] = Field(None, description="Открытые соединения сверх pool_size")
+    peak_checked_out: int
+    connects: int
+    checkouts: int
+    checkins: int
+    waits: int = Field(..., description="Сколько раз запрос ждал свободное соединение")
+    wait_time_total_ms: float
+    wait_time_max_ms: float
+    wait_histogram: List[PoolWaitBucket]
+    timeouts: int = Field(..., description="Ошибки 'QueuePool limit reached'")
+    overflow_events: int
+    invalidations: int
+    soft_invalidations: int
+
+
+class ReplicaStatus(BaseSchema):
+    """Состояние реплики для чтения"""
+    name: str
+    healthy: bool
+    lag: Optional[float] = Field(None, description="Отставание от основного сервера, с")
+    error: Optional[str] = None
+
+
+class NPlusOneSuspect(BaseSchema):
+    """Форма запроса, многократно повторявшаяся в пределах одного HTTP-запроса"""
+    route: str = Field(..., description="Метод и шаблон маршрута")
+    shape: str = Field(..., description="Нормализованный SQL")
+    requests: int = Field(..., description="Число запросов, где порог был превышен")
+    max_count: int = Field(..., description="Максимум повторов формы за один запрос")
+
+
+class SlowQuery(BaseSchema):
+    """Медленный запрос из журнала"""
+    captured_at: datetime
+    route: Optional[str] = Field(None, description="Метод и шаблон маршрута (None - вне HTTP-запроса)")
+    duration_ms: float
+    sql: str = Field(..., description="Нормализованный SQL")
+    parameters: Any = Field(None, description="Значения параметров")
+    plan: Optional[str] = Field(None, description="Вывод EXPLAIN (ANALYZE, BUFFERS), если запрос попал в выборку")
+
+
+class CacheStats(BaseSchema):
+    """Счетчики кэша в памяти процесса"""
+    name: str
+    size: int = Field(..., description="Текущее число записей")
+    maxsize: int
+    hits: int
+    misses: int
+    hit_ratio: Optional[float] = Field(None, description="Доля попаданий (None - обращений не было)")
+    evictions: int = Field(..., description="Вытеснения по LRU при переполнении")
+    invalidations: int
+    saved_ms: Optional[float] = Field(None, description="Сэкономленное попаданиями время запросов, мс")
\ No newline at end of file
@@ -1,3 +1,4 @@
+from enum import Enum
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, Generic, TypeVar, List, Dict, Any
@@ -33,10 +34,26 @@ class SearchParams(BaseSchema):
     query: str = Field("", description="Поисковый запрос")
 
 
+class TotalMode(str, Enum):
+    """Способ подсчета общего количества записей в пагинированном ответе"""
+    EXACT = "exact"  # COUNT(*) по запросу
+    ESTIMATED = "estimated"  # Статистика планировщика или недавний COUNT(*) из кэша
+    NONE = "none"  # Без подсчета
+
+
+class SortOrder(str, Enum):
+    """Направление сортировки списка"""
+    ASC = "asc"
+    DESC = "desc"
+
+
 class PaginatedResponse(BaseSchema, Generic[T]):
     """Обертка для пагинированного ответа"""
     items: List[T]
-    total: int
+    total: Optional[int] = Field(None, description="Общее количество (None при total=none)")
     page: int
     per_page: int
-    pages: int
\ No newline at end of file
+    pages: Optional[int] = None
+    total_kind: TotalMode = Field(TotalMode.EXACT, description="Как получено значение total")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (параметр cursor)")
+    prev_cursor: Optional[str] = Field(None, description="Курсор предыдущей страницы (параметр cursor)")
\ No newline at end of file
@@ -1,6 +1,7 @@
+from enum import Enum
 from pydantic import Field, validator
 from typing import Optional, List
-from schemas.base import BaseSchema, IDSchema, TimestampSchema
+from schemas.base import BaseSchema, IDSchema, TimestampSchema, PaginatedResponse
 from schemas.category import Category
 from schemas.brand import Brand
 from schemas.product_image import ProductImage
@@ -35,6 +36,21 @@ class ProductUpdate(BaseSchema):
     brand_id: Optional[int] = Field(None, description="ID бренда товара")
 
 
+class ProductSort(str, Enum):
+    """Поле сортировки списка товаров"""
+    PRICE = "price"
+    CREATED_AT = "created_at"
+    NAME = "name"
+    POPULARITY = "popularity"  # Продано штук (sales_count)
+
+
+class ProductSuggestion(BaseSchema):
+    """Подсказка строки поиска"""
+    text: str = Field(..., description="Текст подсказки")
+    kind: str = Field(..., description="Вид: product, brand или category")
+    id: int = Field(..., description="ID товара, бренда или категории")
+
+
 class ProductInDB(ProductBase, IDSchema, TimestampSchema):
     """Полная схема товара из БД"""
     pass
@@ -56,4 +72,39 @@ class ProductDetail(ProductInDB):
     """Схема для детального представления товара (со связанными объектами)"""
     category: Optional[Category] = None
     brand: Optional[Brand] = None
-    images: List[ProductImage] = []
\ No newline at end of file
+    images: List[ProductImage] = []
+
+
+class FacetCount(BaseSchema):
+    """Количество товаров со значением фасета"""
+    id: Optional[int] = Field(None, description="ID категории или бренда (None - не указан)")
+    count: int
+
+
+class PriceFacet(BaseSchema):
+    """Количество товаров в ценовом диапазоне [min, max)"""
+    min: Optional[float] = Field(None, description="Нижняя граница (включительно), None - без ограничения")
+    max: Optional[float] = Field(None, description="Верхняя граница (не включительно), None - без ограничения")
+    count: int
+
+
+class StockFacet(BaseSchema):
+    """Количество товаров в наличии и отсутствующих"""
+    in_stock: int = 0
+    out_of_stock: int = 0
+
+
+class ProductFacets(BaseSchema):
+    """
+    Счетчики фасетов списка товаров. Счетчики категорий не учитывают фильтр по категории,
+    брендов - фильтр по бренду, чтобы показывать количество для других значений фильтра
+    """
+    categories: List[FacetCount] = []
+    brands: List[FacetCount] = []
+    price: List[PriceFacet] = []
+    stock: StockFacet = StockFacet()
+
+
+class ProductList(PaginatedResponse[Product]):
+    """Страница товаров со счетчиками фасетов (при facets=true)"""
+    facets: Optional[ProductFacets] = None
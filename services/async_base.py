@@ -0,0 +1,156 @@
+from typing import Generic, Type, List, Optional, Any, Dict, Union
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from services.base import ModelType, CreateSchemaType, UpdateSchemaType
+
+
+class AsyncBaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Базовый класс асинхронного сервиса для CRUD операций (AsyncSession)
+    """
+
+    def __init__(self, model: Type[ModelType]):
+        """
+        Инициализация сервиса.
+
+        Args:
+            model: SQLAlchemy модель
+        """
+        self.model = model
+
+    def _apply_filters(self, query, filters: Optional[Dict[str, Any]]):
+        """
+        Применение фильтров {поле: значение} к запросу
+        """
+        if filters:
+            for field, value in filters.items():
+                if hasattr(self.model, field) and value is not None:
+                    query = query.where(getattr(self.model, field) == value)
+
+        return query
+
+    async def get(self, db: AsyncSession, id: int) -> Optional[ModelType]:
+        """
+        Получение записи по ID
+
+        Args:
+            db: Асинхронная сессия базы данных
+            id: Идентификатор записи
+
+        Returns:
+            Объект модели или None, если не найден
+        """
+        return await db.get(self.model, id)
+
+    async def get_multi(
+            self,
+            db: AsyncSession,
+            *,
+            skip: int = 0,
+            limit: int = 100,
+            filters: Optional[Dict[str, Any]] = None
+    ) -> List[ModelType]:
+        """
+        Получение списка записей с пагинацией и фильтрацией
+
+        Args:
+            db: Асинхронная сессия базы данных
+            skip: Количество пропускаемых записей
+            limit: Максимальное количество возвращаемых записей
+            filters: Словарь с фильтрами {поле: значение}
+
+        Returns:
+            Список объектов модели
+        """
+        query = self._apply_filters(select(self.model), filters)
+        result = await db.execute(query.offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def get_count(
+            self,
+            db: AsyncSession,
+            filters: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Получение общего количества записей с учетом фильтров
+
+        Args:
+            db: Асинхронная сессия базы данных
+            filters: Словарь с фильтрами {поле: значение}
+
+        Returns:
+            Количество записей
+        """
+        query = self._apply_filters(select(func.count()).select_from(self.model), filters)
+        return await db.scalar(query)
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """
+        Создание новой записи
+
+        Args:
+            db: Асинхронная сессия базы данных
+            obj_in: Схема данных для создания
+
+        Returns:
+            Созданный объект модели
+        """
+        obj_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_data)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+            self,
+            db: AsyncSession,
+            *,
+            db_obj: ModelType,
+            obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """
+        Обновление существующей записи
+
+        Args:
+            db: Асинхронная сессия базы данных
+            db_obj: Объект модели для обновления
+            obj_in: Схема данных для обновления или словарь с полями
+
+        Returns:
+            Обновленный объект модели
+        """
+        obj_data = jsonable_encoder(db_obj)
+
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+
+        for field in obj_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        """
+        Удаление записи по ID
+
+        Args:
+            db: Асинхронная сессия базы данных
+            id: Идентификатор записи
+
+        Returns:
+            Удаленный объект модели или None, если запись не найдена
+        """
+        obj = await db.get(self.model, id)
+        if obj:
+            await db.delete(obj)
+            await db.commit()
+        return obj
\ No newline at end of file
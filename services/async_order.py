@@ -0,0 +1,431 @@
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, delete
+from datetime import datetime
+
+from models.order import Order, OrderStatus
+from models.order_item import OrderItem
+from models.product import Product
+from schemas.order import OrderCreate, OrderUpdate, CartItemAdd, OrderItemUpdate
+from services.async_base import AsyncBaseService
+from utils.invalidation import invalidation_bus
+
+
+class AsyncOrderService(AsyncBaseService[Order, OrderCreate, OrderUpdate]):
+    """
+    Асинхронный сервис для работы с корзиной и заказами
+    """
+
+    def __init__(self):
+        super().__init__(Order)
+
+    async def _get_product(self, db: AsyncSession, product_id: int) -> Optional[Product]:
+        return await db.get(Product, product_id)
+
+    async def get_cart(self, db: AsyncSession, user_id: int) -> Order:
+        """
+        Получение текущей корзины пользователя или создание новой, если корзины нет
+        """
+        result = await db.execute(
+            select(Order).where(
+                Order.user_id == user_id,
+                Order.status == OrderStatus.CART.value
+            )
+        )
+        cart = result.scalars().first()
+
+        if not cart:
+            cart = Order(
+                user_id=user_id,
+                status=OrderStatus.CART.value,
+                total_amount=0.0
+            )
+            db.add(cart)
+            await db.commit()
+            await db.refresh(cart)
+
+        return cart
+
+    async def get_cart_with_items(self, db: AsyncSession, user_id: int) -> Order:
+        cart = await self.get_cart(db, user_id)
+
+        # populate_existing: корзина уже в identity map, перечитываем ее вместе с элементами
+        result = await db.execute(
+            select(Order)
+            .options(selectinload(Order.items))
+            .where(Order.id == cart.id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def add_item_to_cart(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        item_data: CartItemAdd
+    ) -> OrderItem:
+        cart = await self.get_cart(db, user_id)
+
+        product = await self._get_product(db, item_data.product_id)
+        if not product:
+            raise ValueError(f"Товар с ID {item_data.product_id} не найден")
+
+        if product.stock < item_data.quantity:
+            raise ValueError(f"Недостаточное количество товара на складе. Доступно: {product.stock}")
+
+        result = await db.execute(
+            select(OrderItem).where(
+                OrderItem.order_id == cart.id,
+                OrderItem.product_id == item_data.product_id
+            )
+        )
+        existing_item = result.scalars().first()
+
+        if existing_item:
+            existing_item.quantity += item_data.quantity
+            db.add(existing_item)
+            item = existing_item
+        else:
+            item = OrderItem(
+                order_id=cart.id,
+                product_id=product.id,
+                quantity=item_data.quantity,
+                price=product.price,
+                product_name=product.name
+            )
+            db.add(item)
+
+        await self.recalculate_cart_total(db, cart)
+
+        await db.commit()
+        await db.refresh(item)
+
+        return item
+
+    async def update_cart_item(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        item_id: int,
+        item_data: OrderItemUpdate
+    ) -> Optional[OrderItem]:
+        cart = await self.get_cart(db, user_id)
+
+        result = await db.execute(
+            select(OrderItem).where(
+                OrderItem.id == item_id,
+                OrderItem.order_id == cart.id
+            )
+        )
+        item = result.scalars().first()
+
+        if not item:
+            return None
+
+        if item.product_id and item_data.quantity:
+            product = await self._get_product(db, item.product_id)
+            if product and product.stock < item_data.quantity:
+                raise ValueError(f"Недостаточное количество товара на складе. Доступно: {product.stock}")
+
+        if item_data.quantity:
+            item.quantity = item_data.quantity
+
+        db.add(item)
+
+        await self.recalculate_cart_total(db, cart)
+
+        await db.commit()
+        await db.refresh(item)
+
+        return item
+
+    async def remove_item_from_cart(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        item_id: int
+    ) -> bool:
+        cart = await self.get_cart(db, user_id)
+
+        result = await db.execute(
+            select(OrderItem).where(
+                OrderItem.id == item_id,
+                OrderItem.order_id == cart.id
+            )
+        )
+        item = result.scalars().first()
+
+        if not item:
+            return False
+
+        await db.delete(item)
+
+        await self.recalculate_cart_total(db, cart)
+
+        await db.commit()
+
+        return True
+
+    async def clear_cart(self, db: AsyncSession, user_id: int) -> bool:
+        cart = await self.get_cart(db, user_id)
+
+        await db.execute(delete(OrderItem).where(OrderItem.order_id == cart.id))
+
+        cart.total_amount = 0.0
+        db.add(cart)
+
+        await db.commit()
+
+        return True
+
+    async def checkout_cart(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        order_data: OrderCreate
+    ) -> Order:
+        cart = await self.get_cart_with_items(db, user_id)
+
+        if not cart.items:
+            raise ValueError("Корзина пуста, нельзя оформить заказ")
+
+        for item in cart.items:
+            if item.product_id:
+                product = await self._get_product(db, item.product_id)
+                if product and product.stock < item.quantity:
+                    raise ValueError(f"Недостаточное количество товара '{item.product_name}' на складе. "
+                                     f"Доступно: {product.stock}, запрошено: {item.quantity}")
+
+        cart.status = OrderStatus.NEW.value
+        cart.shipping_address = order_data.shipping_address
+        cart.phone_number = order_data.phone_number
+        cart.notes = order_data.notes
+
+        # Остатки и продажи (сортировка по популярности), как в OrderService.checkout_cart
+        for item in cart.items:
+            if item.product_id:
+                product = await self._get_product(db, item.product_id)
+                if product:
+                    product.stock -= item.quantity
+                    product.sales_count += item.quantity
+                    db.add(product)
+
+        await invalidation_bus.publish_async(
+            db, "product", *{item.product_id for item in cart.items if item.product_id}
+        )
+
+        db.add(cart)
+        await db.commit()
+
+        return await self.get_order_with_items(db, cart.id)
+
+    def _user_orders_query(self, query, user_id: int, include_cart: bool, status: Optional[str]):
+        query = query.where(Order.user_id == user_id)
+
+        if not include_cart:
+            query = query.where(Order.status != OrderStatus.CART.value)
+
+        if status:
+            query = query.where(Order.status == status)
+
+        return query
+
+    async def get_user_orders(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        include_cart: bool = False,
+        status: Optional[str] = None
+    ) -> List[Order]:
+        """
+        Получение заказов пользователя вместе с элементами (одним дополнительным запросом selectin)
+        """
+        query = self._user_orders_query(
+            select(Order).options(selectinload(Order.items)), user_id, include_cart, status
+        )
+        result = await db.execute(
+            query.order_by(Order.created_at.desc()).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_user_orders_count(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        include_cart: bool = False,
+        status: Optional[str] = None
+    ) -> int:
+        """
+        Получение количества заказов пользователя
+        """
+        query = self._user_orders_query(
+            select(func.count()).select_from(Order), user_id, include_cart, status
+        )
+        return await db.scalar(query)
+
+    async def get_order_with_items(
+            self,
+            db: AsyncSession,
+            order_id: int,
+            user_id: Optional[int] = None
+    ) -> Optional[Order]:
+        """
+        Получение заказа с загрузкой всех элементов
+        """
+        query = select(Order).options(selectinload(Order.items)).where(Order.id == order_id)
+
+        if user_id is not None:
+            query = query.where(Order.user_id == user_id)
+
+        result = await db.execute(query.execution_options(populate_existing=True))
+        return result.scalars().first()
+
+    async def cancel_order(
+            self,
+            db: AsyncSession,
+            order_id: int,
+            user_id: Optional[int] = None
+    ) -> Optional[Order]:
+        """
+        Отмена заказа и возврат товаров на склад
+        """
+        order = await self.get_order_with_items(db, order_id, user_id)
+
+        if not order:
+            return None
+
+        if order.status == OrderStatus.DELIVERED.value:
+            raise ValueError("Нельзя отменить доставленный заказ")
+
+        if order.status == OrderStatus.CANCELED.value:
+            raise ValueError("Заказ уже отменен")
+
+        # Корзина в продажи не входила
+        counted = order.status != OrderStatus.CART.value
+        for item in order.items:
+            if item.product_id is not None:
+                product = await self._get_product(db, item.product_id)
+                if product:
+                    product.stock += item.quantity
+                    if counted:
+                        product.sales_count -= item.quantity
+                    db.add(product)
+
+        await invalidation_bus.publish_async(
+            db, "product", *{item.product_id for item in order.items if item.product_id}
+        )
+
+        order.status = OrderStatus.CANCELED.value
+        db.add(order)
+
+        await db.commit()
+
+        return await self.get_order_with_items(db, order.id)
+
+    async def recalculate_cart_total(self, db: AsyncSession, cart: Order) -> None:
+        """
+        Пересчет общей суммы корзины
+        """
+        # Сначала сбрасываем изменения, иначе новые и удаленные элементы не попадут в выборку
+        await db.flush()
+
+        result = await db.execute(select(OrderItem).where(OrderItem.order_id == cart.id))
+        items = result.scalars().all()
+
+        cart.total_amount = sum(item.price * item.quantity for item in items)
+        db.add(cart)
+
+    def _admin_orders_query(self, query, status: Optional[str], user_id: Optional[int]):
+        query = query.where(Order.status != OrderStatus.CART.value)
+
+        if status:
+            query = query.where(Order.status == status)
+
+        if user_id:
+            query = query.where(Order.user_id == user_id)
+
+        return query
+
+    async def get_admin_orders(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> List[Order]:
+        """
+        Получение списка заказов для администратора
+        """
+        query = self._admin_orders_query(
+            select(Order).options(selectinload(Order.items)), status, user_id
+        )
+        result = await db.execute(
+            query.order_by(Order.created_at.desc()).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_admin_orders_count(
+        self,
+        db: AsyncSession,
+        status: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> int:
+        """
+        Получение количества заказов для администратора
+        """
+        query = self._admin_orders_query(select(func.count()).select_from(Order), status, user_id)
+        return await db.scalar(query)
+
+    async def change_order_status(
+        self,
+        db: AsyncSession,
+        order_id: int,
+        new_status: str,
+        admin_only: bool = True
+    ) -> Optional[Order]:
+        """
+        Изменение статуса заказа
+        """
+        if new_status not in [status.value for status in OrderStatus]:
+            raise ValueError(f"Недопустимый статус заказа: {new_status}")
+
+        order = await db.get(Order, order_id)
+
+        if not order:
+            return None
+
+        if new_status == OrderStatus.CART.value:
+            raise ValueError("Нельзя изменить статус заказа на 'cart'")
+
+        if order.status == OrderStatus.CANCELED.value and admin_only:
+            raise ValueError("Нельзя изменить статус отмененного заказа")
+
+        if new_status == OrderStatus.DELIVERED.value:
+            order.completed_at = datetime.utcnow()
+
+        # Продажи товаров учитывают только оформленные и не отмененные заказы
+        not_sold = (OrderStatus.CART.value, OrderStatus.CANCELED.value)
+        if (order.status in not_sold) != (new_status in not_sold):
+            sign = -1 if new_status in not_sold else 1
+            result = await db.execute(select(OrderItem).where(OrderItem.order_id == order.id))
+            items = result.scalars().all()
+            for item in items:
+                if item.product_id is not None:
+                    product = await self._get_product(db, item.product_id)
+                    if product:
+                        product.sales_count += sign * item.quantity
+                        db.add(product)
+            await invalidation_bus.publish_async(
+                db, "product", *{item.product_id for item in items if item.product_id}
+            )
+
+        order.status = new_status
+        db.add(order)
+
+        await db.commit()
+
+        return await self.get_order_with_items(db, order.id)
\ No newline at end of file
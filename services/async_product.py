@@ -0,0 +1,147 @@
+from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, or_
+
+from models.product import Product
+from schemas.product import ProductCreate, ProductUpdate
+from services.async_base import AsyncBaseService
+
+
+class AsyncProductService(AsyncBaseService[Product, ProductCreate, ProductUpdate]):
+    """
+    Асинхронный сервис для работы с товарами
+    """
+
+    def __init__(self):
+        super().__init__(Product)
+
+    @staticmethod
+    def _relations():
+        # selectinload вместо joinedload: без декартова произведения и без unique() на результате
+        return (
+            selectinload(Product.category),
+            selectinload(Product.brand),
+            selectinload(Product.images)
+        )
+
+    @staticmethod
+    def _search_filters(
+            query: str,
+            category_id: Optional[int] = None,
+            brand_id: Optional[int] = None,
+            is_active: Optional[bool] = None
+    ) -> list:
+        search_term = f"%{query}%"
+
+        filters = [
+            or_(
+                Product.name.ilike(search_term),
+                Product.description.ilike(search_term),
+                Product.sku.ilike(search_term)
+            )
+        ]
+
+        if category_id is not None:
+            filters.append(Product.category_id == category_id)
+
+        if brand_id is not None:
+            filters.append(Product.brand_id == brand_id)
+
+        if is_active is not None:
+            filters.append(Product.is_active == is_active)
+
+        return filters
+
+    async def get_with_relations(self, db: AsyncSession, id: int) -> Optional[Product]:
+        """
+        Получение товара по ID с загрузкой связанных объектов
+
+        Args:
+            db: Асинхронная сессия базы данных
+            id: Идентификатор товара
+
+        Returns:
+            Объект товара со связанными объектами или None, если не найден
+        """
+        result = await db.execute(
+            select(Product).options(*self._relations()).where(Product.id == id)
+        )
+        return result.scalars().first()
+
+    async def get_by_sku(self, db: AsyncSession, sku: str) -> Optional[Product]:
+        """
+        Получение товара по артикулу (SKU)
+
+        Args:
+            db: Асинхронная сессия базы данных
+            sku: Артикул товара
+
+        Returns:
+            Объект товара или None, если не найден
+        """
+        result = await db.execute(select(Product).where(Product.sku == sku))
+        return result.scalars().first()
+
+    async def get_multi_with_relations(
+            self,
+            db: AsyncSession,
+            *,
+            skip: int = 0,
+            limit: int = 100,
+            filters: Optional[Dict[str, Any]] = None
+    ) -> List[Product]:
+        """
+        Получение списка товаров с загрузкой связанных объектов
+
+        Args:
+            db: Асинхронная сессия базы данных
+            skip: Количество пропускаемых записей
+            limit: Максимальное количество возвращаемых записей
+            filters: Словарь с фильтрами {поле: значение}
+
+        Returns:
+            Список объектов товаров со связанными объектами
+        """
+        query = self._apply_filters(select(Product).options(*self._relations()), filters)
+        result = await db.execute(query.offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        query: str,
+        category_id: Optional[int] = None,
+        brand_id: Optional[int] = None,
+        is_active: Optional[bool] = None,
+        skip: int = 0,
+        limit: int = 100,
+        with_relations: bool = False
+    ) -> List[Product]:
+        """
+        Поиск товаров по названию, описанию или SKU с возможностью фильтрации по активности
+        """
+        base_query = select(Product)
+
+        if with_relations:
+            base_query = base_query.options(*self._relations())
+
+        filters = self._search_filters(query, category_id, brand_id, is_active)
+        result = await db.execute(base_query.where(*filters).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def search_count(
+            self,
+            db: AsyncSession,
+            *,
+            query: str,
+            category_id: Optional[int] = None,
+            brand_id: Optional[int] = None,
+            is_active: Optional[bool] = None
+    ) -> int:
+        """
+        Подсчет количества товаров, соответствующих поисковому запросу
+        """
+        filters = self._search_filters(query, category_id, brand_id, is_active)
+        return await db.scalar(select(func.count()).select_from(Product).where(*filters))
\ No newline at end of file
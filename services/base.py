@@ -1,9 +1,15 @@
-from typing import Generic, TypeVar, Type, List, Optional, Any, Dict, Union
+from datetime import datetime
+from typing import Generic, TypeVar, Type, List, Optional, Any, Callable, Dict, Tuple, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import Select, bindparam, select, func
 from database import Base
+from schemas.base import TotalMode
+from utils.pagination import Keyset, KeysetPage, aggregate_statement, count_total
+from config import get_settings
+
+settings = get_settings()
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -23,6 +29,34 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             model: SQLAlchemy модель
         """
         self.model = model
+        # Запрос по ID строится один раз: при вызове подставляется только значение параметра
+        self._get_statement = select(model).where(model.id == bindparam("id"))
+        # Порядок списков: по id (детерминированный и пригодный для курсоров)
+        self.keyset = Keyset(model.id)
+        # Допустимые поля сортировки {имя: столбец}; каждому нужен индекс (столбец, id)
+        self.sort_columns: Dict[str, Any] = {"id": model.id}
+        # Фильтры, не сводящиеся к равенству столбцу: {имя: значение -> условие}
+        self.filter_builders: Dict[str, Callable[[Any], Any]] = {}
+
+    def _persist(self, db: Session, *objs: Any) -> None:
+        """
+        Сохранение изменений сессии
+
+        В режиме единицы работы (DB_UNIT_OF_WORK) выполняется только flush: серверные
+        значения приходят через RETURNING, а commit делает get_db в конце запроса.
+        Иначе - commit и refresh переданных объектов.
+
+        Args:
+            db: Сессия базы данных
+            objs: Объекты, которые нужно перечитать после commit
+        """
+        if settings.DB_UNIT_OF_WORK:
+            db.flush()
+            return
+
+        db.commit()
+        for obj in objs:
+            db.refresh(obj)
 
     def get(self, db: Session, id: int) -> Optional[ModelType]:
         """
@@ -35,7 +69,7 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             Объект модели или None, если не найден
         """
-        return db.query(self.model).filter(self.model.id == id).first()
+        return db.scalars(self._get_statement, {"id": id}).first()
 
     def get_multi(
             self,
@@ -43,29 +77,111 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             *,
             skip: int = 0,
             limit: int = 100,
-            filters: Optional[Dict[str, Any]] = None
+            filters: Optional[Dict[str, Any]] = None,
+            sort: Optional[str] = None,
+            descending: bool = False
     ) -> List[ModelType]:
         """
-        Получение списка записей с пагинацией и фильтрацией
+        Получение списка записей с пагинацией, фильтрацией и сортировкой
 
         Args:
             db: Сессия базы данных
             skip: Количество пропускаемых записей
             limit: Максимальное количество возвращаемых записей
-            filters: Словарь с фильтрами {поле: значение}
+            filters: Словарь с фильтрами {поле: значение} (и фильтры из filter_builders)
+            sort: Поле сортировки из sort_columns (по умолчанию id)
+            descending: Сортировка по убыванию
 
         Returns:
             Список объектов модели
         """
+        keyset = self.get_keyset(sort, descending)
+        return self._filtered_query(db, filters).order_by(*keyset.order_by()).offset(skip).limit(limit).all()
+
+    def get_page(
+            self,
+            db: Session,
+            *,
+            skip: int = 0,
+            limit: int = 100,
+            filters: Optional[Dict[str, Any]] = None,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
+            sort: Optional[str] = None,
+            descending: bool = False
+    ) -> KeysetPage:
+        """
+        Страница записей по курсору (keyset) или, если курсора нет, по смещению
+
+        Args:
+            db: Сессия базы данных
+            skip: Количество пропускаемых записей (без курсора)
+            limit: Максимальное количество возвращаемых записей
+            filters: Словарь с фильтрами {поле: значение}
+            cursor: Курсор из предыдущего ответа
+            with_total: Вычислить в том же запросе total и last_modified (см. page_aggregates)
+            sort: Поле сортировки из sort_columns (по умолчанию id)
+            descending: Сортировка по убыванию
+
+        Returns:
+            Записи страницы и курсоры соседних страниц
+        """
+        return self.get_keyset(sort, descending).paginate(
+            self._filtered_query(db, filters),
+            limit=limit,
+            cursor=cursor,
+            offset=skip,
+            aggregates=self.page_aggregates() if with_total else None
+        )
+
+    def get_keyset(self, sort: Optional[str] = None, descending: bool = False) -> Keyset:
+        """
+        Порядок списка: поле сортировки и id (для однозначности порядка и курсоров)
+
+        Args:
+            sort: Поле сортировки из sort_columns (по умолчанию id)
+            descending: Сортировка по убыванию
+
+        Returns:
+            Ключ сортировки
+        """
+        if sort is None and not descending:
+            return self.keyset
+
+        column = self.sort_columns.get(sort or "id")
+        if column is None:
+            raise ValueError(f"Недопустимое поле сортировки: {sort}")
+        if column is self.model.id:
+            return Keyset(self.model.id, descending=descending)
+        return Keyset(column, self.model.id, descending=descending)
+
+    def page_aggregates(self) -> Dict[str, Any]:
+        """
+        Агрегаты по всему списку для пагинированного ответа: количество записей
+        и max(updated_at) (версия списка для ETag)
+        """
+        return {"total": func.count(), "last_modified": func.max(self.model.updated_at)}
+
+    def _filter_conditions(self, filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        conditions = []
+        for field, value in (filters or {}).items():
+            if value is None:
+                continue
+            if field in self.filter_builders:
+                conditions.append(self.filter_builders[field](value))
+            elif hasattr(self.model, field):
+                conditions.append(getattr(self.model, field) == value)
+        return conditions
+
+    def _filtered_query(self, db: Session, filters: Optional[Dict[str, Any]] = None):
         query = db.query(self.model)
 
         # Применяем фильтры, если они есть
-        if filters:
-            for field, value in filters.items():
-                if hasattr(self.model, field) and value is not None:
-                    query = query.filter(getattr(self.model, field) == value)
+        conditions = self._filter_conditions(filters)
+        if conditions:
+            query = query.filter(*conditions)
 
-        return query.offset(skip).limit(limit).all()
+        return query
 
     def get_count(
             self,
@@ -82,15 +198,54 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             Количество записей
         """
-        query = select(func.count()).select_from(self.model)
+        return db.scalar(self._count_statement(db, filters))
 
-        # Применяем фильтры, если они есть
-        if filters:
-            for field, value in filters.items():
-                if hasattr(self.model, field) and value is not None:
-                    query = query.where(getattr(self.model, field) == value)
+    def get_total(
+            self,
+            db: Session,
+            filters: Optional[Dict[str, Any]] = None,
+            total_mode: TotalMode = TotalMode.EXACT
+    ) -> Tuple[Optional[int], TotalMode]:
+        """
+        Общее количество записей для пагинированного ответа в заданном режиме подсчета
+
+        Args:
+            db: Сессия базы данных
+            filters: Словарь с фильтрами {поле: значение}
+            total_mode: Способ подсчета (exact, estimated, none)
+
+        Returns:
+            Количество (None для total=none) и способ, которым оно получено
+        """
+        has_filters = bool(self._filter_conditions(filters))
+        return count_total(
+            db,
+            self._count_statement(db, filters),
+            total_mode,
+            table=None if has_filters else self.model.__table__
+        )
+
+    def _count_statement(self, db: Session, filters: Optional[Dict[str, Any]] = None) -> Select:
+        return aggregate_statement(self._filtered_query(db, filters), func.count())
+
+    def get_collection_version(
+            self,
+            db: Session,
+            filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[int, Optional[datetime]]:
+        """
+        Количество записей и время последнего изменения с учетом фильтров (для ETag)
 
-        return db.scalar(query)
+        Args:
+            db: Сессия базы данных
+            filters: Словарь с фильтрами {поле: значение}
+
+        Returns:
+            Количество записей и max(updated_at)
+        """
+        statement = aggregate_statement(self._filtered_query(db, filters), *self.page_aggregates().values())
+        count, last_modified = db.execute(statement).one()
+        return count, last_modified
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """
@@ -106,8 +261,7 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        self._persist(db, db_obj)
         return db_obj
 
     def update(
@@ -140,8 +294,7 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 setattr(db_obj, field, update_data[field])
 
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        self._persist(db, db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
@@ -155,8 +308,8 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             Удаленный объект модели или None, если запись не найдена
         """
-        obj = db.query(self.model).get(id)
+        obj = self.get(db, id)
         if obj:
             db.delete(obj)
-            db.commit()
+            self._persist(db)
         return obj
\ No newline at end of file
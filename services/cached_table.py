@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from sqlalchemy.orm import Session
+
+from services.base import BaseService, ModelType, CreateSchemaType, UpdateSchemaType
+from utils.cache import TableCache
+from utils.etag import make_etag
+from utils.invalidation import invalidation_bus
+
+
+class CachedTableService(BaseService[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Сервис небольшой таблицы, список которой читается из кэша TableCache.
+    Создание, изменение и удаление увеличивают версию кэша после commit
+    во всех процессах (через шину инвалидации).
+    """
+
+    def __init__(self, table_cache: TableCache):
+        """
+        Инициализация сервиса.
+
+        Args:
+            table_cache: Кэш таблицы модели
+        """
+        super().__init__(table_cache.model)
+        self.table_cache = table_cache
+
+    def get_page_cached(
+            self,
+            db: Session,
+            *,
+            skip: int = 0,
+            limit: int = 100,
+            query: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Страница записей из кэша таблицы с поиском по подстроке
+
+        Args:
+            db: Сессия базы данных (для загрузки таблицы при промахе)
+            skip: Количество пропускаемых записей
+            limit: Максимальное количество возвращаемых записей
+            query: Поисковый запрос
+
+        Returns:
+            Список записей и общее количество
+        """
+        return self.table_cache.paginate(db, skip=skip, limit=limit, query=query)
+
+    def get_collection_etag(self, db: Session) -> str:
+        """
+        ETag списка по содержимому таблицы в кэше (без обращения к БД при попадании)
+
+        Args:
+            db: Сессия базы данных (для загрузки таблицы при промахе)
+
+        Returns:
+            Значение заголовка ETag
+        """
+        return make_etag(self.table_cache.name, self.table_cache.digest(db))
+
+    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+        db_obj = super().create(db, obj_in=obj_in)
+        invalidation_bus.publish(db, self.table_cache.name, db_obj.id)
+        return db_obj
+
+    def update(
+            self,
+            db: Session,
+            *,
+            db_obj: ModelType,
+            obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        invalidation_bus.publish(db, self.table_cache.name, db_obj.id)
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
+        invalidation_bus.publish(db, self.table_cache.name, id)
+        return super().remove(db, id=id)
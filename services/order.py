@@ -1,6 +1,6 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func
 from datetime import datetime
 
 from models.order import Order, OrderStatus
@@ -8,21 +8,24 @@ from models.order_item import OrderItem
 from models.product import Product
 from models.user import User
 from schemas.order import OrderCreate, OrderUpdate, CartItemAdd, OrderItemUpdate
+from schemas.base import TotalMode
 from services.base import BaseService
+from utils.invalidation import invalidation_bus
+from utils.pagination import Keyset, KeysetPage, aggregate_statement, count_total
+from utils.statements import CART_BY_USER
 
 
 class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
     def __init__(self):
         super().__init__(Order)
+        # Новые заказы первыми; id - для однозначного порядка при равных created_at
+        self.keyset = Keyset(Order.created_at, Order.id, descending=True)
     
     def get_cart(self, db: Session, user_id: int) -> Optional[Order]:
         """
         Получение текущей корзины пользователя или создание новой, если корзины нет
         """
-        cart = db.query(Order).filter(
-            Order.user_id == user_id,
-            Order.status == OrderStatus.CART.value
-        ).first()
+        cart = db.scalars(CART_BY_USER, {"user_id": user_id}).first()
         
         if not cart:
             cart = Order(
@@ -31,20 +34,21 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
                 total_amount=0.0
             )
             db.add(cart)
-            db.commit()
-            db.refresh(cart)
+            self._persist(db, cart)
         
         return cart
     
     def get_cart_with_items(self, db: Session, user_id: int) -> Optional[Order]:
-        # Получаем корзину
-        cart = self.get_cart(db, user_id)
-        
-        # Загружаем элементы корзины
-        db.refresh(cart)
+        # Загружаем корзину вместе с элементами одним запросом
         cart = db.query(Order).options(
             joinedload(Order.items)
-        ).filter(Order.id == cart.id).first()
+        ).filter(
+            Order.user_id == user_id,
+            Order.status == OrderStatus.CART.value
+        ).first()
+        
+        if not cart:
+            cart = self.get_cart(db, user_id)
         
         return cart
     
@@ -89,8 +93,7 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         
         self.recalculate_cart_total(db, cart)
         
-        db.commit()
-        db.refresh(item)
+        self._persist(db, item)
         
         return item
     
@@ -128,8 +131,7 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         # Обновляем общую сумму корзины
         self.recalculate_cart_total(db, cart)
         
-        db.commit()
-        db.refresh(item)
+        self._persist(db, item)
         
         return item
     
@@ -157,7 +159,7 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         # Обновляем общую сумму корзины
         self.recalculate_cart_total(db, cart)
         
-        db.commit()
+        self._persist(db)
         
         return True
     
@@ -172,7 +174,7 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         cart.total_amount = 0.0
         db.add(cart)
         
-        db.commit()
+        self._persist(db)
         
         return True
     
@@ -203,17 +205,20 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         cart.phone_number = order_data.phone_number
         cart.notes = order_data.notes
         
-        # Обновляем количество товаров на складе
+        # Обновляем количество товаров на складе и продажи (сортировка по популярности)
         for item in cart.items:
             if item.product_id:
                 product = db.query(Product).filter(Product.id == item.product_id).first()
                 if product:
                     product.stock -= item.quantity
+                    product.sales_count += item.quantity
                     db.add(product)
         
+        # Остатки входят в кэшированные карточки товаров
+        invalidation_bus.publish(db, "product", *{item.product_id for item in cart.items if item.product_id})
+        
         db.add(cart)
-        db.commit()
-        db.refresh(cart)
+        self._persist(db, cart)
         
         return cart
     
@@ -227,6 +232,42 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         status: Optional[str] = None
     ) -> List[Order]:
         
+        query = self._user_orders_query(db, user_id, include_cart, status)
+        
+        return query.order_by(*self.keyset.order_by()).offset(skip).limit(limit).all()
+    
+    def get_user_orders_page(
+        self,
+        db: Session,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        include_cart: bool = False,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = False
+    ) -> KeysetPage:
+        """
+        Страница заказов пользователя по курсору (keyset) или по смещению;
+        with_total - total и last_modified в том же запросе (count(*) OVER ())
+        """
+        query = self._user_orders_query(db, user_id, include_cart, status)
+        
+        return self.keyset.paginate(
+            query,
+            limit=limit,
+            cursor=cursor,
+            offset=skip,
+            aggregates=self.page_aggregates() if with_total else None
+        )
+    
+    def _user_orders_query(
+        self,
+        db: Session,
+        user_id: int,
+        include_cart: bool = False,
+        status: Optional[str] = None
+    ):
         query = db.query(Order).filter(Order.user_id == user_id)
         
         if not include_cart:
@@ -235,7 +276,7 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         if status:
             query = query.filter(Order.status == status)
         
-        return query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+        return query
     
     
     def get_user_orders_count(
@@ -248,15 +289,22 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         """
         Получение количества заказов пользователя
         """
-        query = db.query(Order).filter(Order.user_id == user_id)
-        
-        if not include_cart:
-            query = query.filter(Order.status != OrderStatus.CART.value)
-        
-        if status:
-            query = query.filter(Order.status == status)
+        return self.get_user_orders_total(db, user_id, include_cart, status)[0]
+    
+    def get_user_orders_total(
+        self,
+        db: Session,
+        user_id: int,
+        include_cart: bool = False,
+        status: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
+    ) -> Tuple[Optional[int], TotalMode]:
+        """
+        Количество заказов пользователя в заданном режиме подсчета (exact, estimated, none)
+        """
+        query = self._user_orders_query(db, user_id, include_cart, status)
         
-        return query.count()
+        return count_total(db, aggregate_statement(query, func.count()), total_mode)
     
     def get_order_with_items(self, db: Session, order_id: int, user_id: Optional[int] = None) -> Optional[Order]:
         """
@@ -295,20 +343,25 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         # Получаем элементы заказа
         items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
         
-        # Возвращаем товары на склад
+        # Возвращаем товары на склад; отмененный заказ не входит в продажи,
+        # корзина в них и не входила
+        counted = order.status != OrderStatus.CART.value
         for item in items:
             if item.product_id is not None:
                 product = db.query(Product).filter(Product.id == item.product_id).first()
                 if product:
                     product.stock += item.quantity
+                    if counted:
+                        product.sales_count -= item.quantity
                     db.add(product)
         
+        invalidation_bus.publish(db, "product", *{item.product_id for item in items if item.product_id})
+        
         # Меняем статус заказа
         order.status = OrderStatus.CANCELED.value
         db.add(order)
         
-        db.commit()
-        db.refresh(order)
+        self._persist(db, order)
         
         return order
     
@@ -316,6 +369,9 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         """
         Пересчет общей суммы корзины
         """
+        # Сбрасываем изменения, чтобы новые и удаленные элементы попали в выборку
+        db.flush()
+        
         # Загружаем все элементы корзины
         items = db.query(OrderItem).filter(OrderItem.order_id == cart.id).all()
         
@@ -337,6 +393,40 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         """
         Получение списка заказов для администратора
         """
+        query = self._admin_orders_query(db, status, user_id)
+        
+        return query.order_by(*self.keyset.order_by()).offset(skip).limit(limit).all()
+    
+    def get_admin_orders_page(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        user_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = False
+    ) -> KeysetPage:
+        """
+        Страница заказов для администратора по курсору (keyset) или по смещению;
+        with_total - total и last_modified в том же запросе (count(*) OVER ())
+        """
+        query = self._admin_orders_query(db, status, user_id)
+        
+        return self.keyset.paginate(
+            query,
+            limit=limit,
+            cursor=cursor,
+            offset=skip,
+            aggregates=self.page_aggregates() if with_total else None
+        )
+    
+    def _admin_orders_query(
+        self,
+        db: Session,
+        status: Optional[str] = None,
+        user_id: Optional[int] = None
+    ):
         query = db.query(Order).filter(Order.status != OrderStatus.CART.value)
         
         if status:
@@ -345,7 +435,7 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         if user_id:
             query = query.filter(Order.user_id == user_id)
         
-        return query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+        return query
     
     def get_admin_orders_count(
         self,
@@ -356,15 +446,21 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         """
         Получение количества заказов для администратора
         """
-        query = db.query(Order).filter(Order.status != OrderStatus.CART.value)
-        
-        if status:
-            query = query.filter(Order.status == status)
-        
-        if user_id:
-            query = query.filter(Order.user_id == user_id)
+        return self.get_admin_orders_total(db, status, user_id)[0]
+    
+    def get_admin_orders_total(
+        self,
+        db: Session,
+        status: Optional[str] = None,
+        user_id: Optional[int] = None,
+        total_mode: TotalMode = TotalMode.EXACT
+    ) -> Tuple[Optional[int], TotalMode]:
+        """
+        Количество заказов для администратора в заданном режиме подсчета (exact, estimated, none)
+        """
+        query = self._admin_orders_query(db, status, user_id)
         
-        return query.count()
+        return count_total(db, aggregate_statement(query, func.count()), total_mode)
     
     def change_order_status(
         self,
@@ -398,11 +494,23 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         if new_status == OrderStatus.DELIVERED.value:
             order.completed_at = datetime.utcnow()
         
+        # Продажи товаров учитывают только оформленные и не отмененные заказы
+        not_sold = (OrderStatus.CART.value, OrderStatus.CANCELED.value)
+        if (order.status in not_sold) != (new_status in not_sold):
+            sign = -1 if new_status in not_sold else 1
+            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
+            for item in items:
+                if item.product_id is not None:
+                    product = db.query(Product).filter(Product.id == item.product_id).first()
+                    if product:
+                        product.sales_count += sign * item.quantity
+                        db.add(product)
+            invalidation_bus.publish(db, "product", *{item.product_id for item in items if item.product_id})
+        
         # Обновляем статус заказа
         order.status = new_status
         db.add(order)
         
-        db.commit()
-        db.refresh(order)
+        self._persist(db, order)
         
         return order
\ No newline at end of file
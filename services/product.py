@@ -1,10 +1,47 @@
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Dict, Any, Tuple, Union
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import Float, and_, cast, func, literal_column, or_, select, true, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG
 
+from database import primary_session
 from models.product import Product
-from schemas.product import ProductCreate, ProductUpdate
+from schemas.product import ProductCreate, ProductUpdate, ProductDetail
+from schemas.base import TotalMode
 from services.base import BaseService
+from utils.cache import TaggedCache, TimedCache
+from utils.etag import make_etag
+from utils.invalidation import invalidation_bus
+from utils.pagination import Keyset, KeysetPage, aggregate_statement, count_total
+from utils.search import SearchIndex, fuzzy_filter, normalize_query, substring_filter
+from utils.statements import PRODUCT_BY_SKU, PRODUCT_DETAIL_VERSION
+from config import get_settings
+
+settings = get_settings()
+
+# (ETag, сериализованный ProductDetail) по ID товара с тегами product:{id}, category:{id}, brand:{id}.
+# Тема "product" публикуется при изменении товара, его изображений и остатков,
+# темы "categories" и "brands" - при изменении категорий и брендов (CachedTableService)
+product_detail_cache = TaggedCache(maxsize=settings.PRODUCT_CACHE_SIZE, ttl=settings.PRODUCT_CACHE_TTL)
+invalidation_bus.subscribe("product", lambda key: product_detail_cache.invalidate_tag(f"product:{key}"))
+invalidation_bus.subscribe("categories", lambda key: product_detail_cache.invalidate_tag(f"category:{key}"))
+invalidation_bus.subscribe("brands", lambda key: product_detail_cache.invalidate_tag(f"brand:{key}"))
+
+# Результаты поиска по нормализованному запросу и фильтрам: ID товаров страницы,
+# курсоры и total. Ключ содержит поколение каталога, которое увеличивается при
+# изменении товара (тема "product", включая остатки и продажи), категории или бренда
+# (удаление снимает их с товаров): прежние записи перестают находиться
+search_result_cache = TimedCache(maxsize=settings.SEARCH_CACHE_SIZE, ttl=settings.SEARCH_CACHE_TTL)
+if settings.SEARCH_CACHE_ENABLED:
+    for topic in ("product", "categories", "brands"):
+        invalidation_bus.subscribe(topic, lambda key: search_result_cache.bump())
+
+# Инвертированный индекс для SEARCH_BACKEND=memory; строки товаров, измененные через
+# ProductService (тема "product"), перечитываются перед следующим поиском
+product_search_index = SearchIndex("products", Product, {"name": 3, "sku": 2, "description": 1})
+if settings.SEARCH_BACKEND == "memory":
+    invalidation_bus.subscribe("product", product_search_index.mark_stale)
 
 
 class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
@@ -14,6 +51,19 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
 
     def __init__(self):
         super().__init__(Product)
+        # Сортировки списка (ProductSort) и индексы (столбец, id) под них
+        self.sort_columns.update({
+            "price": Product.price,  # ix_products_price_id
+            "created_at": Product.created_at,  # ix_products_created_at_id
+            "name": Product.name,  # ix_products_name_id
+            "popularity": Product.sales_count,  # ix_products_sales_count_id
+        })
+        # Диапазон цены (ix_products_price_id) и наличие (ix_products_out_of_stock для in_stock=false)
+        self.filter_builders.update({
+            "price_min": lambda value: Product.price >= value,
+            "price_max": lambda value: Product.price <= value,
+            "in_stock": lambda value: Product.stock > 0 if value else Product.stock <= 0,
+        })
 
     def get_with_relations(self, db: Session, id: int) -> Optional[Product]:
         """
@@ -26,12 +76,133 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
         Returns:
             Объект товара со связанными объектами или None, если не найден
         """
+        # Изображения - отдельным запросом, без декартова произведения строк товара на изображения
         return db.query(Product).options(
             joinedload(Product.category),
             joinedload(Product.brand),
-            joinedload(Product.images)
+            selectinload(Product.images)
         ).filter(Product.id == id).first()
 
+    @staticmethod
+    def _detail_etag(
+            product_updated_at: datetime,
+            category_updated_at: Optional[datetime],
+            brand_updated_at: Optional[datetime],
+            images_count: int,
+            images_updated_at: Optional[datetime]
+    ) -> str:
+        return make_etag(
+            "product", product_updated_at, category_updated_at, brand_updated_at, images_count, images_updated_at
+        )
+
+    def get_detail_etag(self, db: Session, id: int) -> Optional[str]:
+        """
+        ETag карточки товара без загрузки товара и связанных объектов
+
+        Args:
+            db: Сессия базы данных
+            id: Идентификатор товара
+
+        Returns:
+            ETag или None, если товар не найден
+        """
+        cached = product_detail_cache.get(id)
+        if cached is not None:
+            return cached[0]
+
+        version = db.execute(PRODUCT_DETAIL_VERSION, {"id": id}).first()
+        if version is None:
+            return None
+        return self._detail_etag(*version)
+
+    def get_detail(self, db: Session, id: int) -> Optional[Tuple[str, bytes]]:
+        """
+        Сериализованная карточка товара (ProductDetail) из кэша или из БД
+
+        Args:
+            db: Сессия базы данных
+            id: Идентификатор товара
+
+        Returns:
+            ETag и JSON карточки товара или None, если товар не найден
+        """
+        cached = product_detail_cache.get(id)
+        if cached is not None:
+            return cached
+
+        generation = product_detail_cache.generation
+        # Значение для кэша - с основного сервера: реплика может еще не получить
+        # изменение, после которого запись была удалена из кэша
+        product = self.get_with_relations(primary_session(db), id=id)
+        if product is None:
+            return None
+
+        etag = self._detail_etag(
+            product.updated_at,
+            product.category.updated_at if product.category else None,
+            product.brand.updated_at if product.brand else None,
+            len(product.images),
+            max((image.updated_at for image in product.images), default=None)
+        )
+        content = ProductDetail.model_validate(product, from_attributes=True).model_dump_json().encode()
+        tags = [f"product:{id}"]
+        if product.category_id is not None:
+            tags.append(f"category:{product.category_id}")
+        if product.brand_id is not None:
+            tags.append(f"brand:{product.brand_id}")
+        product_detail_cache.set(id, (etag, content), generation, tags=tags)
+        return etag, content
+
+    def create(self, db: Session, *, obj_in: ProductCreate) -> Product:
+        """
+        Создание товара с обновлением поискового индекса
+
+        Args:
+            db: Сессия базы данных
+            obj_in: Данные для создания товара
+
+        Returns:
+            Созданный объект товара
+        """
+        db_obj = super().create(db, obj_in=obj_in)
+        invalidation_bus.publish(db, "product", db_obj.id)
+        return db_obj
+
+    def update(
+            self,
+            db: Session,
+            *,
+            db_obj: Product,
+            obj_in: Union[ProductUpdate, Dict[str, Any]]
+    ) -> Product:
+        """
+        Обновление товара с инвалидацией кэша карточки
+
+        Args:
+            db: Сессия базы данных
+            db_obj: Объект товара для обновления
+            obj_in: Данные для обновления товара
+
+        Returns:
+            Обновленный объект товара
+        """
+        invalidation_bus.publish(db, "product", db_obj.id)
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    def remove(self, db: Session, *, id: int) -> Optional[Product]:
+        """
+        Удаление товара с инвалидацией кэша карточки
+
+        Args:
+            db: Сессия базы данных
+            id: Идентификатор товара
+
+        Returns:
+            Удаленный объект товара или None, если товар не найден
+        """
+        invalidation_bus.publish(db, "product", id)
+        return super().remove(db, id=id)
+
     def get_by_sku(self, db: Session, sku: str) -> Optional[Product]:
         """
         Получение товара по артикулу (SKU)
@@ -43,7 +214,7 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
         Returns:
             Объект товара или None, если не найден
         """
-        return db.query(Product).filter(Product.sku == sku).first()
+        return db.scalars(PRODUCT_BY_SKU, {"sku": sku}).first()
 
     def get_multi_with_relations(
             self,
@@ -71,13 +242,65 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
             joinedload(Product.images)
         )
 
-        if filters:
-            for field, value in filters.items():
-                if hasattr(Product, field) and value is not None:
-                    query = query.filter(getattr(Product, field) == value)
+        conditions = self._filter_conditions(filters)
+        if conditions:
+            query = query.filter(*conditions)
 
         return query.offset(skip).limit(limit).all()
 
+    @staticmethod
+    def _search_tsquery(query: str):
+        # Запрос в синтаксисе веб-поиска ("фраза", -исключение, or); simple - для артикулов
+        return func.websearch_to_tsquery(cast("russian", REGCONFIG), query).op("||")(
+            func.websearch_to_tsquery(cast("simple", REGCONFIG), query)
+        )
+
+    def _search_criteria(self, db: Session, query: str, fuzzy: bool = False) -> Tuple[Any, Any]:
+        # Условие поиска и выражение релевантности
+        if fuzzy:
+            # Нечеткий поиск с учетом опечаток по названию и артикулу (триграммные индексы)
+            return fuzzy_filter(db, [Product.name, Product.sku], query)
+
+        if settings.SEARCH_BACKEND == "memory" and product_search_index.ready:
+            # Ранжирование BM25 в памяти процесса, строки загружаются по ID
+            return product_search_index.ranked_filter(db, query)
+
+        tsquery = self._search_tsquery(query)
+        # Полнотекстовый поиск по search_vector (GIN-индекс ix_products_search_vector)
+        # или часть артикула (триграммный индекс ix_products_sku_trgm)
+        condition = or_(Product.search_vector.bool_op("@@")(tsquery), substring_filter([Product.sku], query))
+        # ts_rank возвращает real; приведение к double precision сохраняет значение
+        # в курсоре без потери точности при сравнении
+        return condition, cast(func.ts_rank(Product.search_vector, tsquery), Float)
+
+    def _search_filters(
+            self,
+            db: Session,
+            query: str,
+            category_id: Optional[int] = None,
+            brand_id: Optional[int] = None,
+            is_active: Optional[bool] = None,
+            fuzzy: bool = False,
+            filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Any], Any]:
+        condition, rank = self._search_criteria(db, query, fuzzy)
+        conditions = [condition]
+
+        if category_id is not None:
+            conditions.append(Product.category_id == category_id)
+
+        if brand_id is not None:
+            conditions.append(Product.brand_id == brand_id)
+
+        # Добавляем фильтр по активности, если он указан
+        if is_active is not None:
+            conditions.append(Product.is_active == is_active)
+
+        # Цена и наличие (filter_builders)
+        conditions.extend(self._filter_conditions(filters))
+
+        return conditions, rank
+
     def search(
         self,
         db: Session,
@@ -88,13 +311,17 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
         is_active: Optional[bool] = None,  # Добавляем параметр is_active
         skip: int = 0,
         limit: int = 100,
-        with_relations: bool = False
+        with_relations: bool = False,
+        fuzzy: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        descending: bool = False
     ) -> List[Product]:
         """
-        Поиск товаров по названию, описанию или SKU с возможностью фильтрации по активности
+        Полнотекстовый поиск товаров по названию, артикулу и описанию (или нечеткий
+        поиск по названию и артикулу) с возможностью фильтрации по активности, цене
+        и наличию; результаты упорядочены по релевантности или по полю sort
         """
-        search_term = f"%{query}%"
-
         base_query = db.query(Product)
 
         if with_relations:
@@ -104,56 +331,255 @@ class ProductService(BaseService[Product, ProductCreate, ProductUpdate]):
                 joinedload(Product.images)
             )
 
-        filters = [
-            or_(
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term),
-                Product.sku.ilike(search_term)
+        conditions, rank = self._search_filters(db, query, category_id, brand_id, is_active, fuzzy, filters)
+        order_by = self.get_keyset(sort, descending).order_by() if sort else [rank.desc(), Product.id.desc()]
+
+        return base_query.filter(*conditions).order_by(*order_by).offset(skip).limit(limit).all()
+
+    def search_page(
+            self,
+            db: Session,
+            *,
+            query: str,
+            category_id: Optional[int] = None,
+            brand_id: Optional[int] = None,
+            is_active: Optional[bool] = None,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            with_total: bool = False,
+            fuzzy: bool = False,
+            filters: Optional[Dict[str, Any]] = None,
+            sort: Optional[str] = None,
+            descending: bool = False
+    ) -> KeysetPage:
+        """
+        Страница результатов поиска по релевантности (ts_rank или похожесть при fuzzy)
+        или по полю sort, по курсору (keyset) или по смещению; with_total - total
+        и last_modified в том же запросе (count(*) OVER ()). Результаты кэшируются
+        по нормализованному запросу до изменения каталога (search_result_cache)
+        """
+        query = normalize_query(query)
+
+        def search(session: Session) -> KeysetPage:
+            conditions, rank = self._search_filters(session, query, category_id, brand_id, is_active, fuzzy, filters)
+            if sort:
+                keyset = self.get_keyset(sort, descending)
+            else:
+                # Сначала более релевантные, при равной релевантности - более новые
+                keyset = Keyset(rank.label("similarity" if fuzzy else "rank"), Product.id, descending=True)
+
+            return keyset.paginate(
+                session.query(Product).filter(*conditions),
+                limit=limit,
+                cursor=cursor,
+                offset=skip,
+                aggregates=self.page_aggregates() if with_total else None
+            )
+
+        # В кэше - ID товаров; строки загружаются одним запросом по ID
+        return self._cached_search(
+            db,
+            ("page", query, fuzzy, self._search_cache_filters(category_id, brand_id, is_active, filters),
+             sort, descending, skip, limit, cursor, with_total),
+            search,
+            dump=lambda page: ([item.id for item in page.items], page.next_cursor, page.prev_cursor, page.aggregates),
+            load=lambda value: KeysetPage(
+                self._get_ordered(db, value[0]), next_cursor=value[1], prev_cursor=value[2], aggregates=value[3]
             )
-        ]
+        )
 
-        if category_id is not None:
-            filters.append(Product.category_id == category_id)
+    @staticmethod
+    def _search_cache_filters(
+            category_id: Optional[int],
+            brand_id: Optional[int],
+            is_active: Optional[bool],
+            filters: Optional[Dict[str, Any]]
+    ) -> Tuple[Tuple[str, Any], ...]:
+        # Заданные фильтры в порядке имен: порядок параметров запроса не влияет на ключ
+        values = {"category_id": category_id, "brand_id": brand_id, "is_active": is_active, **(filters or {})}
+        return tuple(sorted((field, value) for field, value in values.items() if value is not None))
 
-        if brand_id is not None:
-            filters.append(Product.brand_id == brand_id)
-            
-        # Добавляем фильтр по активности, если он указан
-        if is_active is not None:
-            filters.append(Product.is_active == is_active)
+    @staticmethod
+    def _cached_search(
+            db: Session,
+            key: Tuple[Any, ...],
+            search: Callable[[Session], Any],
+            dump: Callable[[Any], Any] = lambda result: result,
+            load: Callable[[Any], Any] = lambda value: value
+    ) -> Any:
+        # Результат поиска из search_result_cache или вычисленный search(session);
+        # при попадании учитывается сэкономленное время (stats()["saved_ms"])
+        if not settings.SEARCH_CACHE_ENABLED:
+            return search(db)
+
+        generation = search_result_cache.generation
+        started = time.perf_counter()
+        cached = search_result_cache.get((generation, *key))
+        if cached is not None:
+            value, cost = cached
+            result = load(value)
+            search_result_cache.record_saved(cost - (time.perf_counter() - started))
+            return result
+
+        # Результат для кэша - с основного сервера: реплика может еще не получить
+        # изменение каталога, увеличившее поколение
+        result = search(primary_session(db))
+        search_result_cache.set((generation, *key), (dump(result), time.perf_counter() - started), generation)
+        return result
 
-        return base_query.filter(*filters).offset(skip).limit(limit).all()
+    @staticmethod
+    def _get_ordered(db: Session, ids: List[int]) -> List[Product]:
+        # Товары по списку ID в его порядке
+        if not ids:
+            return []
+        products = {product.id: product for product in db.query(Product).filter(Product.id.in_(ids))}
+        return [products[id] for id in ids if id in products]
 
-    def search_count(
+    def search_total(
             self,
             db: Session,
             *,
             query: str,
             category_id: Optional[int] = None,
             brand_id: Optional[int] = None,
-            is_active: Optional[bool] = None  # Добавляем параметр is_active
-    ) -> int:
+            is_active: Optional[bool] = None,
+            total_mode: TotalMode = TotalMode.EXACT,
+            fuzzy: bool = False,
+            filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[int], TotalMode]:
         """
-        Подсчет количества товаров, соответствующих поисковому запросу
+        Количество найденных товаров в заданном режиме подсчета (exact, estimated, none)
         """
-        search_term = f"%{query}%"
+        search_query = self._search_query(db, query, category_id, brand_id, is_active, fuzzy, filters)
 
-        filters = [
-            or_(
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term),
-                Product.sku.ilike(search_term)
-            )
-        ]
+        return count_total(db, aggregate_statement(search_query, func.count()), total_mode)
 
-        if category_id is not None:
-            filters.append(Product.category_id == category_id)
+    def search_version(
+            self,
+            db: Session,
+            *,
+            query: str,
+            category_id: Optional[int] = None,
+            brand_id: Optional[int] = None,
+            is_active: Optional[bool] = None,
+            fuzzy: bool = False,
+            filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[int, Optional[datetime]]:
+        """
+        Количество найденных товаров и время последнего изменения среди них (для ETag)
+        """
+        query = normalize_query(query)
 
-        if brand_id is not None:
-            filters.append(Product.brand_id == brand_id)
-            
-        # Добавляем фильтр по активности, если он указан
-        if is_active is not None:
-            filters.append(Product.is_active == is_active)
+        def search(session: Session) -> Tuple[int, Optional[datetime]]:
+            search_query = self._search_query(session, query, category_id, brand_id, is_active, fuzzy, filters)
+            count, last_modified = session.execute(
+                aggregate_statement(search_query, *self.page_aggregates().values())
+            ).one()
+            return count, last_modified
+
+        return self._cached_search(
+            db,
+            ("version", query, fuzzy, self._search_cache_filters(category_id, brand_id, is_active, filters)),
+            search
+        )
+
+    def get_facets(
+            self,
+            db: Session,
+            *,
+            query: Optional[str] = None,
+            category_id: Optional[int] = None,
+            brand_id: Optional[int] = None,
+            is_active: Optional[bool] = None,
+            fuzzy: bool = False,
+            filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], int, Tuple[int, Optional[datetime]]]:
+        """
+        Счетчики фасетов (категории, бренды, ценовые диапазоны, наличие) одним
+        запросом с GROUPING SETS. Фильтры по категории и бренду применяются через
+        count(*) FILTER: счетчики категорий учитывают только фильтр по бренду,
+        счетчики брендов - только фильтр по категории, остальные - оба. Фильтры
+        по цене и наличию (filters) сужают выборку для всех счетчиков.
+
+        Args:
+            db: Сессия базы данных
+            query: Поисковый запрос
+            category_id: Фильтр по категории
+            brand_id: Фильтр по бренду
+            is_active: Фильтр по активности
+            fuzzy: Нечеткий поиск
+            filters: Фильтры price_min, price_max, in_stock
+
+        Returns:
+            Фасеты (ProductFacets), количество товаров с учетом всех фильтров и версия
+            выборки без фильтров по категории и бренду - количество и max(updated_at)
+            (для ETag: выборка включает все товары, влияющие на счетчики)
+        """
+        if query:
+            conditions, _ = self._search_filters(db, query, None, None, is_active, fuzzy, filters)
+        else:
+            conditions = self._filter_conditions({**(filters or {}), "is_active": is_active})
+
+        category_match = Product.category_id == category_id if category_id is not None else true()
+        brand_match = Product.brand_id == brand_id if brand_id is not None else true()
+
+        # Номер диапазона: 0 - ниже первой границы, len(boundaries) - не ниже последней.
+        # Границы - числа из настроек, подставляются литералом: выражение в SELECT и
+        # GROUP BY должно совпадать текстуально
+        boundaries = settings.facet_price_boundaries_list
+        bucket = func.width_bucket(
+            Product.price, literal_column(f"ARRAY[{', '.join(repr(value) for value in boundaries)}]::float8[]")
+        ) if boundaries else literal_column("0")
+        in_stock = Product.stock > 0
+        columns = [Product.category_id, Product.brand_id, bucket, in_stock]
 
-        return db.query(Product).filter(*filters).count()
\ No newline at end of file
+        statement = select(
+            func.grouping(*columns).label("grouping"),
+            *columns,
+            func.count().filter(brand_match).label("category_count"),
+            func.count().filter(category_match).label("brand_count"),
+            func.count().filter(and_(category_match, brand_match)).label("count"),
+            func.count().label("base_count"),
+            func.max(Product.updated_at).label("last_modified")
+        ).where(*conditions).group_by(func.grouping_sets(*columns, tuple_()))
+
+        facets: Dict[str, Any] = {
+            "categories": [], "brands": [], "price": [], "stock": {"in_stock": 0, "out_of_stock": 0}
+        }
+        total, version = 0, (0, None)
+        # Бит 1 в grouping - столбец не входит в набор группировки
+        for row in db.execute(statement):
+            category, brand, price_bucket, available = row[1:5]
+            if row.grouping == 0b0111 and row.category_count:
+                facets["categories"].append({"id": category, "count": row.category_count})
+            elif row.grouping == 0b1011 and row.brand_count:
+                facets["brands"].append({"id": brand, "count": row.brand_count})
+            elif row.grouping == 0b1101 and row.count:
+                facets["price"].append({
+                    "min": boundaries[price_bucket - 1] if price_bucket > 0 else None,
+                    "max": boundaries[price_bucket] if price_bucket < len(boundaries) else None,
+                    "count": row.count
+                })
+            elif row.grouping == 0b1110 and row.count:
+                facets["stock"]["in_stock" if available else "out_of_stock"] = row.count
+            elif row.grouping == 0b1111:
+                total, version = row.count, (row.base_count, row.last_modified)
+
+        facets["categories"].sort(key=lambda item: -item["count"])
+        facets["brands"].sort(key=lambda item: -item["count"])
+        facets["price"].sort(key=lambda item: item["min"] if item["min"] is not None else float("-inf"))
+        return facets, total, version
+
+    def _search_query(
+            self,
+            db: Session,
+            query: str,
+            category_id: Optional[int] = None,
+            brand_id: Optional[int] = None,
+            is_active: Optional[bool] = None,
+            fuzzy: bool = False,
+            filters: Optional[Dict[str, Any]] = None
+    ):
+        conditions, rank = self._search_filters(db, query, category_id, brand_id, is_active, fuzzy, filters)
+        return db.query(Product).filter(*conditions)
@@ -1,9 +1,10 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from sqlalchemy.orm import Session
 
 from models.product_image import ProductImage
 from schemas.product_image import ProductImageCreate, ProductImageUpdate
 from services.base import BaseService
+from utils.invalidation import invalidation_bus
 
 
 class ProductImageService(BaseService[ProductImage, ProductImageCreate, ProductImageUpdate]):
@@ -54,7 +55,70 @@ class ProductImageService(BaseService[ProductImage, ProductImageCreate, ProductI
         if image:
             image.is_primary = True
             db.add(image)
-            db.commit()
-            db.refresh(image)
+            invalidation_bus.publish(db, "product", product_id)
+            self._persist(db, image)
 
+        return image
+
+    def create(
+            self,
+            db: Session,
+            *,
+            obj_in: Union[ProductImageCreate, Dict[str, Any]]
+    ) -> ProductImage:
+        """
+        Создание изображения с инвалидацией кэша карточки товара
+
+        Args:
+            db: Сессия базы данных
+            obj_in: Данные для создания изображения
+
+        Returns:
+            Созданный объект изображения
+        """
+        product_id = obj_in["product_id"] if isinstance(obj_in, dict) else obj_in.product_id
+        invalidation_bus.publish(db, "product", product_id)
+        return super().create(db, obj_in=obj_in)
+
+    def update(
+            self,
+            db: Session,
+            *,
+            db_obj: ProductImage,
+            obj_in: Union[ProductImageUpdate, Dict[str, Any]]
+    ) -> ProductImage:
+        """
+        Обновление изображения с инвалидацией карточек прежнего и нового товара
+
+        Args:
+            db: Сессия базы данных
+            db_obj: Объект изображения для обновления
+            obj_in: Данные для обновления изображения
+
+        Returns:
+            Обновленный объект изображения
+        """
+        product_ids = {db_obj.product_id}
+        new_product_id = obj_in.get("product_id") if isinstance(obj_in, dict) else getattr(obj_in, "product_id", None)
+        if new_product_id is not None:
+            product_ids.add(new_product_id)
+        invalidation_bus.publish(db, "product", *product_ids)
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    def remove(self, db: Session, *, id: int) -> Optional[ProductImage]:
+        """
+        Удаление изображения с инвалидацией кэша карточки товара
+
+        Args:
+            db: Сессия базы данных
+            id: Идентификатор изображения
+
+        Returns:
+            Удаленный объект изображения или None, если изображение не найдено
+        """
+        image = self.get(db, id)
+        if image:
+            invalidation_bus.publish(db, "product", image.product_id)
+            db.delete(image)
+            self._persist(db)
         return image
\ No newline at end of file
@@ -1,9 +1,10 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from sqlalchemy.orm import Session
 
 from models.role import Role
 from schemas.role import RoleCreate, RoleUpdate
 from services.base import BaseService
+from utils.invalidation import invalidation_bus
 
 
 class RoleService(BaseService[Role, RoleCreate, RoleUpdate]):
@@ -25,4 +26,54 @@ class RoleService(BaseService[Role, RoleCreate, RoleUpdate]):
         Returns:
             Объект роли или None, если не найден
         """
-        return db.query(Role).filter(Role.name == name).first()
\ No newline at end of file
+        return db.query(Role).filter(Role.name == name).first()
+
+    def create(self, db: Session, *, obj_in: RoleCreate) -> Role:
+        """
+        Создание роли с инвалидацией снимка прав ролей
+
+        Args:
+            db: Сессия базы данных
+            obj_in: Данные для создания роли
+
+        Returns:
+            Созданный объект роли
+        """
+        role = super().create(db, obj_in=obj_in)
+        invalidation_bus.publish(db, "role", role.id)
+        return role
+
+    def update(
+            self,
+            db: Session,
+            *,
+            db_obj: Role,
+            obj_in: Union[RoleUpdate, Dict[str, Any]]
+    ) -> Role:
+        """
+        Обновление роли с инвалидацией кэшей, содержащих права роли
+
+        Args:
+            db: Сессия базы данных
+            db_obj: Объект роли для обновления
+            obj_in: Данные для обновления роли
+
+        Returns:
+            Обновленный объект роли
+        """
+        invalidation_bus.publish(db, "role", db_obj.id)
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    def remove(self, db: Session, *, id: int) -> Optional[Role]:
+        """
+        Удаление роли по ID с инвалидацией кэшей, содержащих права роли
+
+        Args:
+            db: Сессия базы данных
+            id: Идентификатор роли
+
+        Returns:
+            Удаленный объект роли или None, если роль не найдена
+        """
+        invalidation_bus.publish(db, "role", id)
+        return super().remove(db, id=id)
\ No newline at end of file
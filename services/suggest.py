@@ -0,0 +1,215 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.brand import Brand
+from models.category import Category
+from models.product import Product
+from utils.invalidation import invalidation_bus
+from utils.prefix_index import PrefixIndex, normalize, word_suffixes
+from config import get_settings
+from database import primary_session
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SUGGEST_KINDS = ("product", "brand", "category")
+
+
+class CatalogSuggestions:
+    """
+    Префиксный индекс каталога и ID строк, измененных после его построения
+    """
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self.ready = False
+        # Товар -> (brand_id, category_id) на момент индексации: при переносе товара
+        # в другой бренд или категорию пересчитывается популярность и прежних
+        self.product_groups: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+        self._stale: Dict[str, Set[int]] = {kind: set() for kind in SUGGEST_KINDS}
+        self._stale_lock = threading.Lock()
+
+    def mark_stale(self, kind: str) -> Callable[[str], None]:
+        """
+        Обработчик шины инвалидации, помечающий строку вида kind измененной
+        """
+        def handler(key: str) -> None:
+            with self._stale_lock:
+                self._stale[kind].add(int(key))
+        return handler
+
+    def take_stale(self) -> Dict[str, Set[int]]:
+        with self._stale_lock:
+            stale, self._stale = self._stale, {kind: set() for kind in SUGGEST_KINDS}
+        return stale
+
+    def restore_stale(self, stale: Dict[str, Set[int]]) -> None:
+        with self._stale_lock:
+            for kind, keys in stale.items():
+                self._stale[kind] |= keys
+
+
+# Товары перечитываются после изменения через ProductService и после оформления
+# или отмены заказа (популярность), бренды и категории - после их изменения
+catalog_suggestions = CatalogSuggestions()
+if settings.SUGGEST_ENABLED:
+    invalidation_bus.subscribe("product", catalog_suggestions.mark_stale("product"))
+    invalidation_bus.subscribe("brands", catalog_suggestions.mark_stale("brand"))
+    invalidation_bus.subscribe("categories", catalog_suggestions.mark_stale("category"))
+
+
+def _products_statement(ids: Optional[Set[int]] = None):
+    # Популярность товара - продажи по оформленным и не отмененным заказам (sales_count)
+    statement = select(
+        Product.id, Product.name, Product.sku, Product.brand_id, Product.category_id, Product.sales_count
+    ).where(Product.is_active.is_(True))
+    if ids is not None:
+        statement = statement.where(Product.id.in_(ids))
+    return statement
+
+
+def _groups_statement(model, foreign_key, ids: Optional[Set[int]] = None):
+    # Популярность бренда или категории - суммарные продажи их активных товаров
+    statement = select(
+        model.id, model.name, func.coalesce(func.sum(Product.sales_count), 0)
+    ).outerjoin(
+        Product, (foreign_key == model.id) & Product.is_active.is_(True)
+    ).group_by(model.id, model.name)
+    if ids is not None:
+        statement = statement.where(model.id.in_(ids))
+    return statement
+
+
+class SuggestService:
+    """
+    Подсказки строки поиска (автодополнение) по названиям и артикулам товаров,
+    названиям брендов и категорий, по убыванию популярности
+    """
+
+    GROUPS = {"brand": (Brand, Product.brand_id), "category": (Category, Product.category_id)}
+
+    @staticmethod
+    def _product_item(row: Any):
+        id, name, sku, brand_id, category_id, sold = row
+        texts = word_suffixes(normalize(name), settings.SUGGEST_MAX_WORDS) + [normalize(sku)]
+        return "product", id, name, float(sold), texts
+
+    @staticmethod
+    def _group_item(kind: str, row: Any):
+        id, name, sold = row
+        return kind, id, name, float(sold), word_suffixes(normalize(name), settings.SUGGEST_MAX_WORDS)
+
+    def build(self, db: Session) -> None:
+        """
+        Построение индекса подсказок по всему каталогу
+
+        Args:
+            db: Сессия базы данных
+        """
+        items, product_groups = [], {}
+        for row in db.execute(_products_statement().execution_options(yield_per=5000)):
+            items.append(self._product_item(row))
+            product_groups[row.id] = (row.brand_id, row.category_id)
+        for kind, (model, foreign_key) in self.GROUPS.items():
+            items.extend(self._group_item(kind, row) for row in db.execute(_groups_statement(model, foreign_key)))
+
+        catalog_suggestions.index.load(items)
+        catalog_suggestions.product_groups = product_groups
+        catalog_suggestions.ready = True
+        logger.info("Индекс подсказок: %s элементов", len(catalog_suggestions.index))
+
+    def refresh(self, db: Session) -> None:
+        """
+        Перечитывание измененных товаров, брендов и категорий с основного сервера
+        (см. primary_session); товары, ставшие неактивными или удаленные, убираются из подсказок
+
+        Args:
+            db: Сессия базы данных
+        """
+        stale = catalog_suggestions.take_stale()
+        if not any(stale.values()):
+            return
+
+        index = catalog_suggestions.index
+        product_groups = catalog_suggestions.product_groups
+        try:
+            if stale["product"]:
+                # Продажи, перенос и снятие товара меняют популярность его прежних
+                # и новых бренда и категории
+                for id in stale["product"]:
+                    self._mark_groups(stale, product_groups.get(id, (None, None)))
+                rows = db.execute(_products_statement(stale["product"])).all()
+                for row in rows:
+                    index.add(*self._product_item(row))
+                    product_groups[row.id] = (row.brand_id, row.category_id)
+                    self._mark_groups(stale, product_groups[row.id])
+                for id in stale["product"] - {row.id for row in rows}:
+                    index.remove("product", id)
+                    product_groups.pop(id, None)
+
+            for kind, (model, foreign_key) in self.GROUPS.items():
+                if not stale[kind]:
+                    continue
+                rows = db.execute(_groups_statement(model, foreign_key, stale[kind])).all()
+                for row in rows:
+                    index.add(*self._group_item(kind, row))
+                for id in stale[kind] - {row.id for row in rows}:
+                    index.remove(kind, id)
+        except Exception:
+            catalog_suggestions.restore_stale(stale)
+            raise
+
+    @staticmethod
+    def _mark_groups(stale: Dict[str, Set[int]], groups: Tuple[Optional[int], Optional[int]]) -> None:
+        brand_id, category_id = groups
+        if brand_id is not None:
+            stale["brand"].add(brand_id)
+        if category_id is not None:
+            stale["category"].add(category_id)
+
+    def suggest(self, db: Session, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Подсказки для введенного префикса
+
+        Args:
+            db: Сессия базы данных
+            query: Введенный текст
+            limit: Максимальное количество подсказок
+
+        Returns:
+            Список подсказок {"text", "kind", "id"}
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        if not catalog_suggestions.ready:
+            # Индекс еще строится: названия товаров по префиксу из БД
+            rows = db.execute(
+                select(Product.id, Product.name)
+                .where(Product.is_active.is_(True), Product.name.istartswith(prefix, autoescape=True))
+                .order_by(Product.name)
+                .limit(limit)
+            ).all()
+            return [{"text": name, "kind": "product", "id": id} for id, name in rows]
+
+        self.refresh(primary_session(db))
+        return [
+            {"text": label, "kind": kind, "id": id}
+            for kind, id, label in catalog_suggestions.index.complete(prefix, limit)
+        ]
+
+
+def build_suggestions(session_factory: Callable[[], Session]) -> None:
+    """
+    Построение индекса подсказок (при запуске приложения, в фоновом потоке)
+    """
+    try:
+        with session_factory() as db:
+            SuggestService().build(db)
+    except Exception:
+        logger.exception("Не удалось построить индекс подсказок")
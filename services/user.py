@@ -6,6 +6,8 @@ from models.user import User
 from schemas.user import UserCreate, UserUpdate
 from services.base import BaseService
 from utils.auth import get_password_hash, verify_password
+from utils.invalidation import invalidation_bus
+from utils.statements import USER_BY_USERNAME
 
 
 class UserService(BaseService[User, UserCreate, UserUpdate]):
@@ -40,7 +42,7 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
         Returns:
             Объект пользователя или None, если не найден
         """
-        return db.query(User).filter(User.username == username).first()
+        return db.scalars(USER_BY_USERNAME, {"username": username}).first()
 
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
         """
@@ -62,8 +64,7 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
         )
 
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        self._persist(db, db_obj)
 
         return db_obj
 
@@ -88,8 +89,29 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
 
+        # Кэш аутентифицированных пользователей хранит снимок по прежнему username
+        invalidation_bus.publish(db, "user", db_obj.username)
+
         return super().update(db, db_obj=db_obj, obj_in=update_data)
 
+    def remove(self, db: Session, *, id: int) -> Optional[User]:
+        """
+        Удаление пользователя по ID
+
+        Args:
+            db: Сессия базы данных
+            id: Идентификатор пользователя
+
+        Returns:
+            Удаленный объект пользователя или None, если пользователь не найден
+        """
+        user = self.get(db, id)
+        if user:
+            invalidation_bus.publish(db, "user", user.username)
+            db.delete(user)
+            self._persist(db)
+        return user
+
     def authenticate(self, db: Session, *, username: str, password: str) -> Optional[User]:
         """
         Аутентификация пользователя по имени пользователя и паролю
@@ -124,7 +146,7 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
         """
         user.last_login = datetime.utcnow()
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        invalidation_bus.publish(db, "user", user.username)
+        self._persist(db, user)
 
         return user
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+TableCache с RedisBackend на локальном сервере fakeredis: пагинация, поиск,
+новая версия после bump и ее видимость в другом процессе.
+
+Запуск из корня проекта:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+from models.category import Category
+from utils.cache import RedisBackend, TableCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Category.__table__])
+    with Session(engine) as session:
+        session.add_all([
+            Category(name="Смартфоны", description="Телефоны и аксессуары"),
+            Category(name="Ноутбуки", description=None),
+            Category(name="Планшеты", description="Планшеты для работы"),
+        ])
+        session.commit()
+        yield session
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def table_cache(server) -> TableCache:
+    # Отдельный клиент на каждый кэш - как у разных процессов приложения
+    backend = RedisBackend(fakeredis.FakeRedis(server=server), prefix="test:")
+    return TableCache("categories", Category, search_fields=["name", "description"], backend=backend, ttl=60)
+
+
+def names(rows):
+    return [row["name"] for row in rows]
+
+
+def server_keys(server):
+    return {key.decode() for key in fakeredis.FakeRedis(server=server).keys("*")}
+
+
+def test_paginate(db, server):
+    cache = table_cache(server)
+
+    rows, total = cache.paginate(db, skip=1, limit=1)
+    assert names(rows) == ["Ноутбуки"]
+    assert total == 3
+
+    rows, total = cache.paginate(db, query="ПЛАНШ")
+    assert names(rows) == ["Планшеты"]
+    assert total == 1
+
+    rows, total = cache.paginate(db, query="телефон")
+    assert names(rows) == ["Смартфоны"]
+    assert total == 1
+
+
+def test_rows_are_served_from_redis(db, server):
+    cache = table_cache(server)
+    cache.rows(db)
+
+    # Другой процесс с пустой памятью читает строки из Redis, а не из БД
+    other = table_cache(server)
+    db.query(Category).delete()
+    db.commit()
+    assert names(other.rows(db)) == ["Смартфоны", "Ноутбуки", "Планшеты"]
+
+
+def test_bump_reloads_rows(db, server):
+    cache = table_cache(server)
+    digest = cache.digest(db)
+
+    db.add(Category(name="Часы"))
+    db.commit()
+    assert len(cache.rows(db)) == 3
+
+    cache.bump()
+    assert names(cache.rows(db))[-1] == "Часы"
+    assert cache.digest(db) != digest
+    # Строки прежней версии удалены из хранилища
+    assert server_keys(server) == {"test:table:categories:version", "test:table:categories:rows:1"}
+
+
+def test_version_change_in_other_process(db, server):
+    origin, other = table_cache(server), table_cache(server)
+    assert len(other.rows(db)) == 3
+
+    db.query(Category).filter(Category.name == "Ноутбуки").delete()
+    db.commit()
+    # Процесс, зафиксировавший изменение, увеличивает общую версию один раз;
+    # остальные процессы получают событие через NOTIFY и только сбрасывают строки в памяти
+    origin.bump()
+    other.bump_remote()
+
+    assert int(other.backend.get(other.version_key)) == 1
+    assert names(other.rows(db)) == ["Смартфоны", "Планшеты"]
+    assert origin.digest(db) == other.digest(db)
@@ -5,11 +5,14 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from database import get_db
-from models.user import User
+from database import get_db, get_async_db
 from schemas.user import TokenData
+from utils.permissions import RolePermissions, role_permissions
+from utils.statements import USER_BY_USERNAME
+from utils.user_cache import CachedUser, user_cache
 from config import get_settings
 
 settings = get_settings()
@@ -81,10 +84,50 @@ def decode_token(token: str) -> TokenData:
 
 def get_current_user(
         db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+) -> CachedUser:
+    # Снимок пользователя берется из кэша; при промахе - один запрос по username
+    token_data = decode_token(token)
+    user = user_cache.get(token_data.sub) if settings.USER_CACHE_ENABLED else None
+
+    if user is None:
+        generation = user_cache.generation
+        db_user = db.scalars(USER_BY_USERNAME, {"username": token_data.sub}).first()
+        if db_user is not None:
+            user = CachedUser.from_model(db_user)
+            if settings.USER_CACHE_ENABLED:
+                user_cache.set(token_data.sub, user, generation)
+
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user",
+        )
 
+    # Если снимок прав сброшен после изменения ролей, он перечитывается в сессии запроса
+    role_permissions.get(user.role_id, db)
+
+    return user
+
+
+async def get_current_user_async(
+        db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> CachedUser:
     token_data = decode_token(token)
-    user = db.query(User).filter(User.username == token_data.sub).first()
+    user = user_cache.get(token_data.sub) if settings.USER_CACHE_ENABLED else None
+
+    if user is None:
+        generation = user_cache.generation
+        db_user = (await db.scalars(USER_BY_USERNAME, {"username": token_data.sub})).first()
+        if db_user is not None:
+            user = CachedUser.from_model(db_user)
+            if settings.USER_CACHE_ENABLED:
+                user_cache.set(token_data.sub, user, generation)
 
     if user is None:
         raise HTTPException(
@@ -101,9 +144,32 @@ def get_current_user(
     return user
 
 
-def check_admin_access(current_user: User = Depends(get_current_user)) -> User:
+def get_role_permissions(user: CachedUser) -> RolePermissions:
+    """
+    Права роли пользователя из снимка таблицы ролей
+    """
+    permissions = role_permissions.get(user.role_id)
+    if permissions is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
+    return permissions
+
+
+def is_admin(user: CachedUser) -> bool:
+    """
+    Является ли пользователь администратором; пользователь без роли в снимке
+    таблицы ролей (роль удалена) администратором не считается
+    """
+    permissions = user.role
+    return permissions is not None and permissions.is_admin
+
+
+def check_admin_access(current_user: CachedUser = Depends(get_current_user)) -> CachedUser:
 
-    if not current_user.role.is_admin:
+    if not get_role_permissions(current_user).is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
@@ -112,12 +178,13 @@ def check_admin_access(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def check_manager_access(current_user: User = Depends(get_current_user)) -> User:
+def check_manager_access(current_user: CachedUser = Depends(get_current_user)) -> CachedUser:
 
-    if current_user.role.is_admin:
+    permissions = get_role_permissions(current_user)
+    if permissions.is_admin:
         return current_user
 
-    if not (current_user.role.can_create or current_user.role.can_update or current_user.role.can_delete):
+    if not (permissions.can_create or permissions.can_update or permissions.can_delete):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
@@ -126,12 +193,13 @@ def check_manager_access(current_user: User = Depends(get_current_user)) -> User
     return current_user
 
 
-def check_create_access(current_user: User = Depends(get_current_user)) -> User:
+def check_create_access(current_user: CachedUser = Depends(get_current_user)) -> CachedUser:
 
-    if current_user.role.is_admin:
+    permissions = get_role_permissions(current_user)
+    if permissions.is_admin:
         return current_user
 
-    if not current_user.role.can_create:
+    if not permissions.can_create:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to create data",
@@ -140,12 +208,13 @@ def check_create_access(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def check_update_access(current_user: User = Depends(get_current_user)) -> User:
+def check_update_access(current_user: CachedUser = Depends(get_current_user)) -> CachedUser:
 
-    if current_user.role.is_admin:
+    permissions = get_role_permissions(current_user)
+    if permissions.is_admin:
         return current_user
 
-    if not current_user.role.can_update:
+    if not permissions.can_update:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to update data",
@@ -154,12 +223,13 @@ def check_update_access(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def check_delete_access(current_user: User = Depends(get_current_user)) -> User:
+def check_delete_access(current_user: CachedUser = Depends(get_current_user)) -> CachedUser:
 
-    if current_user.role.is_admin:
+    permissions = get_role_permissions(current_user)
+    if permissions.is_admin:
         return current_user
 
-    if not current_user.role.can_delete:
+    if not permissions.can_delete:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to delete data",
@@ -0,0 +1,434 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Type
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import primary_session
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением времени жизни записей
+
+    Каждая инвалидация увеличивает поколение кэша: значение, прочитанное из БД
+    до инвалидации, не попадает в кэш после нее (см. set).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remove(self, key: Hashable) -> None:
+        # Вызывается под блокировкой
+        self._data.pop(key, None)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Запись значения
+
+        Args:
+            key: Ключ
+            value: Значение
+            generation: Поколение кэша на момент чтения значения из источника;
+                если с тех пор была инвалидация, значение не сохраняется
+        """
+        with self._lock:
+            self._set(key, value, generation)
+
+    def _set(self, key: Hashable, value: Any, generation: Optional[int]) -> bool:
+        if generation is not None and generation != self.generation:
+            return False
+
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+        return True
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            for key in list(self._data):
+                self._remove(key)
+
+    def bump(self) -> None:
+        """
+        Новое поколение без удаления записей: для кэшей, в ключ которых входит
+        поколение, - инвалидация всех записей за O(1); старые записи вытесняются
+        по LRU или TTL
+        """
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TaggedCache(TTLCache):
+    """
+    TTL/LRU-кэш с тегами зависимостей: invalidate_tag удаляет все записи,
+    сохраненные с этим тегом (например, все товары бренда)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        super().__init__(maxsize, ttl)
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._key_tags: Dict[Hashable, Tuple[str, ...]] = {}
+
+    def _remove(self, key: Hashable) -> None:
+        super()._remove(key)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def set(
+            self,
+            key: Hashable,
+            value: Any,
+            generation: Optional[int] = None,
+            tags: Iterable[str] = ()
+    ) -> None:
+        with self._lock:
+            self._remove(key)
+            if not self._set(key, value, generation):
+                return
+
+            self._key_tags[key] = tuple(tags)
+            for tag in self._key_tags[key]:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate_tag(self, tag: str) -> None:
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+
+class TimedCache(TTLCache):
+    """
+    TTL/LRU-кэш результатов дорогих запросов с учетом сэкономленного времени:
+    при попадании вызывающий код сообщает разницу между временем вычисления
+    значения и временем обслуживания из кэша (record_saved)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        super().__init__(maxsize, ttl)
+        self.saved = 0.0
+
+    def record_saved(self, seconds: float) -> None:
+        with self._lock:
+            self.saved += max(seconds, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "saved_ms": round(self.saved * 1000, 1)}
+
+
+class CacheBackend:
+    """
+    Хранилище общего кэша: байтовые значения по строковым ключам
+    """
+
+    # Хранилище общее для всех процессов приложения
+    shared = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Кэш в памяти процесса
+
+    Истекшие записи удаляются при чтении и при записи - проходом по всем ключам,
+    когда их число удваивается с предыдущего прохода (амортизированно O(1) на запись)
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._sweep_at = 64
+
+    def _sweep(self) -> None:
+        # Вызывается под блокировкой
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at is not None and expires_at < now]
+        for key in expired:
+            del self._data[key]
+        self._sweep_at = max(64, len(self._data) * 2)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            if len(self._data) >= self._sweep_at:
+                self._sweep()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value, expires_at = self._data.get(key, (0, None))
+            value = int(value) + 1
+            self._data[key] = (value, expires_at)
+            return value
+
+
+class RedisBackend(CacheBackend):
+    """
+    Кэш в Redis (или совместимом сервере); client - клиент с интерфейсом redis.Redis,
+    например fakeredis.FakeRedis для локальной проверки
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = ""):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "") -> "RedisBackend":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Для CACHE_BACKEND=redis нужен пакет redis (pip install redis)")
+
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(self.prefix + key)
+
+
+def create_cache_backend() -> CacheBackend:
+    """
+    Хранилище общего кэша по настройке CACHE_BACKEND ("memory" или "redis")
+    """
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend.from_url(settings.CACHE_REDIS_URL, prefix=settings.CACHE_KEY_PREFIX)
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Неизвестный CACHE_BACKEND: {settings.CACHE_BACKEND}")
+
+
+cache_backend = create_cache_backend()
+
+
+class TableCache:
+    """
+    Сквозной кэш небольшой таблицы целиком под счетчиком версии
+
+    Строки хранятся в хранилище под ключом с номером версии; изменение таблицы
+    увеличивает версию (bump), и следующее чтение загружает таблицу заново.
+    Пагинация и поиск по подстроке выполняются в памяти.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            model: Type,
+            search_fields: List[str],
+            backend: Optional[CacheBackend] = None,
+            ttl: Optional[float] = None
+    ):
+        self.name = name
+        self.model = model
+        self.search_fields = search_fields
+        self.backend = backend or cache_backend
+        self.ttl = ttl if ttl is not None else settings.TABLE_CACHE_TTL
+        self._columns = [attr.key for attr in inspect(model).column_attrs]
+        # Версия, разобранные строки и хэш их JSON последней прочитанной версии
+        self._local: Optional[Tuple[int, List[Dict[str, Any]], str]] = None
+
+    @property
+    def version_key(self) -> str:
+        return f"table:{self.name}:version"
+
+    def _version(self) -> Optional[int]:
+        try:
+            return int(self.backend.get(self.version_key) or 0)
+        except Exception as e:
+            logger.warning("Кэш таблицы %s недоступен: %s", self.name, e)
+            return None
+
+    def _load(self, db: Session) -> List[Dict[str, Any]]:
+        objs = db.scalars(select(self.model).order_by(self.model.id)).all()
+        return jsonable_encoder([{column: getattr(obj, column) for column in self._columns} for obj in objs])
+
+    def rows(self, db: Session) -> List[Dict[str, Any]]:
+        """
+        Все строки таблицы, упорядоченные по id
+        """
+        return self._snapshot(db)[0]
+
+    def digest(self, db: Session) -> str:
+        """
+        Хэш содержимого таблицы (для ETag); одинаков во всех процессах при одинаковых данных
+        """
+        return self._snapshot(db)[1]
+
+    def _snapshot(self, db: Session) -> Tuple[List[Dict[str, Any]], str]:
+        version = self._version()
+        if version is None:
+            rows = self._load(db)
+            return rows, hashlib.sha1(json.dumps(rows).encode()).hexdigest()
+
+        local = self._local
+        if local is not None and local[0] == version:
+            return local[1], local[2]
+
+        key = self._rows_key(version)
+        try:
+            raw = self.backend.get(key)
+        except Exception as e:
+            logger.warning("Кэш таблицы %s недоступен: %s", self.name, e)
+            raw = None
+
+        if raw is not None:
+            rows = json.loads(raw)
+        else:
+            # Строки под новой версией - с основного сервера: реплика может еще не получить изменение
+            rows = self._load(primary_session(db))
+            raw = json.dumps(rows).encode()
+            try:
+                self.backend.set(key, raw, self.ttl)
+            except Exception as e:
+                logger.warning("Кэш таблицы %s недоступен: %s", self.name, e)
+
+        digest = hashlib.sha1(raw).hexdigest()
+        self._local = (version, rows, digest)
+        return rows, digest
+
+    def paginate(
+            self,
+            db: Session,
+            *,
+            skip: int = 0,
+            limit: int = 100,
+            query: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Страница строк и общее количество с учетом поиска (без учета регистра, как ILIKE '%query%')
+        """
+        rows = self.rows(db)
+        if query:
+            needle = query.casefold()
+            rows = [
+                row for row in rows
+                if any(needle in (row.get(field) or "").casefold() for field in self.search_fields)
+            ]
+        return rows[skip:skip + limit], len(rows)
+
+    def _rows_key(self, version: int) -> str:
+        return f"table:{self.name}:rows:{version}"
+
+    def bump(self, key: Optional[str] = None) -> None:
+        """
+        Новая версия таблицы; вызывается после фиксации изменений.
+        Строки предыдущей версии больше не читаются и удаляются из хранилища
+        """
+        self._local = None
+        try:
+            version = self.backend.incr(self.version_key)
+            self.backend.delete(self._rows_key(version - 1))
+        except Exception as e:
+            logger.warning("Не удалось обновить версию кэша таблицы %s: %s", self.name, e)
+
+    def bump_remote(self, key: Optional[str] = None) -> None:
+        """
+        Изменение таблицы в другом процессе: версию общего хранилища уже увеличил
+        процесс, зафиксировавший изменение, - здесь сбрасываются только разобранные строки
+        """
+        if self.backend.shared:
+            self._local = None
+        else:
+            self.bump(key)
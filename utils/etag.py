@@ -0,0 +1,55 @@
+"""
+Слабые ETag и условные GET-запросы (If-None-Match -> 304 Not Modified).
+
+ETag строится по признакам версии данных (updated_at, количество строк, версия
+кэша), а не по телу ответа, поэтому проверку можно выполнить до загрузки и
+сериализации данных.
+"""
+import hashlib
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Слабый ETag по признакам версии данных
+
+    Args:
+        parts: Значения, изменение любого из которых меняет ETag
+
+    Returns:
+        Значение заголовка ETag вида W/"..."
+    """
+    raw = "|".join(part.isoformat() if isinstance(part, datetime) else str(part) for part in parts)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+
+def collection_etag(name: str, count: int, last_modified: Optional[datetime]) -> str:
+    """
+    ETag коллекции по количеству строк и max(updated_at): удаление меняет количество,
+    вставка и изменение - максимальное время обновления
+    """
+    return make_etag(name, count, last_modified)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Совпадает ли ETag с заголовком If-None-Match запроса (слабое сравнение, RFC 9110)
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Ответ 304 без тела
+    """
+    return Response(status_code=304, headers={"ETag": etag})
@@ -4,6 +4,7 @@ from fastapi import UploadFile
 from typing import Optional
 from pathlib import Path
 from config import get_settings
+from utils.static_files import precompress
 
 settings = get_settings()
 
@@ -42,6 +43,7 @@ async def save_upload_file(upload_file: UploadFile, directory: str = None) -> Op
         contents = await upload_file.read()
         with open(file_path, "wb") as f:
             f.write(contents)
+        precompress(file_path, contents, upload_file.content_type)
         
         # Формируем URL для доступа к файлу
         relative_path = os.path.join(directory or "", unique_filename) if directory else unique_filename
@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], None]
+
+
+class InvalidationBus:
+    """
+    Шина инвалидации кэшей после фиксации транзакции
+
+    publish() откладывает событие до commit сессии: в своем процессе обработчики
+    вызываются в after_commit, другим процессам событие доставляется через
+    PostgreSQL NOTIFY (уведомление транзакционно и уходит только при commit),
+    которое принимает фоновый поток с LISTEN. При откате события отбрасываются.
+    События, пришедшие, пока соединение LISTEN было разорвано, теряются: устаревание
+    кэшей в этом случае ограничено их TTL.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # Тема -> пары (обработчик событий своего процесса, обработчик событий других процессов)
+        self._handlers: Dict[str, List[Tuple[Handler, Handler]]] = defaultdict(list)
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_soft_rollback", self._after_rollback)
+
+    def subscribe(self, topic: str, handler: Handler, remote_handler: Optional[Handler] = None) -> None:
+        """
+        Подписка на события темы; handler получает ключ измененного объекта
+
+        Args:
+            topic: Тема
+            handler: Обработчик
+            remote_handler: Обработчик событий других процессов, если он отличается
+                (например, общий кэш уже обновлен процессом, зафиксировавшим изменение)
+        """
+        self._handlers[topic].append((handler, remote_handler or handler))
+
+    def publish(self, db: Session, topic: str, *keys: Any) -> None:
+        """
+        Событие об изменении объектов в транзакции сессии db
+
+        Args:
+            db: Сессия, в которой выполняется изменение
+            topic: Тема (например, "user", "role")
+            keys: Ключи измененных объектов (одно уведомление на все ключи)
+        """
+        notify = self._defer(db, topic, keys)
+        if notify is not None:
+            db.execute(*notify)
+
+    async def publish_async(self, db: AsyncSession, topic: str, *keys: Any) -> None:
+        """
+        То же, что publish, для асинхронной сессии: обработчики вызываются
+        после commit ее синхронной сессии (sync_session)
+        """
+        notify = self._defer(db.sync_session, topic, keys)
+        if notify is not None:
+            await db.execute(*notify)
+
+    def _defer(self, db: Session, topic: str, keys: Sequence[Any]) -> Optional[tuple]:
+        # События - до commit в info сессии; для PostgreSQL - запрос NOTIFY в той же транзакции
+        keys = [str(key) for key in keys]
+        if not keys:
+            return None
+
+        db.info.setdefault("invalidations", []).extend((topic, key) for key in keys)
+
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        payload = json.dumps({"origin": self.origin, "topic": topic, "keys": keys})
+        return text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload}
+
+    def dispatch(self, topic: str, key: str, remote: bool = False) -> None:
+        for handler, remote_handler in self._handlers.get(topic, []):
+            try:
+                (remote_handler if remote else handler)(key)
+            except Exception:
+                logger.exception("Ошибка обработчика инвалидации %s:%s", topic, key)
+
+    def _after_commit(self, session: Session) -> None:
+        for topic, key in session.info.pop("invalidations", []):
+            self.dispatch(topic, key)
+
+    def _after_rollback(self, session: Session, previous_transaction) -> None:
+        # Откат точки сохранения не отменяет события внешней транзакции
+        if previous_transaction.parent is None:
+            session.info.pop("invalidations", None)
+
+    def start_listener(self, engine: Engine) -> None:
+        """
+        Запуск фонового потока LISTEN для событий других процессов (только PostgreSQL + psycopg2)
+        """
+        if engine.dialect.name != "postgresql" or engine.dialect.driver != "psycopg2":
+            return
+        if self._listener is not None and self._listener.is_alive():
+            return
+
+        # Отдельный движок без пула: соединение LISTEN занято постоянно
+        listen_engine = create_engine(engine.url, poolclass=NullPool)
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, args=(listen_engine,), name="cache-invalidation-listener", daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=5)
+            self._listener = None
+
+    def _listen(self, listen_engine: Engine) -> None:
+        while not self._stop.is_set():
+            try:
+                connection = listen_engine.raw_connection()
+            except Exception as e:
+                logger.warning("Нет соединения для LISTEN %s: %s", self.channel, e)
+                self._stop.wait(5)
+                continue
+
+            try:
+                dbapi_connection = connection.driver_connection
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+
+                while not self._stop.is_set():
+                    if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        self._handle_notification(dbapi_connection.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning("Соединение LISTEN %s прервано: %s", self.channel, e)
+                self._stop.wait(1)
+            finally:
+                connection.close()
+
+    def _handle_notification(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+
+        # События своего процесса уже обработаны в after_commit
+        if message.get("origin") != self.origin:
+            for key in message["keys"]:
+                self.dispatch(message["topic"], key, remote=True)
+
+
+invalidation_bus = InvalidationBus(settings.CACHE_INVALIDATION_CHANNEL)
@@ -0,0 +1,277 @@
+"""
+Инвертированный индекс в памяти процесса с ранжированием BM25.
+
+Списки вхождений (posting lists) хранятся в массивах array: номера документов
+('I') и взвешенные частоты термина ('H'), без объекта Python на каждое вхождение.
+Удаление помечает документ удаленным; вхождения удаленных документов вычищаются
+при уплотнении, когда их становится больше, чем живых.
+
+Термины - слова в нижнем регистре после стемминга: snowballstemmer (russian,
+english), если пакет установлен, иначе упрощенное отсечение окончаний.
+"""
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import snowballstemmer
+except ImportError:
+    snowballstemmer = None
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+CYRILLIC_RE = re.compile(r"[а-я]")
+
+# Окончания для упрощенного стемминга, от длинных к коротким
+RUSSIAN_ENDINGS = sorted([
+    "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими", "ая", "яя", "ое", "ее", "ой", "ей", "ий",
+    "ый", "ые", "ие", "ых", "их", "ым", "им", "ую", "юю", "ов", "ев", "ам", "ям", "ах", "ях", "ом", "ем",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь",
+], key=len, reverse=True)
+# Окончание и замена; s не отсекается после s (glass, class)
+ENGLISH_ENDINGS = [("ies", "y"), ("ing", ""), ("ed", ""), ("ly", ""), ("s", "")]
+MIN_STEM_LENGTH = 3
+
+# Максимальная взвешенная частота термина в документе (тип 'H')
+MAX_FREQUENCY = 65535
+
+
+class Stemmer:
+    """
+    Стемминг слов с кэшем (словарь каталога невелик по сравнению с числом вхождений)
+    """
+
+    def __init__(self):
+        self._snowball = None
+        if snowballstemmer is not None:
+            self._snowball = {
+                "russian": snowballstemmer.stemmer("russian"),
+                "english": snowballstemmer.stemmer("english"),
+            }
+        self._cache: Dict[str, str] = {}
+
+    def stem(self, word: str) -> str:
+        stem = self._cache.get(word)
+        if stem is None:
+            stem = self._stem(word)
+            if len(self._cache) < 1000000:
+                self._cache[word] = stem
+        return stem
+
+    def _stem(self, word: str) -> str:
+        # Артикулы и числа не стеммируются
+        if not word.isalpha():
+            return word
+
+        language = "russian" if CYRILLIC_RE.search(word) else "english"
+        if self._snowball is not None:
+            return self._snowball[language].stemWord(word)
+
+        if language == "russian":
+            for ending in RUSSIAN_ENDINGS:
+                if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+                    return word[:-len(ending)]
+            return word
+
+        for ending, replacement in ENGLISH_ENDINGS:
+            if word.endswith(ending) and not word.endswith("ss") and len(word) - len(ending) >= MIN_STEM_LENGTH:
+                word = word[:-len(ending)] + replacement
+                break
+        # Конечная e отбрасывается и у основы, и у слова без окончания:
+        # iphone, iphones -> iphon; boxes -> box; charge, charged -> charg
+        if word.endswith("e") and len(word) - 1 >= MIN_STEM_LENGTH:
+            word = word[:-1]
+        return word
+
+
+stemmer = Stemmer()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Термины текста: слова в нижнем регистре (ё -> е) после стемминга
+    """
+    if not text:
+        return []
+    return [stemmer.stem(word) for word in TOKEN_RE.findall(text.lower().replace("ё", "е"))]
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс документов с целочисленными ключами (ID строк).
+    Документ - набор полей с весами: термин поля с весом 3 учитывается как три
+    вхождения (упрощенный BM25F). Потокобезопасен.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        # Термин -> номер термина; по номеру термина - списки вхождений и число живых документов
+        self._terms: Dict[str, int] = {}
+        self._postings: List[array] = []
+        self._frequencies: List[array] = []
+        self._document_frequencies = array("I")
+        # По номеру документа: ключ (-1 - удален), длина и номера терминов
+        self._keys = array("q")
+        self._lengths = array("I")
+        self._document_terms: List[Optional[array]] = []
+        # Ключ -> номер документа
+        self._numbers: Dict[int, int] = {}
+        self._total_length = 0
+        self._deleted = 0
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def add(self, key: int, fields: Iterable[Tuple[Optional[str], int]]) -> None:
+        """
+        Добавление или замена документа
+
+        Args:
+            key: Ключ документа (ID строки)
+            fields: Пары (текст поля, вес поля)
+        """
+        frequencies = Counter()
+        for text, weight in fields:
+            for term in tokenize(text):
+                frequencies[term] += weight
+
+        with self._lock:
+            self._remove(key)
+
+            number = len(self._keys)
+            length = sum(frequencies.values())
+            term_ids = array("I")
+            for term, frequency in frequencies.items():
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    term_id = self._terms[term] = len(self._postings)
+                    self._postings.append(array("I"))
+                    self._frequencies.append(array("H"))
+                    self._document_frequencies.append(0)
+                self._postings[term_id].append(number)
+                self._frequencies[term_id].append(min(frequency, MAX_FREQUENCY))
+                self._document_frequencies[term_id] += 1
+                term_ids.append(term_id)
+
+            self._keys.append(key)
+            self._lengths.append(length)
+            self._document_terms.append(term_ids)
+            self._numbers[key] = number
+            self._total_length += length
+
+    def remove(self, key: int) -> None:
+        """
+        Удаление документа (если он есть в индексе)
+        """
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: int) -> None:
+        number = self._numbers.pop(key, None)
+        if number is None:
+            return
+
+        for term_id in self._document_terms[number]:
+            self._document_frequencies[term_id] -= 1
+        self._total_length -= self._lengths[number]
+        self._keys[number] = -1
+        self._lengths[number] = 0
+        self._document_terms[number] = None
+        self._deleted += 1
+
+        if self._deleted > 1000 and self._deleted > len(self._numbers):
+            self._compact()
+
+    def _compact(self) -> None:
+        # Перенумерация живых документов и очистка списков вхождений от удаленных
+        mapping = array("q", [-1]) * len(self._keys)
+        keys, lengths, document_terms = array("q"), array("I"), []
+        for number, key in enumerate(self._keys):
+            if key < 0:
+                continue
+            mapping[number] = len(keys)
+            keys.append(key)
+            lengths.append(self._lengths[number])
+            document_terms.append(self._document_terms[number])
+
+        for term_id, postings in enumerate(self._postings):
+            frequencies = self._frequencies[term_id]
+            new_postings, new_frequencies = array("I"), array("H")
+            for number, frequency in zip(postings, frequencies):
+                if mapping[number] >= 0:
+                    new_postings.append(mapping[number])
+                    new_frequencies.append(frequency)
+            self._postings[term_id] = new_postings
+            self._frequencies[term_id] = new_frequencies
+
+        # Термины без живых документов удаляются, номера остальных - перенумеровываются
+        term_mapping = array("q", [-1]) * len(self._postings)
+        postings, frequencies, document_frequencies = [], [], array("I")
+        for term_id, term_postings in enumerate(self._postings):
+            if not term_postings:
+                continue
+            term_mapping[term_id] = len(postings)
+            postings.append(term_postings)
+            frequencies.append(self._frequencies[term_id])
+            document_frequencies.append(self._document_frequencies[term_id])
+        self._terms = {
+            term: term_mapping[term_id] for term, term_id in self._terms.items() if term_mapping[term_id] >= 0
+        }
+        self._postings, self._frequencies, self._document_frequencies = postings, frequencies, document_frequencies
+        document_terms = [array("I", (term_mapping[term_id] for term_id in term_ids)) for term_ids in document_terms]
+
+        self._keys, self._lengths, self._document_terms = keys, lengths, document_terms
+        self._numbers = {key: number for number, key in enumerate(keys)}
+        self._deleted = 0
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        """
+        Документы, содержащие хотя бы один термин запроса, по убыванию оценки BM25
+
+        Args:
+            query: Поисковый запрос
+            limit: Максимальное количество результатов
+
+        Returns:
+            Пары (ключ, оценка); при равной оценке - сначала добавленные позже
+        """
+        terms = set(tokenize(query))
+
+        with self._lock:
+            count = len(self._numbers)
+            if not terms or not count:
+                return []
+            average_length = self._total_length / count or 1.0
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                term_id = self._terms.get(term)
+                if term_id is None or not self._document_frequencies[term_id]:
+                    continue
+                frequency_in_documents = self._document_frequencies[term_id]
+                idf = math.log(1 + (count - frequency_in_documents + 0.5) / (frequency_in_documents + 0.5))
+                for number, frequency in zip(self._postings[term_id], self._frequencies[term_id]):
+                    if self._keys[number] < 0:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[number] / average_length)
+                    scores[number] = scores.get(number, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+            return [(self._keys[number], score) for number, score in top]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Размер индекса: документы, термины, вхождения (включая удаленные до уплотнения)
+        """
+        with self._lock:
+            return {
+                "documents": len(self._numbers),
+                "deleted": self._deleted,
+                "terms": len(self._terms),
+                "postings": sum(len(postings) for postings in self._postings),
+            }
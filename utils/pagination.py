@@ -1,14 +1,299 @@
-from typing import TypeVar, Generic, List, Optional, Dict, Any, Type, Callable
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, and_
-from sqlalchemy.sql.elements import BinaryExpression
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import TypeVar, Generic, List, Optional, Dict, Any, Type, Callable, Tuple
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import Select, Table, func, or_, and_, text, tuple_
+from sqlalchemy.sql.elements import BinaryExpression, Label
 from pydantic import BaseModel
 
 from database import Base
+from schemas.base import TotalMode
+from utils.cache import TTLCache
+from config import get_settings
+
+settings = get_settings()
 
 ModelType = TypeVar("ModelType", bound=Base)
 SchemaType = TypeVar("SchemaType", bound=BaseModel)
 
+# Недавние результаты COUNT(*) по тексту и параметрам запроса (для total=estimated)
+count_cache = TTLCache(maxsize=settings.COUNT_CACHE_SIZE, ttl=settings.COUNT_CACHE_TTL)
+
+
+def estimate_table_rows(db: Session, table: Table) -> Optional[int]:
+    """
+    Оценка количества строк таблицы по статистике планировщика (pg_class.reltuples)
+
+    Args:
+        db: Сессия базы данных
+        table: Таблица
+
+    Returns:
+        Оценка или None, если статистики нет (таблица еще не анализировалась или не PostgreSQL)
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+
+    estimate = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table.fullname}
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+def count_total(
+        db: Session,
+        statement: Select,
+        total_mode: TotalMode = TotalMode.EXACT,
+        table: Optional[Table] = None
+) -> Tuple[Optional[int], TotalMode]:
+    """
+    Общее количество записей для пагинированного ответа
+
+    Args:
+        db: Сессия базы данных
+        statement: Запрос SELECT count(*) ...
+        total_mode: Требуемый способ подсчета
+        table: Таблица, если запрос не фильтрует строки: тогда для оценки
+            используется статистика планировщика
+
+    Returns:
+        Количество (None для total=none) и способ, которым оно фактически получено
+    """
+    if total_mode == TotalMode.NONE:
+        return None, TotalMode.NONE
+
+    if total_mode == TotalMode.ESTIMATED:
+        if table is not None:
+            estimate = estimate_table_rows(db, table)
+            if estimate is not None:
+                return estimate, TotalMode.ESTIMATED
+
+        compiled = statement.compile(dialect=db.get_bind().dialect)
+        key = (str(compiled), tuple(sorted((name, repr(value)) for name, value in compiled.params.items())))
+        cached = count_cache.get(key)
+        if cached is not None:
+            return cached, TotalMode.ESTIMATED
+
+        total = db.scalar(statement)
+        count_cache.set(key, total)
+        return total, TotalMode.EXACT
+
+    return db.scalar(statement), TotalMode.EXACT
+
+
+def aggregate_statement(query: Query, *aggregates: Any) -> Select:
+    """
+    SELECT агрегатов (count(*), max(...)) с FROM и WHERE запроса ORM, без ORDER BY
+    и eager-загрузок
+    """
+    return query.order_by(None).statement.with_only_columns(*aggregates, maintain_column_froms=True)
+
+
+class InvalidCursor(ValueError):
+    """Курсор пагинации поврежден или относится к другому порядку сортировки"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+
+@dataclass
+class KeysetPage:
+    """Страница результатов с курсорами соседних страниц"""
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    # Значения агрегатов по всему отфильтрованному запросу (см. Keyset.paginate)
+    aggregates: Optional[Dict[str, Any]] = None
+
+
+class Keyset:
+    """
+    Пагинация по ключу сортировки (keyset): следующая страница выбирается условием
+    (ключ, id) > (значения последней строки), а не OFFSET, поэтому глубокие страницы
+    не дороже первой, а вставки не сдвигают страницы.
+
+    Курсор непрозрачен для клиента: base64 от JSON со значениями ключа граничной строки
+    и направлением ("next" или "prev"). Последним столбцом ключа должен быть
+    уникальный столбец (id), иначе порядок неоднозначен.
+
+    Кроме столбцов модели ключ может содержать вычисляемые выражения с меткой
+    (например, релевантность ts_rank(...).label("rank")): они добавляются в SELECT,
+    а в items возвращаются только объекты модели.
+    """
+
+    def __init__(self, *columns, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+        self.expressions = [column for column in columns if isinstance(column, Label)]
+        self._name = ",".join(column.key for column in columns) + (":desc" if descending else "")
+
+    def key_values(self, item: Any, row: Any = None) -> List[Any]:
+        """
+        Значения ключа строки: столбцы модели - из объекта, выражения - из строки результата
+        """
+        return [
+            getattr(row, column.key) if isinstance(column, Label) else getattr(item, column.key)
+            for column in self.columns
+        ]
+
+    def encode(self, values: List[Any], direction: str) -> str:
+        payload = {
+            "k": self._name,
+            "v": [_encode_value(value) for value in values],
+            "d": direction,
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> Tuple[List[Any], str]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            values = [_decode_value(value) for value in payload["v"]]
+            direction = payload["d"]
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise InvalidCursor("Некорректный курсор пагинации")
+
+        if payload.get("k") != self._name or len(values) != len(self.columns) or direction not in ("next", "prev"):
+            raise InvalidCursor("Курсор относится к другому списку или порядку сортировки")
+        return values, direction
+
+    def order_by(self, descending: Optional[bool] = None) -> List[Any]:
+        descending = self.descending if descending is None else descending
+        return [column.desc() if descending else column.asc() for column in self.columns]
+
+    def paginate(
+            self,
+            query: Query,
+            *,
+            limit: int,
+            cursor: Optional[str] = None,
+            offset: int = 0,
+            aggregates: Optional[Dict[str, Any]] = None
+    ) -> KeysetPage:
+        """
+        Страница запроса по курсору или, если курсора нет, по смещению
+
+        Args:
+            query: Запрос с фильтрами, без ORDER BY, OFFSET и LIMIT
+            limit: Размер страницы
+            cursor: Курсор из next_cursor или prev_cursor предыдущего ответа
+            offset: Смещение (режим page/per_page, когда курсор не передан)
+            aggregates: Агрегаты по всему запросу без учета страницы, например
+                {"total": func.count()}. В режиме смещения вычисляются оконными
+                функциями (count(*) OVER ()) в том же запросе, что и страница;
+                по курсору или для пустой страницы - отдельным запросом
+
+        Returns:
+            Строки страницы и курсоры соседних страниц
+        """
+        if cursor is None:
+            extra = list(self.expressions)
+            if aggregates:
+                extra.extend(aggregate.over().label(name) for name, aggregate in aggregates.items())
+            rows = self._fetch(query, extra, self.order_by(), offset, limit + 1)
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            values = None
+            if aggregates:
+                if rows:
+                    values = {name: rows[0][1]._mapping[name] for name in aggregates}
+                else:
+                    values = self._aggregate(query, aggregates)
+
+            return KeysetPage(
+                items=[item for item, row in rows],
+                next_cursor=self.encode(self.key_values(*rows[-1]), "next") if rows and has_more else None,
+                prev_cursor=self.encode(self.key_values(*rows[0]), "prev") if rows and offset > 0 else None,
+                aggregates=values,
+            )
+
+        base_query = query
+
+        values, direction = self.decode(cursor)
+        backward = direction == "prev"
+        # Назад - сканирование в обратном порядке от первой строки текущей страницы
+        scan_descending = self.descending != backward
+        key = tuple_(*self.columns)
+        boundary = tuple_(*values)
+        query = query.filter(key < boundary if scan_descending else key > boundary)
+
+        rows = self._fetch(query, self.expressions, self.order_by(scan_descending), 0, limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+
+        return KeysetPage(
+            items=[item for item, row in rows],
+            next_cursor=self.encode(self.key_values(*rows[-1]), "next") if rows and (has_more or backward) else None,
+            prev_cursor=self.encode(self.key_values(*rows[0]), "prev") if rows and (has_more or not backward) else None,
+            # Условие курсора сужает выборку, поэтому агрегаты - по исходному запросу
+            aggregates=self._aggregate(base_query, aggregates) if aggregates else None,
+        )
+
+    @staticmethod
+    def _fetch(query: Query, extra: List[Any], order_by: List[Any], offset: int, limit: int) -> List[Tuple[Any, Any]]:
+        # Пары (объект, строка результата); дополнительные столбцы читаются из строки
+        if not extra:
+            return [(item, None) for item in query.order_by(*order_by).offset(offset).limit(limit).all()]
+        rows = query.add_columns(*extra).order_by(*order_by).offset(offset).limit(limit).all()
+        return [(row[0], row) for row in rows]
+
+    @staticmethod
+    def _aggregate(query: Query, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+        values = query.session.execute(aggregate_statement(query, *aggregates.values())).one()
+        return dict(zip(aggregates, values))
+
+
+def page_response(
+        items: List[Any],
+        *,
+        page: int,
+        per_page: int,
+        total: Optional[int],
+        total_kind: TotalMode = TotalMode.EXACT,
+        next_cursor: Optional[str] = None,
+        prev_cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Тело пагинированного ответа (PaginatedResponse)
+    """
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": (total + per_page - 1) // per_page if total is not None else None,
+        "total_kind": total_kind,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor
+    }
+
 
 class Paginator(Generic[ModelType, SchemaType]):
 
@@ -17,12 +302,15 @@ class Paginator(Generic[ModelType, SchemaType]):
             self,
             model: Type[ModelType],
             search_fields: Optional[List[str]] = None,
-            filter_builders: Optional[Dict[str, Callable[[Any], BinaryExpression]]] = None
+            filter_builders: Optional[Dict[str, Callable[[Any], BinaryExpression]]] = None,
+            keyset: Optional[Keyset] = None
     ):
 
         self.model = model
         self.search_fields = search_fields or []
         self.filter_builders = filter_builders or {}
+        # Порядок страниц; по умолчанию - по id
+        self.keyset = keyset or Keyset(model.id)
 
     def build_search_filters(self, query: str) -> List[BinaryExpression]:
 
@@ -64,7 +352,9 @@ class Paginator(Generic[ModelType, SchemaType]):
             filters: Optional[Dict[str, Any]] = None,
             search_query: Optional[str] = None,
             query_modifiers: Optional[List[Callable]] = None,
-            include_total: bool = True
+            include_total: bool = True,
+            total_mode: TotalMode = TotalMode.EXACT,
+            cursor: Optional[str] = None
     ) -> Dict[str, Any]:
 
         skip = (page - 1) * per_page
@@ -89,21 +379,29 @@ class Paginator(Generic[ModelType, SchemaType]):
             for modifier in query_modifiers:
                 query = modifier(query)
 
-        total = None
-        if include_total:
-            total_query = query.with_entities(func.count())
-            total = total_query.scalar()
-
-        items = query.offset(skip).limit(per_page).all()
+        if not include_total:
+            total_mode = TotalMode.NONE
 
-        pages = None
-        if total is not None:
-            pages = (total + per_page - 1) // per_page
+        if total_mode == TotalMode.EXACT:
+            # Страница и count(*) OVER () одним запросом
+            result = self.keyset.paginate(
+                query, limit=per_page, cursor=cursor, offset=skip, aggregates={"total": func.count()}
+            )
+            total, total_kind = result.aggregates["total"], TotalMode.EXACT
+        else:
+            # Без фильтров оценка берется из статистики таблицы
+            table = self.model.__table__ if not all_filters and not query_modifiers else None
+            total, total_kind = count_total(
+                db, aggregate_statement(query, func.count()), total_mode, table=table
+            )
+            result = self.keyset.paginate(query, limit=per_page, cursor=cursor, offset=skip)
 
-        return {
-            "items": items,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": pages
-        }
\ No newline at end of file
+        return page_response(
+            result.items,
+            page=page,
+            per_page=per_page,
+            total=total,
+            total_kind=total_kind,
+            next_cursor=result.next_cursor,
+            prev_cursor=result.prev_cursor
+        )
\ No newline at end of file
@@ -0,0 +1,94 @@
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.role import Role
+from utils.invalidation import invalidation_bus
+
+
+@dataclass(frozen=True)
+class RolePermissions:
+    """Права роли"""
+    role_id: int
+    name: str
+    can_read: bool
+    can_create: bool
+    can_update: bool
+    can_delete: bool
+    is_admin: bool
+
+    @classmethod
+    def from_model(cls, role: Role) -> "RolePermissions":
+        return cls(
+            role_id=role.id,
+            name=role.name,
+            can_read=role.can_read,
+            can_create=role.can_create,
+            can_update=role.can_update,
+            can_delete=role.can_delete,
+            is_admin=role.is_admin,
+        )
+
+
+class PermissionTable:
+    """
+    Неизменяемый снимок прав всех ролей по role_id
+
+    Снимок загружается целиком и заменяется одной операцией присваивания, поэтому
+    читатели без блокировок видят либо прежнюю, либо новую таблицу. После изменения
+    ролей снимок сбрасывается и перечитывается при следующем обращении.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[Mapping[int, RolePermissions]] = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self, role_id: int, db: Optional[Session] = None) -> Optional[RolePermissions]:
+        """
+        Права роли
+
+        Args:
+            role_id: ID роли
+            db: Сессия для загрузки снимка; если не передана, открывается отдельная
+
+        Returns:
+            Права роли или None, если роли нет
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.reload(db)
+        return snapshot.get(role_id)
+
+    def reload(self, db: Optional[Session] = None) -> Mapping[int, RolePermissions]:
+        """
+        Загрузка таблицы прав из БД и атомарная замена снимка
+        """
+        version = self._version
+        if db is None:
+            with SessionLocal() as session:
+                roles = session.scalars(select(Role)).all()
+        else:
+            roles = db.scalars(select(Role)).all()
+
+        snapshot = MappingProxyType({role.id: RolePermissions.from_model(role) for role in roles})
+        with self._lock:
+            # Снимок, прочитанный до инвалидации, не устанавливается
+            if version == self._version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+
+role_permissions = PermissionTable()
+
+invalidation_bus.subscribe("role", role_permissions.invalidate)
@@ -0,0 +1,195 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Границы корзин гистограммы времени ожидания соединения, мс
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class PoolTelemetry:
+    """
+    Счетчики пула соединений одного движка
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.waits = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+            self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.timeouts = 0
+            self.overflow_events = 0
+            self.invalidations = 0
+            self.soft_invalidations = 0
+            self.peak_checked_out = 0
+
+    def record_wait(self, seconds: float) -> None:
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            self.waits += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+            self.wait_histogram[bisect_left(WAIT_BUCKETS_MS, elapsed_ms)] += 1
+
+    def record_timeout(self, seconds: float) -> None:
+        self.record_wait(seconds)
+        with self._lock:
+            self.timeouts += 1
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_checkout(self, checked_out: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def snapshot(self, pool: Optional[QueuePool] = None) -> Dict[str, Any]:
+        with self._lock:
+            histogram: List[Dict[str, Any]] = []
+            for index, count in enumerate(self.wait_histogram):
+                le = WAIT_BUCKETS_MS[index] if index < len(WAIT_BUCKETS_MS) else None
+                histogram.append({"le_ms": le, "count": count})
+
+            stats = {
+                "name": self.name,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "peak_checked_out": self.peak_checked_out,
+                "waits": self.waits,
+                "wait_time_total_ms": round(self.wait_time_total * 1000, 3),
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+                "wait_histogram": histogram,
+                "timeouts": self.timeouts,
+                "overflow_events": self.overflow_events,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+            }
+
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+
+        return stats
+
+
+class InstrumentedPoolMixin:
+    """
+    Примесь к QueuePool: измеряет ожидание свободного соединения и события переполнения.
+    Событий "ожидание" у SQLAlchemy нет, поэтому они считаются здесь, а не в слушателях.
+    """
+
+    telemetry: Optional[PoolTelemetry] = None
+
+    def _is_saturated(self) -> bool:
+        return self._max_overflow > -1 and self.checkedin() == 0 and self.overflow() >= self._max_overflow
+
+    def connect(self):
+        if self.telemetry is None:
+            return super().connect()
+
+        saturated = self._is_saturated()
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.telemetry.record_timeout(time.perf_counter() - started)
+            raise
+
+        if saturated:
+            self.telemetry.record_wait(time.perf_counter() - started)
+
+        return connection
+
+    def _inc_overflow(self) -> bool:
+        created = super()._inc_overflow()
+        if created and self.telemetry is not None and self.overflow() > 0:
+            self.telemetry.increment("overflow_events")
+        return created
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Телеметрия всех движков приложения по имени
+POOL_TELEMETRY: Dict[str, PoolTelemetry] = {}
+_ENGINES: Dict[str, Engine] = {}
+
+
+def instrument_engine(engine: Engine, name: str) -> PoolTelemetry:
+    """
+    Подключение счетчиков к пулу движка через события пула SQLAlchemy
+
+    Args:
+        engine: Синхронный движок (для AsyncEngine - async_engine.sync_engine)
+        name: Имя движка в отчете телеметрии
+
+    Returns:
+        Объект телеметрии движка
+    """
+    telemetry = PoolTelemetry(name)
+    engine.pool.telemetry = telemetry
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        telemetry.increment("connects")
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        telemetry.record_checkout(engine.pool.checkedout())
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        telemetry.increment("checkins")
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        telemetry.increment("invalidations")
+
+    @event.listens_for(engine, "soft_invalidate")
+    def on_soft_invalidate(dbapi_connection, connection_record, exception):
+        telemetry.increment("soft_invalidations")
+
+    POOL_TELEMETRY[name] = telemetry
+    _ENGINES[name] = engine
+    return telemetry
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """
+    Снимок телеметрии всех инструментированных пулов
+    """
+    return [
+        telemetry.snapshot(_ENGINES[name].pool)
+        for name, telemetry in POOL_TELEMETRY.items()
+    ]
\ No newline at end of file
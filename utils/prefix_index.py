@@ -0,0 +1,150 @@
+"""
+Префиксный индекс для автодополнения: отсортированный массив ключей с бинарным
+поиском по префиксу (bisect).
+
+Элемент - объект (вид, ID) с подписью, весом (популярностью) и несколькими ключами:
+полный текст и каждый его хвост, начинающийся с нового слова, поэтому "pro" находит
+"iPhone 15 Pro Max". Лучшие элементы для коротких префиксов (где диапазон ключей
+велик) запоминаются и сбрасываются только для префиксов измененных ключей.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Символ больше любого символа ключей: верхняя граница диапазона префикса
+PREFIX_UPPER_BOUND = "\U0010ffff"
+
+Item = Tuple[str, int]
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    Нормализованный текст ключа: слова в нижнем регистре (ё -> е) через пробел
+    """
+    if not text:
+        return ""
+    return " ".join(WORD_RE.findall(text.lower().replace("ё", "е")))
+
+
+def word_suffixes(text: str, max_words: int) -> List[str]:
+    """
+    Хвосты текста с начала каждого из первых max_words слов
+    """
+    words = text.split(" ")
+    return [" ".join(words[start:]) for start in range(min(len(words), max_words))]
+
+
+class PrefixIndex:
+    """
+    Автодополнение: лучшие по весу элементы, один из ключей которых начинается
+    с префикса. Потокобезопасен.
+    """
+
+    def __init__(self, cached_prefix_length: int = 3, cache_limit: int = 20):
+        """
+        Args:
+            cached_prefix_length: Префиксы не длиннее этого запоминаются
+            cache_limit: Сколько лучших элементов запоминается для префикса
+        """
+        self.cached_prefix_length = cached_prefix_length
+        self.cache_limit = cache_limit
+        self._lock = threading.RLock()
+        # Отсортированные ключи (текст, вид, ID)
+        self._keys: List[Tuple[str, str, int]] = []
+        # Элемент -> (подпись, вес, тексты ключей)
+        self._items: Dict[Item, Tuple[str, float, Tuple[str, ...]]] = {}
+        # Префикс -> лучшие элементы
+        self._top: Dict[str, List[Item]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, kind: str, id: int, label: str, weight: float, texts: Iterable[str]) -> None:
+        """
+        Добавление или замена элемента
+
+        Args:
+            kind: Вид элемента ("product", "brand", "category")
+            id: ID элемента
+            label: Подпись в подсказке
+            weight: Вес (популярность)
+            texts: Нормализованные тексты ключей
+        """
+        texts = tuple(sorted({text for text in texts if text}))
+        with self._lock:
+            self._remove((kind, id))
+            self._items[(kind, id)] = (label, weight, texts)
+            for text in texts:
+                insort(self._keys, (text, kind, id))
+            self._forget(texts)
+
+    def load(self, items: Iterable[Tuple[str, int, str, float, Iterable[str]]]) -> None:
+        """
+        Замена содержимого индекса (одна сортировка вместо вставок по одному)
+        """
+        keys, elements = [], {}
+        for kind, id, label, weight, texts in items:
+            texts = tuple(sorted({text for text in texts if text}))
+            elements[(kind, id)] = (label, weight, texts)
+            keys.extend((text, kind, id) for text in texts)
+        keys.sort()
+
+        with self._lock:
+            self._keys, self._items, self._top = keys, elements, {}
+
+    def remove(self, kind: str, id: int) -> None:
+        """
+        Удаление элемента (если он есть)
+        """
+        with self._lock:
+            self._remove((kind, id))
+
+    def _remove(self, item: Item) -> None:
+        element = self._items.pop(item, None)
+        if element is None:
+            return
+        for text in element[2]:
+            position = bisect_left(self._keys, (text, *item))
+            if position < len(self._keys) and self._keys[position] == (text, *item):
+                del self._keys[position]
+        self._forget(element[2])
+
+    def _forget(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            for length in range(1, min(len(text), self.cached_prefix_length) + 1):
+                self._top.pop(text[:length], None)
+
+    def complete(self, prefix: str, limit: int) -> List[Tuple[str, int, str]]:
+        """
+        Лучшие по весу элементы для префикса
+
+        Args:
+            prefix: Нормализованный префикс
+            limit: Максимальное количество элементов
+
+        Returns:
+            Тройки (вид, ID, подпись)
+        """
+        if not prefix:
+            return []
+
+        with self._lock:
+            if len(prefix) <= self.cached_prefix_length and limit <= self.cache_limit:
+                top = self._top.get(prefix)
+                if top is None:
+                    top = self._top[prefix] = self._best(prefix, self.cache_limit)
+                top = top[:limit]
+            else:
+                top = self._best(prefix, limit)
+            return [(kind, id, self._items[(kind, id)][0]) for kind, id in top]
+
+    def _best(self, prefix: str, limit: int) -> List[Item]:
+        start = bisect_left(self._keys, (prefix,))
+        end = bisect_left(self._keys, (prefix + PREFIX_UPPER_BOUND,), start)
+        matched = {(kind, id) for text, kind, id in self._keys[start:end]}
+        # При равном весе - элемент с меньшей подписью
+        return heapq.nsmallest(limit, matched, key=lambda item: (-self._items[item][1], self._items[item][0]))
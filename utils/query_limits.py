@@ -0,0 +1,113 @@
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from utils.sql_instrumentation import normalize_sql
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# SQLSTATE отмены запроса по statement_timeout
+QUERY_CANCELED_SQLSTATE = "57014"
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Запрос к API выполнил больше SQL-запросов, чем разрешено бюджетом
+    """
+
+    def __init__(self, statements: int, max_statements: int):
+        super().__init__(f"Query budget exceeded: {statements} statements, limit {max_statements}")
+        self.statements = statements
+        self.max_statements = max_statements
+
+
+class QueryLimits:
+    """
+    Ограничения SQL для одного HTTP-запроса: statement_timeout и бюджет числа запросов
+    """
+
+    def __init__(self, timeout_ms: Optional[int] = None, max_statements: Optional[int] = None):
+        self.timeout_ms = timeout_ms
+        self.max_statements = max_statements
+        self.statements = 0
+        self.reported = False
+
+
+_current_limits: ContextVar[Optional[QueryLimits]] = ContextVar("query_limits", default=None)
+
+
+def query_limits(timeout_ms: Optional[int] = None, max_statements: Optional[int] = None):
+    """
+    Фабрика зависимости, задающей ограничения SQL для маршрута или роутера
+
+    Ограничения, заданные ближе к обработчику, заменяют ограничения приложения и роутера.
+
+    Args:
+        timeout_ms: statement_timeout для транзакций запроса, мс (None - по умолчанию для движка)
+        max_statements: Максимум SQL-запросов за HTTP-запрос (None - без изменения, 0 - без ограничения)
+
+    Returns:
+        Зависимость FastAPI
+    """
+
+    # Асинхронная зависимость выполняется в контексте задачи запроса, поэтому значение
+    # ContextVar видно и обработчику, который FastAPI запускает в пуле потоков
+    async def apply_query_limits() -> QueryLimits:
+        limits = _current_limits.get()
+        if limits is None:
+            limits = QueryLimits()
+            _current_limits.set(limits)
+        if timeout_ms is not None:
+            limits.timeout_ms = timeout_ms
+        if max_statements is not None:
+            limits.max_statements = max_statements
+        return limits
+
+    return apply_query_limits
+
+
+@event.listens_for(Session, "after_begin")
+def set_statement_timeout(session, transaction, connection):
+    # Таймаут маршрута действует только до конца транзакции (SET LOCAL)
+    limits = _current_limits.get()
+    if limits is None or limits.timeout_ms is None or connection.dialect.name != "postgresql":
+        return
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(limits.timeout_ms)}")
+
+
+def instrument_query_limits(engine: Engine) -> None:
+    """
+    Подключение учета бюджета запросов к движку (для AsyncEngine - async_engine.sync_engine)
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        limits = _current_limits.get()
+        if limits is None or not limits.max_statements:
+            return
+
+        limits.statements += 1
+        if limits.statements <= limits.max_statements:
+            return
+
+        if settings.DB_QUERY_BUDGET_ACTION == "fail":
+            raise QueryBudgetExceeded(limits.statements, limits.max_statements)
+        if not limits.reported:
+            limits.reported = True
+            logger.warning("Превышен бюджет SQL-запросов: лимит %s, запрос: %s",
+                           limits.max_statements, normalize_sql(statement))
+
+
+def is_statement_timeout(error: BaseException) -> bool:
+    """
+    Отменен ли запрос по statement_timeout (psycopg2 - pgcode, asyncpg - sqlstate)
+    """
+    orig = getattr(error, "orig", None)
+    code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    return code == QUERY_CANCELED_SQLSTATE
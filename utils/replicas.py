@@ -0,0 +1,143 @@
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Отставание реплики в секундах; 0, если реплика догнала мастер или это не реплика
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+@dataclass
+class ReplicaState:
+    """Последнее известное состояние реплики"""
+    name: str
+    engine: Engine
+    healthy: bool = True
+    lag: Optional[float] = None
+    checked_at: float = 0.0
+    error: Optional[str] = None
+    probing: bool = False
+
+
+class ReplicaRouter:
+    """
+    Выбор движка для запросов только на чтение: реплики по кругу (round-robin),
+    с откатом на основной сервер, если реплика недоступна или отстает сильнее max_lag
+
+    Состояние реплик проверяется в фоновых потоках; до первой проверки реплика
+    в ротацию не входит.
+    """
+
+    def __init__(
+            self,
+            primary: Engine,
+            replicas: List[Engine],
+            max_lag: float = 5.0,
+            check_interval: float = 5.0
+    ):
+        self.primary = primary
+        self.replicas = [
+            ReplicaState(name=f"replica_{index}", engine=replica, healthy=False)
+            for index, replica in enumerate(replicas)
+        ]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._cycle_lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+
+    def _next_replica(self) -> ReplicaState:
+        with self._cycle_lock:
+            return next(self._cycle)
+
+    def _probe(self, replica: ReplicaState) -> None:
+        try:
+            with replica.engine.connect() as connection:
+                lag = float(connection.execute(REPLICA_LAG_QUERY).scalar() or 0)
+        except Exception as e:
+            self.mark_unhealthy(replica.engine, e)
+            return
+
+        replica.lag = lag
+        replica.error = None
+        replica.checked_at = time.monotonic()
+        if lag > self.max_lag:
+            if replica.healthy:
+                logger.warning("Реплика %s отстает на %.1f с, чтение идет с основного сервера", replica.name, lag)
+            replica.healthy = False
+        else:
+            replica.healthy = True
+
+    def _probe_in_background(self, replica: ReplicaState) -> None:
+        try:
+            self._probe(replica)
+        finally:
+            replica.probing = False
+
+    def _is_available(self, replica: ReplicaState) -> bool:
+        # Запрос, первым заметивший устаревшее состояние, запускает проверку в фоновом
+        # потоке и не ждет ее: медленная или недоступная реплика не задерживает запросы,
+        # до завершения проверки все пользуются прежним состоянием
+        now = time.monotonic()
+        with self._probe_lock:
+            if replica.probing or now - replica.checked_at < self.check_interval:
+                return replica.healthy
+            replica.probing = True
+            replica.checked_at = now
+
+        threading.Thread(
+            target=self._probe_in_background, args=(replica,), name=f"{replica.name}-probe", daemon=True
+        ).start()
+        return replica.healthy
+
+    def get_engine(self) -> Engine:
+        """
+        Движок для следующего запроса на чтение
+
+        Returns:
+            Движок реплики или основного сервера, если подходящих реплик нет
+        """
+        for _ in range(len(self.replicas)):
+            replica = self._next_replica()
+            if self._is_available(replica):
+                return replica.engine
+
+        return self.primary
+
+    def mark_unhealthy(self, engine: Engine, error: Optional[BaseException] = None) -> None:
+        """
+        Исключение реплики из ротации до следующей проверки
+        """
+        for replica in self.replicas:
+            if replica.engine is engine:
+                if replica.healthy:
+                    logger.warning("Реплика %s недоступна: %s", replica.name, error)
+                replica.healthy = False
+                replica.error = str(error) if error else None
+                replica.checked_at = time.monotonic()
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag": replica.lag,
+                "error": replica.error,
+            }
+            for replica in self.replicas
+        ]
\ No newline at end of file
@@ -1,12 +1,175 @@
-from typing import List, Dict, Any, Optional, Type, TypeVar, Generic
-from sqlalchemy import or_, and_
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Type, TypeVar, Generic, Sequence, Set, Tuple, Callable
+from sqlalchemy import ARRAY, Float, Integer, any_, cast, func, literal, or_, and_, select
 from sqlalchemy.orm import Session, Query
+from sqlalchemy.sql.elements import ColumnElement
 
-from database import Base
+from database import Base, primary_session
+from config import get_settings
+from utils.inverted_index import InvertedIndex
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 ModelType = TypeVar("ModelType", bound=Base)
 
 
+def normalize_query(query: str) -> str:
+    """
+    Нормализованный поисковый запрос: нижний регистр, без пробелов по краям,
+    слова через один пробел. Полнотекстовый поиск, ILIKE, pg_trgm и индекс в памяти
+    не зависят от регистра и количества пробелов, поэтому результаты те же
+    """
+    return " ".join(query.split()).lower()
+
+
+def substring_filter(columns: Sequence[Any], term: str) -> ColumnElement:
+    """
+    Условие ILIKE '%term%' хотя бы по одному из столбцов. При триграммных индексах
+    (gin_trgm_ops) на каждом из столбцов выполняется по индексам (BitmapOr)
+
+    Args:
+        columns: Столбцы модели
+        term: Поисковая строка
+
+    Returns:
+        Условие для WHERE
+    """
+    like_term = f"%{term}%"
+    return or_(*(column.ilike(like_term) for column in columns))
+
+
+def fuzzy_filter(
+        db: Session,
+        columns: Sequence[Any],
+        term: str,
+        threshold: Optional[float] = None
+) -> Tuple[ColumnElement, ColumnElement]:
+    """
+    Нечеткий поиск (pg_trgm): строка похожа на слово или фрагмент хотя бы одного
+    из столбцов (term <% column), с учетом опечаток. Порог word_similarity задается
+    на время транзакции (SET LOCAL), поэтому условие выполняется по триграммным индексам
+
+    Args:
+        db: Сессия базы данных
+        columns: Столбцы модели
+        term: Поисковая строка
+        threshold: Минимальная похожесть от 0 до 1 (по умолчанию SEARCH_FUZZY_THRESHOLD)
+
+    Returns:
+        Условие для WHERE и выражение релевантности (наибольшая word_similarity по столбцам)
+    """
+    threshold = settings.SEARCH_FUZZY_THRESHOLD if threshold is None else threshold
+    db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True)))
+
+    condition = or_(*(literal(term).op("<%")(column) for column in columns))
+    # word_similarity возвращает real; double precision - для точного сравнения в курсоре
+    rank = cast(func.greatest(*(func.word_similarity(term, column) for column in columns)), Float)
+    return condition, rank
+
+
+class SearchIndex:
+    """
+    Инвертированный индекс (BM25) текстовых полей таблицы в памяти процесса.
+
+    build() загружает таблицу целиком; после изменений ключи строк помечаются
+    устаревшими (mark_stale подписывается на тему шины инвалидации), и перед
+    следующим поиском эти строки одним запросом перечитываются из БД. Поиск
+    возвращает ID по убыванию релевантности, сами строки загружает БД.
+    """
+
+    def __init__(self, name: str, model: Type[ModelType], fields: Dict[str, int], max_results: Optional[int] = None):
+        """
+        Args:
+            name: Имя индекса (для журнала)
+            model: Модель SQLAlchemy
+            fields: Индексируемые поля и их веса, например {"name": 3, "description": 1}
+            max_results: Максимальное количество результатов поиска
+        """
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.max_results = max_results or settings.SEARCH_INDEX_MAX_RESULTS
+        self.index = InvertedIndex()
+        self.ready = False
+        self._stale: Set[int] = set()
+        self._stale_lock = threading.Lock()
+
+    def _select(self):
+        return select(self.model.id, *(getattr(self.model, field) for field in self.fields))
+
+    def _add(self, index: InvertedIndex, row: Any) -> None:
+        index.add(row[0], zip(row[1:], self.fields.values()))
+
+    def build(self, db: Session, batch_size: int = 5000) -> None:
+        """
+        Построение индекса по всей таблице; до завершения поиск выполняется в БД
+        """
+        index = InvertedIndex()
+        for row in db.execute(self._select().execution_options(yield_per=batch_size)):
+            self._add(index, row)
+        self.index = index
+        self.ready = True
+        logger.info("Поисковый индекс %s: %s", self.name, index.stats())
+
+    def mark_stale(self, key: Any) -> None:
+        """
+        Пометка строки измененной (обработчик шины инвалидации)
+        """
+        with self._stale_lock:
+            self._stale.add(int(key))
+
+    def refresh(self, db: Session) -> None:
+        """
+        Перечитывание измененных строк с основного сервера (на реплике изменения может
+        еще не быть, а повторно строка не перечитывается); удаленные строки убираются из индекса
+        """
+        with self._stale_lock:
+            stale, self._stale = self._stale, set()
+        if not stale:
+            return
+
+        try:
+            rows = primary_session(db).execute(self._select().where(self.model.id.in_(stale))).all()
+        except Exception:
+            with self._stale_lock:
+                self._stale |= stale
+            raise
+
+        for row in rows:
+            self._add(self.index, row)
+        for key in stale - {row[0] for row in rows}:
+            self.index.remove(key)
+
+    def search(self, db: Session, term: str) -> List[int]:
+        """
+        ID найденных строк по убыванию релевантности (не более max_results)
+        """
+        self.refresh(db)
+        return [key for key, score in self.index.search(term, self.max_results)]
+
+    def ranked_filter(self, db: Session, term: str) -> Tuple[ColumnElement, ColumnElement]:
+        """
+        Условие "ID среди найденных" и выражение релевантности для сортировки по убыванию
+        (позиция в результатах индекса со знаком минус)
+        """
+        ids = cast(literal(self.search(db, term), ARRAY(Integer)), ARRAY(Integer))
+        return self.model.id == any_(ids), -func.array_position(ids, self.model.id)
+
+
+def build_search_indexes(session_factory: Callable[[], Session], indexes: Sequence[SearchIndex]) -> None:
+    """
+    Построение поисковых индексов (при запуске приложения, в фоновом потоке)
+    """
+    for search_index in indexes:
+        try:
+            with session_factory() as db:
+                search_index.build(db)
+        except Exception:
+            logger.exception("Не удалось построить поисковый индекс %s", search_index.name)
+
+
 class SearchEngine(Generic[ModelType]):
 
     def __init__(
@@ -0,0 +1,164 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+from config import get_settings
+from utils.sql_instrumentation import get_request_stats, normalize_sql
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Ограничение длины значений параметров в логе и буфере
+MAX_PARAM_LENGTH = 200
+# Ограничение времени повторного выполнения запроса под EXPLAIN ANALYZE, мс
+EXPLAIN_STATEMENT_TIMEOUT_MS = 30000
+
+
+def _truncate(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    value = str(value)
+    if len(value) > MAX_PARAM_LENGTH:
+        return value[:MAX_PARAM_LENGTH] + "..."
+    return value
+
+
+def format_parameters(parameters: Any) -> Any:
+    """
+    Параметры запроса в виде, пригодном для JSON-лога
+    """
+    if isinstance(parameters, dict):
+        return {key: _truncate(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [format_parameters(value) if isinstance(value, (dict, list, tuple)) else _truncate(value)
+                for value in parameters]
+    return _truncate(parameters)
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов: кольцевой буфер последних записей и выборочный
+    EXPLAIN (ANALYZE, BUFFERS) для SELECT на отдельном соединении в фоновом потоке
+    """
+
+    def __init__(
+            self,
+            threshold_ms: float = 200.0,
+            explain_sample_rate: float = 0.1,
+            buffer_size: int = 100
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self._entries: deque = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        self._explain_engines: Dict[int, Engine] = {}
+
+    def instrument(self, engine: Engine) -> None:
+        """
+        Подключение журнала к движку (для AsyncEngine - async_engine.sync_engine).
+        EXPLAIN выполняется только для синхронных движков PostgreSQL: параметры
+        асинхронного драйвера несовместимы с отдельным синхронным соединением.
+        """
+        if engine.dialect.name == "postgresql" and not engine.dialect.is_async:
+            # Отдельный движок без пула: EXPLAIN не занимает соединения рабочих запросов
+            self._explain_engines[id(engine)] = create_engine(engine.url, poolclass=NullPool)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context.slow_query_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            duration_ms = (time.perf_counter() - context.slow_query_started) * 1000
+            if duration_ms >= self.threshold_ms:
+                self.record(engine, statement, parameters, duration_ms, executemany)
+
+    def record(
+            self,
+            engine: Engine,
+            statement: str,
+            parameters: Any,
+            duration_ms: float,
+            executemany: bool = False
+    ) -> None:
+        """
+        Запись медленного запроса в лог и буфер, при попадании в выборку - постановка EXPLAIN
+        """
+        stats = get_request_stats()
+        entry = {
+            "captured_at": datetime.now(timezone.utc),
+            "route": f"{stats.method} {stats.route}" if stats is not None else None,
+            "duration_ms": round(duration_ms, 2),
+            "sql": normalize_sql(statement),
+            "parameters": format_parameters(parameters),
+            "plan": None,
+        }
+        logger.warning(json.dumps({**entry, "captured_at": entry["captured_at"].isoformat()},
+                                  ensure_ascii=False, default=str))
+
+        with self._lock:
+            self._entries.append(entry)
+
+        explain_engine = self._explain_engines.get(id(engine))
+        if (
+                explain_engine is not None
+                and not executemany
+                and statement.lstrip().upper().startswith("SELECT")
+                and random.random() < self.explain_sample_rate
+        ):
+            self._executor.submit(self._explain, explain_engine, entry, statement, parameters)
+
+    def _explain(self, explain_engine: Engine, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+        try:
+            with explain_engine.connect() as connection:
+                # Транзакция только на чтение и откат: ANALYZE выполняет запрос повторно
+                with connection.begin() as transaction:
+                    connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+                    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_STATEMENT_TIMEOUT_MS}")
+                    rows = connection.exec_driver_sql(
+                        "EXPLAIN (ANALYZE, BUFFERS) " + statement,
+                        parameters or ()
+                    ).fetchall()
+                    transaction.rollback()
+        except Exception as e:
+            logger.warning("Не удалось получить план медленного запроса: %s", e)
+            plan = f"EXPLAIN failed: {e}"
+        else:
+            plan = "\n".join(row[0] for row in rows)
+
+        with self._lock:
+            entry["plan"] = plan
+
+    def snapshot(self, limit: Optional[int] = None, with_plan: bool = False) -> List[Dict[str, Any]]:
+        """
+        Записи буфера, начиная с самых свежих
+        """
+        with self._lock:
+            entries = [dict(entry) for entry in reversed(self._entries)]
+        if with_plan:
+            entries = [entry for entry in entries if entry["plan"] is not None]
+        return entries[:limit] if limit else entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    buffer_size=settings.SLOW_QUERY_BUFFER_SIZE
+)
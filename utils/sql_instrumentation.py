@@ -0,0 +1,192 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%\([^)]+\)s|%s|\$\d+|\?|(?<!:):\w+")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Форма запроса: литералы и параметры заменены на ?, списки IN (...) свернуты.
+    Запросы, отличающиеся только параметрами, дают одинаковую форму.
+    """
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _STRING_RE.sub("?", shape)
+    shape = _PLACEHOLDER_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    return _PLACEHOLDER_LIST_RE.sub("(?)", shape)
+
+
+class RequestQueryStats:
+    """
+    SQL-статистика одного HTTP-запроса
+    """
+
+    def __init__(self, scope: Dict[str, Any]):
+        self.scope = scope
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.statements = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        """
+        Шаблон маршрута (доступен после сопоставления запроса с маршрутом), иначе путь
+        """
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.path
+
+    def record(self, statement: str, duration: float) -> None:
+        shape = normalize_sql(statement)
+        with self._lock:
+            self.statements += 1
+            self.db_time += duration
+            self.shapes[shape] += 1
+
+    def repeated_shapes(self, threshold: int) -> List[Dict[str, Any]]:
+        """
+        Формы запросов, выполненные не меньше threshold раз (подозрение на N+1)
+        """
+        return [
+            {"shape": shape, "count": count}
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def get_request_stats() -> Optional[RequestQueryStats]:
+    """
+    Статистика текущего HTTP-запроса или None вне запроса
+    """
+    return _current_stats.get()
+
+
+class NPlusOneRegistry:
+    """
+    Накопленные подозрения на N+1 по маршрутам
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+    def add(self, route: str, suspects: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            shapes = self._routes.setdefault(route, {})
+            for suspect in suspects:
+                entry = shapes.setdefault(suspect["shape"], {"requests": 0, "max_count": 0})
+                entry["requests"] += 1
+                entry["max_count"] = max(entry["max_count"], suspect["count"])
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"route": route, "shape": shape, **entry}
+                for route, shapes in self._routes.items()
+                for shape, entry in shapes.items()
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+n_plus_one_registry = NPlusOneRegistry()
+
+
+def instrument_sql(engine: Engine) -> None:
+    """
+    Подключение учета SQL-запросов к движку (для AsyncEngine - async_engine.sync_engine)
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - context.query_started)
+
+
+class SQLInstrumentationMiddleware:
+    """
+    ASGI middleware: собирает SQL-статистику запроса, добавляет заголовок Server-Timing
+    и пишет структурированный лог с подозрениями на N+1
+    """
+
+    def __init__(self, app, threshold: Optional[int] = None):
+        self.app = app
+        self.threshold = threshold or settings.SQL_N_PLUS_ONE_THRESHOLD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                server_timing = (
+                    f'db;dur={stats.db_time * 1000:.2f};desc="{stats.statements} queries", '
+                    f"app;dur={(time.perf_counter() - started) * 1000:.2f}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._log(stats, status_code, time.perf_counter() - started)
+
+    def _log(self, stats: RequestQueryStats, status_code: int, elapsed: float) -> None:
+        suspects = stats.repeated_shapes(self.threshold)
+        record = {
+            "method": stats.method,
+            "route": stats.route,
+            "status": status_code,
+            "statements": stats.statements,
+            "db_time_ms": round(stats.db_time * 1000, 2),
+            "total_ms": round(elapsed * 1000, 2),
+        }
+
+        if suspects:
+            route = f"{stats.method} {stats.route}"
+            n_plus_one_registry.add(route, suspects)
+            record["n_plus_one"] = suspects
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+Заранее построенные запросы для самых частых выборок.
+
+Конструкция select() и вычисление ключа кэша компиляции выполняются один раз при
+импорте; при вызове в запрос подставляются только значения bindparam, а SQL берется
+из кэша скомпилированных запросов движка (query_cache_size, настройка DB_QUERY_CACHE_SIZE).
+"""
+from sqlalchemy import bindparam, func, select
+
+from models.brand import Brand
+from models.category import Category
+from models.order import Order, OrderStatus
+from models.product import Product
+from models.product_image import ProductImage
+from models.user import User
+
+# Параметр: username
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username")).limit(1)
+
+# Параметр: sku
+PRODUCT_BY_SKU = select(Product).where(Product.sku == bindparam("sku")).limit(1)
+
+# Параметр: user_id
+CART_BY_USER = select(Order).where(
+    Order.user_id == bindparam("user_id"),
+    Order.status == OrderStatus.CART.value
+).limit(1)
+
+# Параметр: id. Признаки версии карточки товара (ProductDetail) без загрузки самих строк:
+# updated_at товара, категории и бренда, количество и max(updated_at) изображений
+PRODUCT_DETAIL_VERSION = select(
+    Product.updated_at,
+    Category.updated_at,
+    Brand.updated_at,
+    select(func.count()).where(ProductImage.product_id == Product.id).scalar_subquery(),
+    select(func.max(ProductImage.updated_at)).where(ProductImage.product_id == Product.id).scalar_subquery(),
+).outerjoin(Category, Product.category_id == Category.id).outerjoin(
+    Brand, Product.brand_id == Brand.id
+).where(Product.id == bindparam("id"))
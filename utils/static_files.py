@@ -0,0 +1,153 @@
+"""
+Раздача загруженных файлов (/static/uploads) с долгим кэшированием.
+
+save_upload_file дает каждому файлу уникальное имя (UUID), поэтому содержимое по
+URL никогда не меняется и ответ можно кэшировать навсегда (Cache-Control: immutable).
+Если рядом с файлом лежат сжатые копии (.br, .gz) и клиент их принимает, отдается
+сжатая копия. Range-запросы и 304 по If-None-Match обрабатывает FileResponse.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import stat
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Сжатые копии в порядке предпочтения: (Content-Encoding, расширение файла)
+PRECOMPRESSED_ENCODINGS: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")]
+
+# Типы, которые имеет смысл сжимать (JPEG, PNG, WebP уже сжаты)
+COMPRESSIBLE_TYPES = {"image/svg+xml", "image/bmp", "image/x-icon", "image/vnd.microsoft.icon"}
+
+
+def _accepted_encodings(headers: Headers) -> List[str]:
+    encodings = []
+    for item in headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        encodings.append(name.strip().lower())
+    return encodings
+
+
+class ImmutableFileResponse(FileResponse):
+    """
+    FileResponse с передачей файла через расширение ASGI http.response.pathsend:
+    сервер (Granian, Hypercorn) отправляет файл сам, без чтения в Python (sendfile).
+    Range- и HEAD-запросы, а также серверы без расширения обслуживаются как обычно.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        headers = Headers(scope=scope)
+        if (
+                "http.response.pathsend" not in extensions
+                or scope["method"].upper() == "HEAD"
+                or headers.get("range") is not None
+                or self.stat_result is None
+        ):
+            await super().__call__(scope, receive, send)
+            return
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+        if self.background is not None:
+            await self.background()
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles для файлов с неизменяемым содержимым
+    """
+
+    def __init__(self, *args, max_age: int = 31536000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = f"public, max-age={max_age}, immutable"
+
+    def _precompressed(self, full_path: str, request_headers: Headers) -> Optional[Tuple[str, str, os.stat_result]]:
+        accepted = _accepted_encodings(request_headers)
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                stat_result = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(stat_result.st_mode):
+                return encoding, full_path + suffix, stat_result
+        return None
+
+    def file_response(
+            self,
+            full_path,
+            stat_result: os.stat_result,
+            scope: Scope,
+            status_code: int = 200
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        # Тип содержимого определяется по исходному файлу, а не по сжатой копии
+        media_type = mimetypes.guess_type(os.fspath(full_path))[0] or "text/plain"
+
+        served_path, encoding = full_path, None
+        precompressed = self._precompressed(os.fspath(full_path), request_headers)
+        if precompressed is not None:
+            encoding, served_path, stat_result = precompressed
+
+        response = ImmutableFileResponse(
+            served_path, status_code=status_code, stat_result=stat_result, media_type=media_type
+        )
+        # Сильный ETag по имени и размеру: содержимое по URL не меняется, а mtime
+        # может отличаться на разных серверах после копирования файлов
+        etag_base = f"{os.path.basename(served_path)}-{stat_result.st_size}"
+        response.headers["etag"] = f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+        response.headers["cache-control"] = self.cache_control
+        response.headers["vary"] = "Accept-Encoding"
+        if encoding is not None:
+            response.headers["content-encoding"] = encoding
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress(file_path: str, contents: bytes, content_type: Optional[str]) -> None:
+    """
+    Создание сжатых копий файла (.gz, и .br при установленном пакете brotli)
+    для сжимаемых типов; ошибки сжатия не мешают загрузке
+
+    Args:
+        file_path: Путь к сохраненному файлу
+        contents: Содержимое файла
+        content_type: MIME-тип файла
+    """
+    if content_type not in COMPRESSIBLE_TYPES:
+        return
+
+    try:
+        compressed = gzip.compress(contents, compresslevel=9, mtime=0)
+        if len(compressed) < len(contents):
+            with open(file_path + ".gz", "wb") as f:
+                f.write(compressed)
+
+        try:
+            import brotli
+        except ImportError:
+            return
+
+        compressed = brotli.compress(contents)
+        if len(compressed) < len(contents):
+            with open(file_path + ".br", "wb") as f:
+                f.write(compressed)
+    except OSError as e:
+        logger.warning("Не удалось создать сжатые копии %s: %s", file_path, e)
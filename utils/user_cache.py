@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from models.user import User
+from utils.cache import TTLCache
+from utils.invalidation import invalidation_bus
+from utils.permissions import RolePermissions, role_permissions
+from config import get_settings
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Неизменяемый снимок аутентифицированного пользователя.
+    Не привязан к сессии: для изменения пользователя его нужно загрузить из БД.
+    """
+    id: int
+    email: str
+    username: str
+    full_name: Optional[str]
+    is_active: bool
+    role_id: int
+    last_login: Optional[datetime]
+    created_at: datetime
+    updated_at: datetime
+
+    @property
+    def role(self) -> Optional[RolePermissions]:
+        """Права роли из общего снимка таблицы ролей"""
+        return role_permissions.get(self.role_id)
+
+    @classmethod
+    def from_model(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            role_id=user.role_id,
+            last_login=user.last_login,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+# Ключ - username (sub токена)
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+invalidation_bus.subscribe("user", user_cache.delete)